@@ -5,6 +5,8 @@
 确保完整解析SA地址、客户机地址、帧头校验和应用层链路用户数据
 """
 
+from protocol.checksum import crc16
+
 class EnhancedFrameParser:
     def __init__(self):
         self.frame_start_mark = 0x68  # 帧起始符
@@ -244,7 +246,7 @@ class EnhancedFrameParser:
     def calculate_hcs(self, data):
         """
         计算帧头校验序列(HCS)
-        使用CRC-16-CCITT算法
+        使用CRC-16/X-25算法
         
         Args:
             data: 要计算校验的数据
@@ -252,20 +254,12 @@ class EnhancedFrameParser:
         Returns:
             int: 校验值
         """
-        crc = 0xFFFF
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x0001:
-                    crc = (crc >> 1) ^ 0x8408
-                else:
-                    crc >>= 1
-        return crc
+        return crc16(data)
     
     def calculate_fcs(self, data):
         """
         计算帧校验序列(FCS)
-        使用CRC-16-CCITT算法
+        使用CRC-16/X-25算法
         
         Args:
             data: 要计算校验的数据
@@ -273,7 +267,7 @@ class EnhancedFrameParser:
         Returns:
             int: 校验值
         """
-        # FCS计算与HCS相同，都是CRC-16-CCITT
+        # FCS计算与HCS相同，都是CRC-16/X-25
         return self.calculate_hcs(data)
 
 
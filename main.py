@@ -5,10 +5,10 @@ from PySide6.QtGui import QColor, QFont
 from ui.main_window import MainWindow
 from utils.serial_handler import SerialHandler
 from utils.database_handler import DatabaseHandler
+from utils.oad_catalog import get_catalog
 from protocol.protocol_698 import Protocol698
 import re
 import time
-import json
 
 class TestSystem:
     def __init__(self):
@@ -63,6 +63,8 @@ class TestSystem:
                 success = self.serial_handler.connect(**config)
                 if success:
                     self.window.set_serial_connected(True)
+                    # 重新连接后按配置的最大帧长发送，建立应用连接后再按协商值收紧
+                    self.protocol.max_frame_size = self.window.max_frame_size
                     # 保���当前配置
                     self.window.save_serial_config()
                 else:
@@ -181,25 +183,29 @@ class TestSystem:
             # 生成帧名称：根据APDU服务类型和OI对象名称
             frame_name = self.generate_frame_name(service_type, oad)
             
-            # 创建帧
-            frame = self.protocol.create_frame(
-                direction=direction,
-                prm=prm,
-                function=function,
-                split_frame=split_frame,
-                addr_type=addr_type,
-                addr_len=addr_len,
-                sa_logic_value=sa_logic_value,
-                bit5=bit5,
-                logic_addr=logic_addr,
-                comm_addr=comm_addr,
-                service_type=service_type,
-                service_data_type=service_data_type,
-                service_priority=service_priority,
-                service_number=service_number,
-                oad=oad,
-                custom_data=custom_data
-            )
+            # 创建帧；超过16383字节的帧长须为1024的整数倍，否则无法用长度域表示
+            try:
+                frame = self.protocol.create_frame(
+                    direction=direction,
+                    prm=prm,
+                    function=function,
+                    split_frame=split_frame,
+                    addr_type=addr_type,
+                    addr_len=addr_len,
+                    sa_logic_value=sa_logic_value,
+                    bit5=bit5,
+                    logic_addr=logic_addr,
+                    comm_addr=comm_addr,
+                    service_type=service_type,
+                    service_data_type=service_data_type,
+                    service_priority=service_priority,
+                    service_number=service_number,
+                    oad=oad,
+                    custom_data=custom_data
+                )
+            except ValueError as e:
+                self.window.append_log(f"创建帧失败: {e}", "error")
+                return
             
             # 将帧保存到协议对象中
             self.protocol.save_frame(frame_name, frame)
@@ -340,42 +346,8 @@ class TestSystem:
         return service_type
     
     def get_oi_name_from_oad(self, oad):
-        """根据OAD获取OI对象名称"""
-        # 加载OAD配置
-        try:
-            with open('config/oad_config.json', 'r', encoding='utf-8') as f:
-                oad_config = json.load(f)
-            
-            # 先在预定义OAD中查找
-            if 'OAD' in oad_config:
-                for name, value in oad_config['OAD'].items():
-                    if value.upper() == oad.upper():
-                        # 提取名称部分（去除OAD编码）
-                        # 例: "40000200-日期时间" -> "日期时间"
-                        if '-' in name:
-                            return name.split('-', 1)[1]
-                        return name
-            
-            # 如果没有找到，尝试解析OAD结构：OI(2字节) + 属性(1字节) + 索引(1字节)
-            if len(oad) == 8:
-                oi = oad[0:4].upper()
-                
-                # 在OI_SUBCLASS中查找
-                if 'OI_SUBCLASS' in oad_config:
-                    for class_name, subclasses in oad_config['OI_SUBCLASS'].items():
-                        for sub_name, sub_value in subclasses.items():
-                            if sub_value.upper() == oi:
-                                # 提取名称部分
-                                if '-' in sub_name:
-                                    return sub_name.split('-', 1)[1]
-                                return sub_name
-            
-            # 如果都没有找到，返回OAD值
-            return f"OAD_{oad}"
-
-        except Exception as e:
-            print(f"读取OAD配置失败: {e}")
-            return f"OAD_{oad}"
+        """根据OAD获取OI对象名称（先查预定义OAD，再按OI查OI子类，索引见OadCatalog）"""
+        return get_catalog().name(oad)
 
     def handle_window_close(self, event):
         """处理窗关闭事件"""
@@ -547,8 +519,7 @@ class TestSystem:
         for row, frame_name in reversed(frames_to_delete):
             self.window.frame_table.removeRow(row)
             # 从协议对象中删除帧
-            if hasattr(self.protocol, 'frames'):
-                self.protocol.frames.pop(frame_name, None)
+            self.protocol.remove_frame(frame_name)
         
         # 重新编号
         self.renumber_frames()
@@ -704,10 +675,20 @@ class TestSystem:
                 timeout_spinbox = self.window.frame_table.cellWidget(row, 9)
                 timeout = timeout_spinbox.value() if timeout_spinbox else 1000
                 
-                # 发送帧并等待响应
-                success, response = self.serial_handler.send_frame(frame, timeout)
+                # 发送帧并等待响应，超过协商的最大帧长时拆成分帧逐帧确认发送
+                max_frame_size = self.protocol.max_frame_size
+                if max_frame_size and len(frame) > max_frame_size:
+                    fragments = self.protocol.frame_fragments(frame_name, max_frame_size)
+                    self.window.append_log(f"帧长{len(frame)}字节超过最大帧长{max_frame_size}，分{len(fragments)}帧发送", "info")
+                    success, response = self.serial_handler.send_fragments(fragments, timeout)
+                else:
+                    success, response = self.serial_handler.send_frame(frame, timeout)
                 
                 if success and response:
+                    max_frame_size = self.protocol.update_max_frame_size(self.serial_handler.response_apdu)
+                    if max_frame_size:
+                        self.window.append_log(f"协商的最大帧长: {max_frame_size}字节", "info")
+                    
                     # 解析响应帧
                     parsed_response = self.protocol.parse_frame(response)
                     if parsed_response:
@@ -1,5 +1,7 @@
 # protocol包初始化文件
 from .protocol_698 import Protocol698
 from .frame_parser import FrameParser
+from .frame_template import FrameTemplate
+from .frame_view import FrameView
 
-__all__ = ['Protocol698', 'FrameParser']
\ No newline at end of file
+__all__ = ['Protocol698', 'FrameParser', 'FrameTemplate', 'FrameView']
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+698.45协议应用层APDU解析
+GET-Response各种形式按结果逐个惰性解码：列表形式的响应以生成器逐个产出(OAD, DAR或数据)，
+调用方找到所需OAD即可停止，大型集中器响应也不必一次构建完整结果树
+"""
+
+from collections import namedtuple
+
+from . import axdr
+
+GET_RESPONSE = 0x85
+
+GET_RESPONSE_NORMAL = 1
+GET_RESPONSE_NORMAL_LIST = 2
+GET_RESPONSE_RECORD = 3
+GET_RESPONSE_RECORD_LIST = 4
+GET_RESPONSE_NEXT = 5
+GET_RESPONSE_MD5 = 6
+
+GET_RESPONSE_NAMES = {
+    GET_RESPONSE_NORMAL: 'GetResponseNormal',
+    GET_RESPONSE_NORMAL_LIST: 'GetResponseNormalList',
+    GET_RESPONSE_RECORD: 'GetResponseRecord',
+    GET_RESPONSE_RECORD_LIST: 'GetResponseRecordList',
+    GET_RESPONSE_NEXT: 'GetResponseNext',
+    GET_RESPONSE_MD5: 'GetResponseMD5',
+}
+
+# GetResponseNext分帧响应的CHOICE
+NEXT_DAR = 0
+NEXT_NORMAL = 1
+NEXT_RECORD = 2
+
+
+class GetResult(namedtuple('GetResult', 'oad dar data rcsd')):
+    """
+    一个OAD的读取结果
+
+    oad: OAD（整数）
+    dar: 失败时的DAR，成功时为None
+    data: Normal为Data；Record为记录行列表（每行为与rcsd列一一对应的Data列表）；MD5为octet-string
+    rcsd: Record形式的列选择（CSD列表），其余形式为None
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.dar is None
+
+
+class GetResponse:
+    """
+    GET-Response APDU
+
+    Args:
+        apdu: 以服务类型85H开头的APDU（bytes/bytearray/memoryview）
+
+    Attributes:
+        choice: 响应形式（GET_RESPONSE_NORMAL等）
+        piid_acd: PIID-ACD
+        last_frame: GetResponseNext的末帧标志，其余形式为None
+        sequence: GetResponseNext的分帧序号，其余形式为None
+        next_choice: GetResponseNext的分帧响应类型（NEXT_DAR/NEXT_NORMAL/NEXT_RECORD）
+        dar: GetResponseNext分帧响应为错误信息时的DAR
+        end: 结果全部迭代完成后的结束偏移（跟随上报信息域起点），未迭代完时为None
+    """
+
+    __slots__ = ('apdu', 'choice', 'piid_acd', 'last_frame', 'sequence', 'next_choice', 'dar',
+                 'end', '_body')
+
+    def __init__(self, apdu):
+        if len(apdu) < 3:
+            raise axdr.AXDRDecodeError('GET-Response长度不足')
+        if apdu[0] != GET_RESPONSE:
+            raise axdr.AXDRDecodeError(f'服务类型{apdu[0]:02X}H不是GET-Response')
+        self.apdu = apdu
+        self.choice = apdu[1]
+        if self.choice not in GET_RESPONSE_NAMES:
+            raise axdr.AXDRDecodeError(f'GET-Response类型{self.choice}无效')
+        self.piid_acd = apdu[2]
+        self.last_frame = None
+        self.sequence = None
+        self.next_choice = None
+        self.dar = None
+        self.end = None
+        pos = 3
+        if self.choice == GET_RESPONSE_NEXT:
+            self.last_frame, pos = axdr.decode(apdu, pos, axdr.BOOL)
+            self.sequence, pos = axdr.decode(apdu, pos, axdr.LONG_UNSIGNED)
+            self.next_choice, pos = axdr.decode(apdu, pos, axdr.UNSIGNED)
+            if self.next_choice == NEXT_DAR:
+                self.dar, pos = axdr.decode(apdu, pos, axdr.ENUM)
+            elif self.next_choice not in (NEXT_NORMAL, NEXT_RECORD):
+                raise axdr.AXDRDecodeError(f'GetResponseNext分帧响应类型{self.next_choice}无效')
+        self._body = pos
+
+    @property
+    def name(self):
+        return GET_RESPONSE_NAMES[self.choice]
+
+    def __iter__(self):
+        return self.results()
+
+    def results(self):
+        """
+        逐个解码读取结果
+
+        Yields:
+            GetResult: 按响应中的顺序
+        """
+        apdu = self.apdu
+        pos = self._body
+        choice = self.choice
+        if choice == GET_RESPONSE_NEXT:
+            if self.next_choice == NEXT_DAR:
+                self.end = pos
+                return
+            choice = GET_RESPONSE_NORMAL_LIST if self.next_choice == NEXT_NORMAL else GET_RESPONSE_RECORD_LIST
+
+        if choice in (GET_RESPONSE_NORMAL, GET_RESPONSE_RECORD, GET_RESPONSE_MD5):
+            count = 1
+        else:
+            count, pos = axdr.read_length(apdu, pos)
+
+        if choice in (GET_RESPONSE_NORMAL, GET_RESPONSE_NORMAL_LIST):
+            decode_one = _decode_normal
+        elif choice == GET_RESPONSE_MD5:
+            decode_one = _decode_md5
+        else:
+            decode_one = _decode_record
+
+        for _ in range(count):
+            result, pos = decode_one(apdu, pos)
+            yield result
+        self.end = pos
+
+    def find(self, oad):
+        """返回指定OAD的结果，找到后即停止解码，不存在时返回None"""
+        for result in self.results():
+            if result.oad == oad:
+                return result
+        return None
+
+
+def _decode_normal(apdu, pos):
+    """A-ResultNormal: OAD + Get-Result"""
+    oad, pos = axdr.decode(apdu, pos, axdr.OAD)
+    (choice, value), pos = axdr.decode(apdu, pos, axdr.GET_RESULT)
+    if choice == 0:
+        return GetResult(oad, value, None, None), pos
+    return GetResult(oad, None, value, None), pos
+
+
+def _decode_md5(apdu, pos):
+    """OAD + CHOICE {DAR [0], MD5值 [1] octet-string}"""
+    oad, pos = axdr.decode(apdu, pos, axdr.OAD)
+    choice, pos = axdr.decode(apdu, pos, axdr.UNSIGNED)
+    if choice == 0:
+        dar, pos = axdr.decode(apdu, pos, axdr.ENUM)
+        return GetResult(oad, dar, None, None), pos
+    if choice != 1:
+        raise axdr.AXDRDecodeError(f'偏移{pos - 1}处MD5结果选择{choice}无效')
+    md5, pos = axdr.decode(apdu, pos, axdr.OCTET_STRING)
+    return GetResult(oad, None, md5, None), pos
+
+
+def _decode_record(apdu, pos):
+    """A-ResultRecord: OAD + RCSD + CHOICE {DAR [0], SEQUENCE OF A-RecordRow [1]}，每行列数等于RCSD列数"""
+    oad, pos = axdr.decode(apdu, pos, axdr.OAD)
+    rcsd, pos = axdr.decode(apdu, pos, axdr.RCSD)
+    choice, pos = axdr.decode(apdu, pos, axdr.UNSIGNED)
+    if choice == 0:
+        dar, pos = axdr.decode(apdu, pos, axdr.ENUM)
+        return GetResult(oad, dar, None, rcsd), pos
+    if choice != 1:
+        raise axdr.AXDRDecodeError(f'偏移{pos - 1}处记录结果选择{choice}无效')
+    count, pos = axdr.read_length(apdu, pos)
+    columns = len(rcsd)
+    rows = []
+    for _ in range(count):
+        row = []
+        for _ in range(columns):
+            value, pos = axdr.decode_data(apdu, pos)
+            row.append(value)
+        rows.append(row)
+    return GetResult(oad, None, rows, rcsd), pos
+
+
+def iter_get_results(apdu):
+    """逐个产出GET-Response中的读取结果，见GetResponse.results"""
+    return GetResponse(apdu).results()
+
+
+def format_csd(csd):
+    """CSD显示文本: OAD或 主OAD[关联OAD...]"""
+    choice, value = csd
+    if choice == 0:
+        return f'{value:08X}'
+    oad, related = value
+    return f"{oad:08X}[{' '.join(f'{item:08X}' for item in related)}]"
@@ -0,0 +1,833 @@
+"""
+698.45协议A-XDR数据编解码
+Data按类型标签查表分发，复合类型（array、structure、RSD、MS等）使用显式栈迭代解码，
+嵌套深度不受递归限制；定长/变长字段直接从缓冲区按偏移读取，不产生逐层切片。
+编码直接追加到bytearray，按数据结构描述（schema）编译的编码函数带缓存，可重复用于批量生成
+
+解码结果:
+    带类型标签的Data解码为 Data(tag, value)
+    array/structure的value为Data列表，其余类型的value见各类型说明
+编码输入与解码结果的值表示一致
+"""
+
+import struct
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+
+class AXDRDecodeError(ValueError):
+    """A-XDR数据解码错误"""
+
+
+class AXDREncodeError(ValueError):
+    """A-XDR数据编码错误"""
+
+
+class Data(namedtuple('Data', 'tag value')):
+    """带类型标签的Data值"""
+    __slots__ = ()
+
+    @property
+    def type_name(self):
+        return DATA_TYPE_NAMES.get(self.tag, f'未知类型({self.tag})')
+
+
+# Data类型标签
+NULL = 0
+ARRAY = 1
+STRUCTURE = 2
+BOOL = 3
+BIT_STRING = 4
+DOUBLE_LONG = 5
+DOUBLE_LONG_UNSIGNED = 6
+OCTET_STRING = 9
+VISIBLE_STRING = 10
+UTF8_STRING = 12
+INTEGER = 15
+LONG = 16
+UNSIGNED = 17
+LONG_UNSIGNED = 18
+LONG64 = 20
+LONG64_UNSIGNED = 21
+ENUM = 22
+FLOAT32 = 23
+FLOAT64 = 24
+DATE_TIME = 25
+DATE = 26
+TIME = 27
+DATE_TIME_S = 28
+OI = 80
+OAD = 81
+ROAD = 82
+OMD = 83
+TI = 84
+TSA = 85
+MAC = 86
+RN = 87
+REGION = 88
+SCALER_UNIT = 89
+RSD = 90
+CSD = 91
+MS = 92
+SID = 93
+SID_MAC = 94
+COMDCB = 95
+RCSD = 96
+
+DATA_TYPE_NAMES = {
+    NULL: 'null', ARRAY: 'array', STRUCTURE: 'structure', BOOL: 'bool',
+    BIT_STRING: 'bit-string', DOUBLE_LONG: 'double-long', DOUBLE_LONG_UNSIGNED: 'double-long-unsigned',
+    OCTET_STRING: 'octet-string', VISIBLE_STRING: 'visible-string', UTF8_STRING: 'UTF8-string',
+    INTEGER: 'integer', LONG: 'long', UNSIGNED: 'unsigned', LONG_UNSIGNED: 'long-unsigned',
+    LONG64: 'long64', LONG64_UNSIGNED: 'long64-unsigned', ENUM: 'enum',
+    FLOAT32: 'float32', FLOAT64: 'float64', DATE_TIME: 'date_time', DATE: 'date', TIME: 'time',
+    DATE_TIME_S: 'date_time_s', OI: 'OI', OAD: 'OAD', ROAD: 'ROAD', OMD: 'OMD', TI: 'TI',
+    TSA: 'TSA', MAC: 'MAC', RN: 'RN', REGION: 'Region', SCALER_UNIT: 'Scaler_Unit',
+    RSD: 'RSD', CSD: 'CSD', MS: 'MS', SID: 'SID', SID_MAC: 'SID_MAC', COMDCB: 'COMDCB', RCSD: 'RCSD',
+}
+
+# 解码项种类：0~255为不带标签的具体类型；DATA为带标签的Data；SEQUENCE_OF + 类型为“SEQUENCE OF 类型”
+DATA = 256
+SELECTOR2 = 300  # RSD方法2（方法3为若干个方法2）
+GET_RESULT = 301  # Get-Result: CHOICE {错误信息 [0] DAR, 数据 [1] Data}
+OPTIONAL_DATA = 302  # Data OPTIONAL
+SEQUENCE_OF = 512
+
+
+def read_length(buf, pos):
+    """
+    读取A-XDR可变长度
+
+    Returns:
+        tuple: (长度, 新偏移)
+    """
+    try:
+        first = buf[pos]
+    except IndexError:
+        raise AXDRDecodeError(f'偏移{pos}处缺少长度字节') from None
+    if first < 0x80:
+        return first, pos + 1
+    size = first & 0x7F
+    end = pos + 1 + size
+    if end > len(buf):
+        raise AXDRDecodeError(f'偏移{pos}处长度字段不完整')
+    return int.from_bytes(buf[pos + 1:end], 'big'), end
+
+
+def _take(buf, pos, size):
+    end = pos + size
+    if end > len(buf):
+        raise AXDRDecodeError(f'偏移{pos}处需要{size}字节，剩余{len(buf) - pos}字节')
+    return bytes(buf[pos:end]), end
+
+
+def _fixed(fmt):
+    unpacker = struct.Struct(fmt)
+    size = unpacker.size
+
+    def decode(buf, pos):
+        if pos + size > len(buf):
+            raise AXDRDecodeError(f'偏移{pos}处需要{size}字节，剩余{len(buf) - pos}字节')
+        return unpacker.unpack_from(buf, pos)[0], pos + size
+    # decode()内联定长类型时使用: (unpack_from, 字节数, 是否取单值)
+    decode.layout = (unpacker.unpack_from, size, True)
+    return decode
+
+
+def _fixed_tuple(fmt):
+    unpacker = struct.Struct(fmt)
+    size = unpacker.size
+
+    def decode(buf, pos):
+        if pos + size > len(buf):
+            raise AXDRDecodeError(f'偏移{pos}处需要{size}字节，剩余{len(buf) - pos}字节')
+        return unpacker.unpack_from(buf, pos), pos + size
+    decode.layout = (unpacker.unpack_from, size, False)
+    return decode
+
+
+def _decode_null(buf, pos):
+    return None, pos
+
+
+def _decode_bool(buf, pos):
+    value, pos = _decode_u8(buf, pos)
+    return bool(value), pos
+
+
+def _decode_bit_string(buf, pos):
+    bits, pos = read_length(buf, pos)
+    value, pos = _take(buf, pos, (bits + 7) // 8)
+    return (bits, value), pos
+
+
+def _decode_octets(buf, pos):
+    size, pos = read_length(buf, pos)
+    return _take(buf, pos, size)
+
+
+def _decode_visible(buf, pos):
+    value, pos = _decode_octets(buf, pos)
+    return value.decode('latin-1'), pos
+
+
+def _decode_utf8(buf, pos):
+    value, pos = _decode_octets(buf, pos)
+    return value.decode('utf-8', errors='replace'), pos
+
+
+def _decode_sid(buf, pos):
+    ident, pos = _decode_u32(buf, pos)
+    extra, pos = _decode_octets(buf, pos)
+    return (ident, extra), pos
+
+
+def _decode_sid_mac(buf, pos):
+    sid, pos = _decode_sid(buf, pos)
+    mac, pos = _decode_octets(buf, pos)
+    return (sid, mac), pos
+
+
+_decode_u8 = _fixed('>B')
+_decode_u32 = _fixed('>I')
+
+# 定长/变长叶子类型: 类型 -> decode(buf, pos) -> (value, pos)
+LEAF_DECODERS = {
+    NULL: _decode_null,
+    BOOL: _decode_bool,
+    BIT_STRING: _decode_bit_string,
+    DOUBLE_LONG: _fixed('>i'),
+    DOUBLE_LONG_UNSIGNED: _decode_u32,
+    OCTET_STRING: _decode_octets,
+    VISIBLE_STRING: _decode_visible,
+    UTF8_STRING: _decode_utf8,
+    INTEGER: _fixed('>b'),
+    LONG: _fixed('>h'),
+    UNSIGNED: _decode_u8,
+    LONG_UNSIGNED: _fixed('>H'),
+    LONG64: _fixed('>q'),
+    LONG64_UNSIGNED: _fixed('>Q'),
+    ENUM: _decode_u8,
+    FLOAT32: _fixed('>f'),
+    FLOAT64: _fixed('>d'),
+    # 年(2) 月 日 星期 时 分 秒 毫秒(2)
+    DATE_TIME: _fixed_tuple('>HBBBBBBH'),
+    # 年(2) 月 日 星期
+    DATE: _fixed_tuple('>HBBB'),
+    # 时 分 秒
+    TIME: _fixed_tuple('>BBB'),
+    # 年(2) 月 日 时 分 秒
+    DATE_TIME_S: _fixed_tuple('>HBBBBB'),
+    OI: _fixed('>H'),
+    OAD: _decode_u32,
+    OMD: _decode_u32,
+    # 单位(enum) + 间隔(long-unsigned)
+    TI: _fixed_tuple('>BH'),
+    TSA: _decode_octets,
+    MAC: _decode_octets,
+    RN: _decode_octets,
+    # 换算(integer) + 单位(enum)
+    SCALER_UNIT: _fixed_tuple('>bB'),
+    SID: _decode_sid,
+    SID_MAC: _decode_sid_mac,
+    # 波特率 校验位 数据位 停止位 流控
+    COMDCB: _fixed_tuple('>BBBBB'),
+}
+
+# 定长叶子类型在decode()中直接按偏移解包，不经过解码函数
+FIXED_LAYOUTS = {kind: decoder.layout for kind, decoder in LEAF_DECODERS.items() if hasattr(decoder, 'layout')}
+
+
+def _count_composite(buf, pos):
+    count, pos = read_length(buf, pos)
+    return pos, (DATA,), count, None
+
+
+def _road_composite(buf, pos):
+    return pos, (OAD, SEQUENCE_OF + OAD), 2, tuple
+
+
+def _region_composite(buf, pos):
+    return pos, (ENUM, DATA, DATA), 3, tuple
+
+
+def _csd_composite(buf, pos):
+    choice, pos = _decode_u8(buf, pos)
+    if choice == 0:
+        return pos, (OAD,), 1, lambda values: (0, values[0])
+    if choice == 1:
+        return pos, (ROAD,), 1, lambda values: (1, values[0])
+    raise AXDRDecodeError(f'CSD选择{choice}无效')
+
+
+def _rcsd_composite(buf, pos):
+    count, pos = read_length(buf, pos)
+    return pos, (CSD,), count, None
+
+
+# MS选择 -> 后续内容
+_MS_CHOICES = {
+    0: (),                                 # 无电能表
+    1: (),                                 # 全部用户地址
+    2: (SEQUENCE_OF + UNSIGNED,),          # 一组用户类型
+    3: (SEQUENCE_OF + TSA,),               # 一组用户地址
+    4: (SEQUENCE_OF + LONG_UNSIGNED,),     # 一组配置序号
+    5: (SEQUENCE_OF + REGION,),            # 一组用户类型区间
+    6: (SEQUENCE_OF + REGION,),            # 一组用户地址区间
+    7: (SEQUENCE_OF + REGION,),            # 一组配置序号区间
+}
+
+
+def _choice_finish(choice):
+    def finish(values):
+        return (choice, values[0] if values else None)
+    return finish
+
+
+def _ms_composite(buf, pos):
+    choice, pos = _decode_u8(buf, pos)
+    kinds = _MS_CHOICES.get(choice)
+    if kinds is None:
+        raise AXDRDecodeError(f'MS选择{choice}无效')
+    return pos, kinds, len(kinds), _choice_finish(choice)
+
+
+# RSD选择方法 -> 后续内容
+_RSD_SELECTORS = {
+    0: (),                                                 # 不选择
+    1: (OAD, DATA),                                        # 对象属性 + 数值
+    2: (OAD, DATA, DATA, DATA),                            # 对象属性 + 起始值 + 结束值 + 数据间隔
+    3: (SEQUENCE_OF + SELECTOR2,),                         # 若干个方法2
+    4: (DATE_TIME_S, MS),                                  # 采集启动时间 + 电能表集合
+    5: (DATE_TIME_S, MS),                                  # 采集存储时间 + 电能表集合
+    6: (DATE_TIME_S, DATE_TIME_S, TI, MS),                 # 采集启动时间起始/结束 + 间隔 + 电能表集合
+    7: (DATE_TIME_S, DATE_TIME_S, TI, MS),                 # 采集存储时间起始/结束 + 间隔 + 电能表集合
+    8: (DATE_TIME_S, DATE_TIME_S, TI, MS),                 # 采集成功时间起始/结束 + 间隔 + 电能表集合
+    9: (UNSIGNED,),                                        # 上第n次记录
+    10: (UNSIGNED, MS),                                    # 上n条记录 + 电能表集合
+}
+
+
+def _rsd_composite(buf, pos):
+    selector, pos = _decode_u8(buf, pos)
+    kinds = _RSD_SELECTORS.get(selector)
+    if kinds is None:
+        raise AXDRDecodeError(f'RSD选择方法{selector}无效')
+    return pos, kinds, len(kinds), lambda values: (selector, values)
+
+
+def _selector2_composite(buf, pos):
+    return pos, _RSD_SELECTORS[2], 4, tuple
+
+
+def _get_result_composite(buf, pos):
+    choice, pos = _decode_u8(buf, pos)
+    if choice == 0:
+        return pos, (ENUM,), 1, _choice_finish(0)
+    if choice == 1:
+        return pos, (DATA,), 1, _choice_finish(1)
+    raise AXDRDecodeError(f'Get-Result选择{choice}无效')
+
+
+def _optional_composite(buf, pos):
+    present, pos = _decode_u8(buf, pos)
+    return pos, (DATA,), 1 if present else 0, lambda values: values[0] if values else None
+
+
+# 复合类型: 类型 -> expand(buf, pos) -> (pos, 子项种类序列, 子项个数, 结束时的转换函数)
+COMPOSITE_DECODERS = {
+    ARRAY: _count_composite,
+    STRUCTURE: _count_composite,
+    ROAD: _road_composite,
+    REGION: _region_composite,
+    CSD: _csd_composite,
+    RCSD: _rcsd_composite,
+    MS: _ms_composite,
+    RSD: _rsd_composite,
+    SELECTOR2: _selector2_composite,
+    GET_RESULT: _get_result_composite,
+    OPTIONAL_DATA: _optional_composite,
+}
+
+
+def decode(buf, pos=0, kind=DATA):
+    """
+    从缓冲区解码一个值
+
+    Args:
+        buf: bytes/bytearray/memoryview
+        pos: 起始偏移
+        kind: 解码种类，默认DATA（带类型标签）；也可为OAD、RSD、CSD等具体类型
+
+    Returns:
+        tuple: (值, 新偏移)
+
+    Raises:
+        AXDRDecodeError: 数据不完整或类型无效
+    """
+    fixed_layouts = FIXED_LAYOUTS
+    leaf_decoders = LEAF_DECODERS
+    composite_decoders = COMPOSITE_DECODERS
+    new_data = tuple.__new__  # 直接构造Data，省去namedtuple.__new__的一层调用
+    size = len(buf)
+    # 栈帧: [已解码值列表, 子项种类序列, 已处理个数, 子项总数, 结束转换函数, 类型标签(None为不带标签)]
+    root = [[], (kind,), 0, 1, None, None]
+    stack = [root]
+    while True:
+        top = stack[-1]
+        if top[2] >= top[3]:
+            stack.pop()
+            values = top[0]
+            value = top[4](values) if top[4] is not None else values
+            if top[5] is not None:
+                value = new_data(Data, (top[5], value))
+            if not stack:
+                return value[0], pos
+            stack[-1][0].append(value)
+            continue
+
+        kinds = top[1]
+        item = kinds[top[2] % len(kinds)]
+        top[2] += 1
+
+        tag = None
+        if item == DATA:
+            if pos >= size:
+                raise AXDRDecodeError(f'偏移{pos}处缺少数据类型字节')
+            tag = item = buf[pos]
+            pos += 1
+        elif item >= SEQUENCE_OF:
+            count, pos = read_length(buf, pos)
+            stack.append([[], (item - SEQUENCE_OF,), 0, count, None, None])
+            continue
+
+        layout = fixed_layouts.get(item)
+        if layout is not None:
+            unpack_from, width, scalar = layout
+            if pos + width > size:
+                raise AXDRDecodeError(f'偏移{pos}处需要{width}字节，剩余{size - pos}字节')
+            value = unpack_from(buf, pos)
+            if scalar:
+                value = value[0]
+            pos += width
+            top[0].append(value if tag is None else new_data(Data, (tag, value)))
+            continue
+
+        leaf = leaf_decoders.get(item)
+        if leaf is not None:
+            value, pos = leaf(buf, pos)
+            top[0].append(value if tag is None else new_data(Data, (tag, value)))
+            continue
+
+        composite = composite_decoders.get(item)
+        if composite is None:
+            raise AXDRDecodeError(f'偏移{pos - 1}处数据类型{item}无效')
+        pos, sub_kinds, count, finish = composite(buf, pos)
+        if count and not sub_kinds:
+            raise AXDRDecodeError(f'偏移{pos}处类型{item}子项定义无效')
+        stack.append([[], sub_kinds or (DATA,), 0, count, finish, tag])
+
+
+def decode_data(buf, pos=0):
+    """解码一个带类型标签的Data，返回(Data, 新偏移)"""
+    return decode(buf, pos, DATA)
+
+
+def format_value(value):
+    """
+    将解码结果格式化为可读字符串（迭代实现，可用于深层嵌套）
+
+    Args:
+        value: decode的结果
+
+    Returns:
+        str: 可读文本
+    """
+    parts = []
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if item.__class__ is _Text:
+            parts.append(item.text)
+        elif isinstance(item, Data):
+            if item.tag in (ARRAY, STRUCTURE):
+                parts.append(f'{item.type_name}[')
+                _push_children(stack, item.value, _CLOSE_BRACKET)
+            else:
+                parts.append(f'{item.type_name}:{_format_leaf(item.tag, item.value)}')
+        elif isinstance(item, (list, tuple)):
+            parts.append('(')
+            _push_children(stack, item, _CLOSE_PAREN)
+        else:
+            parts.append(_format_leaf(None, item))
+    return ''.join(parts)
+
+
+class _Text:
+    """format_value栈中的分隔符，与字符串类型的值区分"""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+
+_CLOSE_BRACKET = _Text(']')
+_CLOSE_PAREN = _Text(')')
+_SEPARATOR = _Text(', ')
+
+
+def _push_children(stack, children, closing):
+    stack.append(closing)
+    for index in range(len(children) - 1, -1, -1):
+        stack.append(children[index])
+        if index:
+            stack.append(_SEPARATOR)
+
+
+def _format_leaf(tag, value):
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex().upper()
+    if tag in (OAD, OMD):
+        return f'{value:08X}'
+    if tag == OI:
+        return f'{value:04X}'
+    if tag == BIT_STRING:
+        return f'{value[0]}bits:{value[1].hex().upper()}'
+    if tag == DATE_TIME_S:
+        return '{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}'.format(*value)
+    if tag == DATE_TIME:
+        return '{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}.{:03d}'.format(*(value[:3] + value[4:]))
+    if isinstance(value, tuple):
+        return format_value(value)
+    return str(value)
+
+
+# ---- 编码 ----
+
+def write_length(out, length):
+    """向bytearray追加A-XDR可变长度"""
+    if length < 0x80:
+        out.append(length)
+        return
+    size = (length.bit_length() + 7) // 8
+    out.append(0x80 | size)
+    out += length.to_bytes(size, 'big')
+
+
+def _packer(fmt):
+    pack = struct.Struct(fmt).pack
+
+    def encode(out, value):
+        try:
+            out += pack(value)
+        except struct.error as e:
+            raise AXDREncodeError(f'数值{value!r}无法按{fmt}编码: {e}') from None
+    return encode
+
+
+def _tuple_packer(fmt):
+    pack = struct.Struct(fmt).pack
+
+    def encode(out, value):
+        try:
+            out += pack(*value)
+        except struct.error as e:
+            raise AXDREncodeError(f'数值{value!r}无法按{fmt}编码: {e}') from None
+    return encode
+
+
+def _encode_null(out, value):
+    pass
+
+
+def _encode_bool(out, value):
+    out.append(1 if value else 0)
+
+
+def _encode_bit_string(out, value):
+    bits, content = value
+    if len(content) != (bits + 7) // 8:
+        raise AXDREncodeError(f'bit-string长度{bits}位与内容{len(content)}字节不符')
+    write_length(out, bits)
+    out += content
+
+
+def _encode_octets(out, value):
+    write_length(out, len(value))
+    out += value
+
+
+def _encode_visible(out, value):
+    _encode_octets(out, value.encode('latin-1'))
+
+
+def _encode_utf8(out, value):
+    _encode_octets(out, value.encode('utf-8'))
+
+
+_encode_u8 = _packer('>B')
+_encode_u32 = _packer('>I')
+
+
+def _encode_sid(out, value):
+    ident, extra = value
+    _encode_u32(out, ident)
+    _encode_octets(out, extra)
+
+
+def _encode_sid_mac(out, value):
+    sid, mac = value
+    _encode_sid(out, sid)
+    _encode_octets(out, mac)
+
+
+# 叶子类型: 类型 -> encode(out, value)，与LEAF_DECODERS一一对应
+LEAF_ENCODERS = {
+    NULL: _encode_null,
+    BOOL: _encode_bool,
+    BIT_STRING: _encode_bit_string,
+    DOUBLE_LONG: _packer('>i'),
+    DOUBLE_LONG_UNSIGNED: _encode_u32,
+    OCTET_STRING: _encode_octets,
+    VISIBLE_STRING: _encode_visible,
+    UTF8_STRING: _encode_utf8,
+    INTEGER: _packer('>b'),
+    LONG: _packer('>h'),
+    UNSIGNED: _encode_u8,
+    LONG_UNSIGNED: _packer('>H'),
+    LONG64: _packer('>q'),
+    LONG64_UNSIGNED: _packer('>Q'),
+    ENUM: _encode_u8,
+    FLOAT32: _packer('>f'),
+    FLOAT64: _packer('>d'),
+    DATE_TIME: _tuple_packer('>HBBBBBBH'),
+    DATE: _tuple_packer('>HBBB'),
+    TIME: _tuple_packer('>BBB'),
+    DATE_TIME_S: _tuple_packer('>HBBBBB'),
+    OI: _packer('>H'),
+    OAD: _encode_u32,
+    OMD: _encode_u32,
+    TI: _tuple_packer('>BH'),
+    TSA: _encode_octets,
+    MAC: _encode_octets,
+    RN: _encode_octets,
+    SCALER_UNIT: _tuple_packer('>bB'),
+    SID: _encode_sid,
+    SID_MAC: _encode_sid_mac,
+    COMDCB: _tuple_packer('>BBBBB'),
+}
+
+
+def _encode_items(out, kinds, values):
+    if len(kinds) != len(values):
+        raise AXDREncodeError(f'需要{len(kinds)}项，实际{len(values)}项')
+    for kind, value in zip(kinds, values):
+        encode_value(out, kind, value)
+
+
+def _encode_choice(out, choices, name, value):
+    choice, content = value
+    kinds = choices.get(choice)
+    if kinds is None:
+        raise AXDREncodeError(f'{name}选择{choice}无效')
+    out.append(choice)
+    if kinds:
+        encode_value(out, kinds[0], content)
+
+
+def _encode_count(out, values):
+    write_length(out, len(values))
+    for value in values:
+        encode_value(out, DATA, value)
+
+
+def _encode_road(out, value):
+    _encode_items(out, (OAD, SEQUENCE_OF + OAD), value)
+
+
+def _encode_region(out, value):
+    _encode_items(out, (ENUM, DATA, DATA), value)
+
+
+def _encode_csd(out, value):
+    _encode_choice(out, {0: (OAD,), 1: (ROAD,)}, 'CSD', value)
+
+
+def _encode_rcsd(out, value):
+    write_length(out, len(value))
+    for csd in value:
+        _encode_csd(out, csd)
+
+
+def _encode_ms(out, value):
+    _encode_choice(out, _MS_CHOICES, 'MS', value)
+
+
+def _encode_rsd(out, value):
+    selector, values = value
+    kinds = _RSD_SELECTORS.get(selector)
+    if kinds is None:
+        raise AXDREncodeError(f'RSD选择方法{selector}无效')
+    out.append(selector)
+    _encode_items(out, kinds, values)
+
+
+def _encode_selector2(out, value):
+    _encode_items(out, _RSD_SELECTORS[2], value)
+
+
+def _encode_get_result(out, value):
+    _encode_choice(out, {0: (ENUM,), 1: (DATA,)}, 'Get-Result', value)
+
+
+def _encode_optional(out, value):
+    if value is None:
+        out.append(0)
+    else:
+        out.append(1)
+        encode_value(out, DATA, value)
+
+
+# 复合类型: 类型 -> encode(out, value)，与COMPOSITE_DECODERS一一对应
+COMPOSITE_ENCODERS = {
+    ARRAY: _encode_count,
+    STRUCTURE: _encode_count,
+    ROAD: _encode_road,
+    REGION: _encode_region,
+    CSD: _encode_csd,
+    RCSD: _encode_rcsd,
+    MS: _encode_ms,
+    RSD: _encode_rsd,
+    SELECTOR2: _encode_selector2,
+    GET_RESULT: _encode_get_result,
+    OPTIONAL_DATA: _encode_optional,
+}
+
+
+def encode_value(out, kind, value):
+    """
+    按解码种类向bytearray追加一个值
+
+    Args:
+        out: bytearray
+        kind: DATA（value为Data）、具体类型或SEQUENCE_OF + 类型
+        value: 与decode结果相同形式的值
+    """
+    if kind == DATA:
+        tag, value = value
+        out.append(tag)
+        kind = tag
+    elif kind >= SEQUENCE_OF:
+        write_length(out, len(value))
+        kind -= SEQUENCE_OF
+        for item in value:
+            encode_value(out, kind, item)
+        return
+    encoder = LEAF_ENCODERS.get(kind) or COMPOSITE_ENCODERS.get(kind)
+    if encoder is None:
+        raise AXDREncodeError(f'数据类型{kind}无法编码')
+    encoder(out, value)
+
+
+def encode_data(data):
+    """将Data编码为bytes"""
+    out = bytearray()
+    encode_value(out, DATA, data)
+    return bytes(out)
+
+
+@lru_cache(maxsize=256)
+def compile_schema(schema):
+    """
+    将数据结构描述编译为编码函数 encoder(out, value)，输出带类型标签的Data
+
+    schema形式:
+        类型标签                     如 DOUBLE_LONG_UNSIGNED、OAD、RSD，value为该类型的值
+        (ARRAY, 元素schema)          同类元素数组，value为元素值列表
+        (ARRAY, schema1, schema2...) 按位置指定元素类型的数组
+        (STRUCTURE, schema1, ...)    结构体，value为各成员值序列
+
+    Returns:
+        callable: 编码函数
+    """
+    if isinstance(schema, int):
+        encoder = LEAF_ENCODERS.get(schema) or COMPOSITE_ENCODERS.get(schema)
+        if encoder is None or schema > 0xFF:
+            raise AXDREncodeError(f'数据类型{schema}无法编码')
+
+        def encode_leaf(out, value):
+            out.append(schema)
+            encoder(out, value)
+        return encode_leaf
+
+    tag, *members = schema
+    if tag not in (ARRAY, STRUCTURE):
+        raise AXDREncodeError(f'数据结构描述{schema!r}无效')
+    encoders = [compile_schema(member) for member in members]
+
+    if tag == ARRAY and len(encoders) == 1:
+        element = encoders[0]
+
+        def encode_array(out, values):
+            out.append(ARRAY)
+            write_length(out, len(values))
+            for value in values:
+                element(out, value)
+        return encode_array
+
+    def encode_fixed(out, values):
+        if len(values) != len(encoders):
+            raise AXDREncodeError(f'{DATA_TYPE_NAMES[tag]}需要{len(encoders)}项，实际{len(values)}项')
+        out.append(tag)
+        write_length(out, len(encoders))
+        for encoder, value in zip(encoders, values):
+            encoder(out, value)
+    return encode_fixed
+
+
+def encode(schema, value, out=None):
+    """
+    按schema编码一个值
+
+    Args:
+        schema: 数据结构描述，见compile_schema
+        value: 值
+        out: 可选的bytearray，提供时直接追加并返回该对象
+
+    Returns:
+        bytes或bytearray: 编码结果
+    """
+    if out is not None:
+        compile_schema(schema)(out, value)
+        return out
+    buffer = bytearray()
+    compile_schema(schema)(buffer, value)
+    return bytes(buffer)
+
+
+# 解码吞吐量目标（MB/s），python -m protocol.axdr_benchmark 按此检查回归
+THROUGHPUT_TARGET_MBPS = 2.0
+
+
+def benchmark(records=20000, repeat=3):
+    """
+    以GetResponseRecord典型载荷（array of structure，每条记录含时间和若干电能量）测量解码吞吐量
+
+    Returns:
+        float: 最好一次的吞吐量（MB/s）
+    """
+    row = (bytes((STRUCTURE, 4, DATE_TIME_S)) + struct.pack('>HBBBBB', 2024, 7, 3, 0, 15, 0)
+           + bytes((ARRAY, 4))
+           + b''.join(bytes((DOUBLE_LONG_UNSIGNED,)) + struct.pack('>I', i) for i in range(4))
+           + bytes((LONG_UNSIGNED,)) + struct.pack('>H', 2200)
+           + bytes((OCTET_STRING, 6)) + b'\x00\x00\x00\x00\x00\x01')
+    payload = bytes((ARRAY, 0x82)) + struct.pack('>H', records) + row * records
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value, pos = decode_data(payload)
+        elapsed = time.perf_counter() - start
+        assert pos == len(payload) and len(value.value) == records
+        best = max(best, len(payload) / elapsed / 1e6)
+    return best
@@ -0,0 +1,28 @@
+"""
+A-XDR解码吞吐量回归检查
+独立于axdr模块运行（protocol包导入时已加载axdr，直接python -m protocol.axdr会重复执行模块）
+
+用法: python -m protocol.axdr_benchmark [--records N] [--repeat N]
+低于THROUGHPUT_TARGET_MBPS时返回1
+"""
+
+import argparse
+import sys
+
+from .axdr import THROUGHPUT_TARGET_MBPS, benchmark
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='A-XDR解码吞吐量测试')
+    parser.add_argument('--records', type=int, default=20000, help='载荷记录数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最好一次')
+    args = parser.parse_args(argv)
+
+    mbps = benchmark(args.records, args.repeat)
+    passed = mbps >= THROUGHPUT_TARGET_MBPS
+    print(f"A-XDR解码吞吐量: {mbps:.2f} MB/s (目标 {THROUGHPUT_TARGET_MBPS} MB/s，{'达标' if passed else '未达标'})")
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
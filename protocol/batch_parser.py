@@ -0,0 +1,173 @@
+"""
+698.45协议帧批量列式解析
+一次解析大量帧，每帧一行写入NumPy结构化数组，供按表地址、OAD统计成功率等分析使用
+"""
+
+import numpy as np
+
+from .capture_validator import batch_crc_residue
+from .checksum import CRC16_GOOD_RESIDUE
+from .frame_template import LENGTH_MASK, LENGTH_UNIT_KB
+
+FRAME_START = 0x68
+FRAME_END = 0x16
+PREAMBLE = 0xFE
+MIN_FRAME_SIZE = 12  # 68H + 长度域 ... FCS + 16H 的最小字节数
+
+# GET-Response / SET-Response / ACTION-Response
+SERVICE_GET_RESPONSE = 0x85
+SERVICE_SET_RESPONSE = 0x86
+SERVICE_ACTION_RESPONSE = 0x87
+NORMAL_CHOICE = 0x01
+
+FRAME_DTYPE = np.dtype([
+    ('valid', '?'),           # 起始符、长度、结束符结构完整
+    ('control', 'u1'),        # 控制域
+    ('sa_type', 'u1'),        # SA地址类型 D7-D6
+    ('sa_len', 'u1'),         # SA通信地址字节数（不含扩展逻辑地址）
+    ('sa_addr', 'u8'),        # SA通信地址数值（高字节在前，超过8字节时截取低8字节）
+    ('ca', 'u1'),             # 客户机地址
+    ('service', 'u1'),        # APDU服务类型
+    ('choice', 'u1'),         # 服务数据类型（CHOICE）
+    ('piid', 'u1'),           # PIID/PIID-ACD
+    ('oad', 'u4'),            # 第一个OAD/OMD（高字节在前）
+    ('dar', 'i2'),            # Normal响应的DAR，0为成功，-1表示不适用
+    ('hcs_ok', '?'),
+    ('fcs_ok', '?'),
+    ('payload_offset', 'i4'),  # APDU在原始缓冲区中的偏移，-1表示无APDU
+])
+
+
+def _gather(buf, index, limit):
+    """按下标取字节，越界位置返回0"""
+    inside = index < limit
+    return np.where(inside, buf[np.minimum(index, len(buf) - 1)], 0).astype(np.int64), inside
+
+
+def parse_frames_batch(buffers):
+    """
+    批量解析帧
+
+    Args:
+        buffers: 帧数据序列，每项为一帧（bytes/bytearray，可带FE前导符）
+
+    Returns:
+        np.ndarray: FRAME_DTYPE结构化数组，每帧一行
+    """
+    buffers = [bytes(b) for b in buffers]
+    count = len(buffers)
+    table = np.zeros(count, dtype=FRAME_DTYPE)
+    if not count:
+        return table
+    sizes = np.fromiter((len(b) for b in buffers), dtype=np.int64, count=count)
+    buf = np.frombuffer(b''.join(buffers) + b'\x00', dtype=np.uint8)
+    bases = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    limits = bases + sizes
+
+    # 跳过FE前导符
+    starts = bases.copy()
+    while True:
+        preamble = (starts < limits) & (buf[np.minimum(starts, len(buf) - 1)] == PREAMBLE)
+        if not preamble.any():
+            break
+        starts[preamble] += 1
+
+    first, _ = _gather(buf, starts, limits)
+    valid = (first == FRAME_START) & (limits - starts >= MIN_FRAME_SIZE)
+
+    low, _ = _gather(buf, starts + 1, limits)
+    high, _ = _gather(buf, starts + 2, limits)
+    length_field = low | (high << 8)
+    lengths = np.where(length_field & LENGTH_UNIT_KB, (length_field & LENGTH_MASK) << 10, length_field & LENGTH_MASK)
+    ends = np.minimum(starts + lengths + 2, limits)
+    last, _ = _gather(buf, ends - 1, limits)
+    valid &= last == FRAME_END
+
+    control, _ = _gather(buf, starts + 3, limits)
+    sa_flag, _ = _gather(buf, starts + 4, limits)
+    ext = (sa_flag >> 5) & 0x01
+    addr_len = (sa_flag & 0x0F) + 1
+    sa_len = addr_len - ext
+    addr_offset = starts + 5 + ext
+
+    sa_addr = np.zeros(count, dtype=np.uint64)
+    for j in range(8):
+        byte, _ = _gather(buf, addr_offset + j, np.minimum(addr_offset + sa_len, limits))
+        sa_addr |= byte.astype(np.uint64) << np.uint64(8 * j)
+
+    ca_offset = addr_offset + sa_len
+    ca, _ = _gather(buf, ca_offset, limits)
+    apdu_offset = ca_offset + 3
+    apdu_end = ends - 4  # 去掉时间标签、FCS、结束符
+    valid &= apdu_offset <= apdu_end
+
+    service, has_apdu = _gather(buf, apdu_offset, apdu_end)
+    choice, _ = _gather(buf, apdu_offset + 1, apdu_end)
+    piid, _ = _gather(buf, apdu_offset + 2, apdu_end)
+    oad = np.zeros(count, dtype=np.int64)
+    for j in range(4):
+        byte, _ = _gather(buf, apdu_offset + 3 + j, apdu_end)
+        oad = (oad << 8) | byte
+
+    # DAR: GET-Response-Normal为 OAD + CHOICE(0 DAR / 1 Data)，SET/ACTION-Response-Normal为 OAD/OMD + DAR
+    byte7, has7 = _gather(buf, apdu_offset + 7, apdu_end)
+    byte8, has8 = _gather(buf, apdu_offset + 8, apdu_end)
+    dar = np.full(count, -1, dtype=np.int64)
+    normal = valid & (choice == NORMAL_CHOICE)
+    get_normal = normal & (service == SERVICE_GET_RESPONSE) & has7
+    dar = np.where(get_normal & (byte7 == 1), 0, dar)
+    dar = np.where(get_normal & (byte7 == 0) & has8, byte8, dar)
+    set_normal = normal & ((service == SERVICE_SET_RESPONSE) | (service == SERVICE_ACTION_RESPONSE)) & has7
+    dar = np.where(set_normal, byte7, dar)
+
+    # 校验：HCS段为长度域~HCS，FCS段为长度域~FCS
+    hcs_ok = np.zeros(count, dtype=bool)
+    fcs_ok = np.zeros(count, dtype=bool)
+    checkable = valid & (starts + lengths + 2 <= limits)
+    rows = np.flatnonzero(checkable)
+    if len(rows):
+        hcs_ok[rows] = batch_crc_residue(buf, starts[rows] + 1, addr_len[rows] + 7) == CRC16_GOOD_RESIDUE
+        fcs_ok[rows] = batch_crc_residue(buf, starts[rows] + 1, lengths[rows]) == CRC16_GOOD_RESIDUE
+
+    table['valid'] = valid
+    table['control'] = np.where(valid, control, 0)
+    table['sa_type'] = np.where(valid, sa_flag >> 6, 0)
+    table['sa_len'] = np.where(valid, sa_len, 0)
+    table['sa_addr'] = np.where(valid, sa_addr, 0)
+    table['ca'] = np.where(valid, ca, 0)
+    table['service'] = np.where(valid, service, 0)
+    table['choice'] = np.where(valid, choice, 0)
+    table['piid'] = np.where(valid, piid, 0)
+    table['oad'] = np.where(valid, oad, 0)
+    table['dar'] = np.where(valid, dar, -1)
+    table['hcs_ok'] = hcs_ok
+    table['fcs_ok'] = fcs_ok
+    table['payload_offset'] = np.where(valid & has_apdu, apdu_offset - bases, -1)
+    return table
+
+
+def success_rates(table):
+    """
+    按(表地址, OAD)统计Normal响应的成功率
+
+    Args:
+        table: parse_frames_batch的结果
+
+    Returns:
+        np.ndarray: 字段为sa_addr, oad, total, success, rate的结构化数组
+    """
+    rows = table[(table['dar'] >= 0) & table['fcs_ok']]
+    keys = np.empty(len(rows), dtype=[('sa_addr', 'u8'), ('oad', 'u4')])
+    keys['sa_addr'] = rows['sa_addr']
+    keys['oad'] = rows['oad']
+    unique, inverse = np.unique(keys, return_inverse=True)
+    total = np.bincount(inverse, minlength=len(unique))
+    success = np.bincount(inverse, weights=(rows['dar'] == 0), minlength=len(unique))
+    result = np.empty(len(unique), dtype=[('sa_addr', 'u8'), ('oad', 'u4'), ('total', 'i8'),
+                                          ('success', 'i8'), ('rate', 'f8')])
+    result['sa_addr'] = unique['sa_addr']
+    result['oad'] = unique['oad']
+    result['total'] = total
+    result['success'] = success.astype(np.int64)
+    result['rate'] = np.divide(success, total, out=np.zeros(len(unique)), where=total > 0)
+    return result
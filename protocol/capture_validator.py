@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+698.45报文批量校验工具
+以内存映射方式打开原始抓包文件（或帧库CSV），按68H起始符和长度域定位帧边界，
+用NumPy按列批量计算长度、HCS、FCS，输出校验失败的偏移量报告
+
+用法:
+    python -m protocol.capture_validator capture.bin
+    python -m protocol.capture_validator 列表.csv --library --report bad.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+from .checksum import CRC16_TABLE, CRC16_INIT, CRC16_GOOD_RESIDUE
+from .frame_template import LENGTH_MASK, LENGTH_UNIT_KB
+
+FRAME_START = 0x68
+FRAME_END = 0x16
+PREAMBLE = 0xFE
+# 长度域(2) + 控制域(1) + SA标志(1) + 地址(>=1) + CA(1) + HCS(2) + FCS(2)
+MIN_FRAME_LENGTH = 10
+
+_TABLE = np.array(CRC16_TABLE, dtype=np.uint16)
+
+
+def batch_crc_residue(buf, starts, spans, chunk_size=1 << 20):
+    """
+    按列批量计算多段数据的CRC寄存器值
+
+    每一段从starts[i]开始、长度spans[i]，段内包含末尾2字节校验码时，
+    校验正确的段结果为CRC16_GOOD_RESIDUE
+
+    Args:
+        buf: uint8数组（可为np.memmap）
+        starts: 各段起始偏移
+        spans: 各段长度
+        chunk_size: 每批处理的段数，限制内存占用
+
+    Returns:
+        np.ndarray: 与starts对应的uint16寄存器值
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    spans = np.asarray(spans, dtype=np.int64)
+    result = np.empty(len(starts), dtype=np.uint16)
+    for base in range(0, len(starts), chunk_size):
+        part_starts = starts[base:base + chunk_size]
+        part_spans = spans[base:base + chunk_size]
+        # 按长度降序排列，第k列参与计算的段总是前缀
+        order = np.argsort(-part_spans, kind='stable')
+        sorted_starts = part_starts[order]
+        sorted_spans = part_spans[order]
+        registers = np.full(len(order), CRC16_INIT, dtype=np.uint16)
+        max_span = int(sorted_spans[0]) if len(order) else 0
+        # active_counts[k] = 长度大于k的段数
+        active_counts = np.searchsorted(-sorted_spans, -np.arange(max_span), side='left').tolist()
+        for k in range(max_span):
+            active = active_counts[k]
+            regs = registers[:active]
+            data = buf[sorted_starts[:active] + k]
+            registers[:active] = (regs >> 8) ^ _TABLE[(regs ^ data) & 0xFF]
+        result[base + order] = registers
+    return result
+
+
+def locate_frames(buf):
+    """
+    定位缓冲区中的全部帧
+
+    以68H为候选起始符，读取长度域得到帧尾位置，帧尾为16H的候选即为结构完整的帧；
+    候选之间互相重叠时（数据域中出现68H），沿帧链从前往后依次选取不重叠的帧
+
+    Args:
+        buf: uint8数组
+
+    Returns:
+        tuple: (starts, lengths) 帧起始偏移和整帧字节数（含68H和16H）
+    """
+    size = len(buf)
+    candidates = np.flatnonzero(buf[:max(size - 2, 0)] == FRAME_START)
+    if not len(candidates):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    length_field = buf[candidates + 1].astype(np.int64) | (buf[candidates + 2].astype(np.int64) << 8)
+    lengths = np.where(length_field & LENGTH_UNIT_KB, (length_field & LENGTH_MASK) << 10, length_field & LENGTH_MASK)
+    ends = candidates + lengths + 1
+    valid = (lengths >= MIN_FRAME_LENGTH) & (ends < size)
+    candidates, lengths, ends = candidates[valid], lengths[valid], ends[valid]
+    valid = buf[ends] == FRAME_END
+    candidates, lengths, ends = candidates[valid], lengths[valid], ends[valid]
+    if not len(candidates):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # 每个候选帧之后的第一个不重叠候选
+    next_index = np.searchsorted(candidates, ends + 1).tolist()
+    chosen = []
+    index = 0
+    count = len(candidates)
+    while index < count:
+        chosen.append(index)
+        index = next_index[index]
+    chosen = np.array(chosen, dtype=np.int64)
+    return candidates[chosen], lengths[chosen] + 2
+
+
+class CaptureReport:
+    """批量校验结果"""
+
+    def __init__(self, starts, lengths, hcs_ok, fcs_ok, gaps, total_bytes, row_offsets=None):
+        self.starts = starts
+        self.lengths = lengths
+        self.hcs_ok = hcs_ok
+        self.fcs_ok = fcs_ok
+        self.gaps = gaps              # [(偏移, 字节数)] 不属于任何帧且非FE前导的区段
+        self.total_bytes = total_bytes
+        self.row_offsets = row_offsets  # 帧库模式下每行在缓冲区中的起始偏移
+
+    @property
+    def frame_count(self):
+        return len(self.starts)
+
+    def bad_mask(self):
+        return ~(self.hcs_ok & self.fcs_ok)
+
+    def bad_offsets(self):
+        """校验失败帧的起始偏移"""
+        return self.starts[self.bad_mask()]
+
+    def row_of(self, offset):
+        """帧库模式下将偏移换算为CSV数据行号（从1开始）"""
+        if self.row_offsets is None:
+            return None
+        return int(np.searchsorted(self.row_offsets, offset, side='right'))
+
+    def summary(self):
+        bad = int(np.count_nonzero(self.bad_mask()))
+        return (f"共{self.total_bytes}字节, 帧{self.frame_count}个, "
+                f"HCS失败{int(np.count_nonzero(~self.hcs_ok))}个, "
+                f"FCS失败{int(np.count_nonzero(~self.fcs_ok))}个, "
+                f"校验失败合计{bad}个, 无法识别区段{len(self.gaps)}处")
+
+    def write(self, path):
+        """
+        写出紧凑报告: 每个异常一行 (类型, 偏移, 长度, HCS, FCS, 行号)
+        """
+        mask = self.bad_mask()
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['type', 'offset', 'length', 'hcs_ok', 'fcs_ok', 'row'])
+            for start, length, hcs, fcs in zip(self.starts[mask].tolist(), self.lengths[mask].tolist(),
+                                               self.hcs_ok[mask].tolist(), self.fcs_ok[mask].tolist()):
+                writer.writerow(['frame', start, length, int(hcs), int(fcs), self.row_of(start) or ''])
+            for start, length in self.gaps:
+                writer.writerow(['gap', start, length, '', '', self.row_of(start) or ''])
+
+
+def _find_gaps(buf, starts, lengths):
+    """找出帧之间除FE前导符外的残余字节区段"""
+    bounds_start = np.concatenate(([0], starts + lengths))
+    bounds_end = np.concatenate((starts, [len(buf)]))
+    gaps = []
+    for start, end in zip(bounds_start.tolist(), bounds_end.tolist()):
+        if end <= start:
+            continue
+        segment = buf[start:end]
+        junk = np.flatnonzero(segment != PREAMBLE)
+        if len(junk):
+            gaps.append((start + int(junk[0]), int(junk[-1] - junk[0]) + 1))
+    return gaps
+
+
+def validate_buffer(buf, row_offsets=None):
+    """
+    批量校验缓冲区中的全部帧
+
+    Args:
+        buf: uint8数组
+        row_offsets: 帧库模式下每行的起始偏移
+
+    Returns:
+        CaptureReport: 校验结果
+    """
+    starts, lengths = locate_frames(buf)
+    # 地址长度 = SA标志D3-D0 + 1；HCS段 = 长度域到HCS(含)
+    addr_lens = (buf[starts + 4].astype(np.int64) & 0x0F) + 1
+    hcs_spans = addr_lens + 7
+    # FCS段 = 长度域到FCS(含)，即整帧去掉起始符和结束符
+    fcs_spans = lengths - 2
+    header_fits = hcs_spans <= fcs_spans - 2
+    hcs_ok = np.zeros(len(starts), dtype=bool)
+    hcs_ok[header_fits] = batch_crc_residue(buf, starts[header_fits] + 1, hcs_spans[header_fits]) == CRC16_GOOD_RESIDUE
+    fcs_ok = batch_crc_residue(buf, starts + 1, fcs_spans) == CRC16_GOOD_RESIDUE
+    gaps = _find_gaps(buf, starts, lengths)
+    return CaptureReport(starts, lengths, hcs_ok, fcs_ok, gaps, len(buf), row_offsets)
+
+
+def validate_capture(path):
+    """
+    内存映射打开原始抓包文件并批量校验
+
+    Args:
+        path: 二进制抓包文件路径
+
+    Returns:
+        CaptureReport: 校验结果
+    """
+    if os.path.getsize(path) == 0:
+        # 空文件无法内存映射
+        return validate_buffer(np.zeros(0, dtype=np.uint8))
+    buf = np.memmap(path, dtype=np.uint8, mode='r')
+    return validate_buffer(buf)
+
+
+def validate_library(path):
+    """
+    批量校验帧库CSV（第2列为帧内容十六进制串）
+
+    Args:
+        path: CSV文件路径
+
+    Returns:
+        CaptureReport: 校验结果，偏移可通过row_of()换算为行号
+    """
+    chunks = []
+    row_offsets = []
+    offset = 0
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # 跳过表头
+        for row in reader:
+            if len(row) < 2:
+                continue
+            try:
+                data = bytes.fromhex(row[1].replace(' ', ''))
+            except ValueError:
+                data = b''
+            row_offsets.append(offset)
+            chunks.append(data)
+            offset += len(data)
+    buf = np.frombuffer(b''.join(chunks), dtype=np.uint8)
+    return validate_buffer(buf, np.array(row_offsets, dtype=np.int64))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='698.45报文批量校验')
+    parser.add_argument('path', help='原始抓包文件或帧库CSV')
+    parser.add_argument('--library', action='store_true', help='按帧库CSV格式读取')
+    parser.add_argument('--report', help='异常报告输出路径(CSV)')
+    args = parser.parse_args(argv)
+
+    report = validate_library(args.path) if args.library else validate_capture(args.path)
+    print(report.summary())
+    if args.report:
+        report.write(args.report)
+        print(f"报告已写入: {args.report}")
+    return 0 if not len(report.bad_offsets()) and not report.gaps else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+698.45协议校验模块
+HCS/FCS统一使用CRC-16/X-25（多项式0x1021反射为0x8408，初值FFFFH，结果取反），
+所有帧头校验、帧校验都通过本模块计算
+"""
+
+# 反射多项式
+CRC16_POLY = 0x8408
+# X-25初值与结果异或值
+CRC16_INIT = 0xFFFF
+CRC16_XOROUT = 0xFFFF
+# 数据连同其自身校验码(低字节在前)一起计算后，寄存器的固定余式
+CRC16_GOOD_RESIDUE = 0xF0B8
+
+
+def _make_table():
+    """生成256项查表"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ CRC16_POLY
+            else:
+                crc >>= 1
+        table.append(crc)
+    return tuple(table)
+
+
+CRC16_TABLE = _make_table()
+
+
+def crc16_update(register, data):
+    """
+    以未取反的寄存器值继续计算CRC（供流式计算使用）
+
+    Args:
+        register: 当前寄存器值，首次计算传入CRC16_INIT
+        data: 要计算的数据字节
+
+    Returns:
+        int: 更新后的寄存器值（未取反）
+    """
+    table = CRC16_TABLE
+    for byte in data:
+        register = (register >> 8) ^ table[(register ^ byte) & 0xFF]
+    return register
+
+
+def crc16(data, value=0):
+    """
+    计算CRC-16/X-25校验值
+
+    value为上一段数据的校验结果，用于分段续算:
+    crc16(b, crc16(a)) == crc16(a + b)，首段使用默认值0
+
+    Args:
+        data: 要计算的数据字节
+        value: 续算起始值（上一段的校验结果）
+
+    Returns:
+        int: CRC16校验值
+    """
+    return crc16_update(value ^ CRC16_XOROUT, data) ^ CRC16_XOROUT
+
+
+def crc16_many(buffers, value=0):
+    """
+    批量计算多段数据各自的校验值
+
+    Args:
+        buffers: 数据字节序列的可迭代对象
+        value: 每段数据的续算起始值
+
+    Returns:
+        list: 与buffers一一对应的校验值列表
+    """
+    table = CRC16_TABLE
+    start = value ^ CRC16_XOROUT
+    results = []
+    for data in buffers:
+        register = start
+        for byte in data:
+            register = (register >> 8) ^ table[(register ^ byte) & 0xFF]
+        results.append(register ^ CRC16_XOROUT)
+    return results
+
+
+def check_residue(data):
+    """
+    校验“数据+校验码(低字节在前)”整体是否正确
+
+    Args:
+        data: 包含末尾2字节校验码的数据
+
+    Returns:
+        bool: 校验是否通过
+    """
+    return crc16_update(CRC16_INIT, data) == CRC16_GOOD_RESIDUE
+
+
+class FrameCrcAccumulator:
+    """
+    接收过程中的HCS/FCS流式累计器
+
+    每收到一段数据调用一次feed()，寄存器随数据推进；帧头(长度域~HCS)
+    结束时即得出HCS结果，收到结束符16H时即得出FCS结果，无需对完整帧
+    重新计算。利用X-25余式特性：数据连同校验码一起计算后寄存器为F0B8H。
+    """
+
+    START_MARK = 0x68
+    END_MARK = 0x16
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """开始累计新的一帧"""
+        self.started = False      # 是否已收到起始符68H
+        self.position = 0         # 起始符之后已累计的字节数
+        self.header_len = None    # 长度域到HCS(含)的字节数
+        self.register = CRC16_INIT
+        self.prev_register = CRC16_INIT  # 最后一个字节之前的寄存器值
+        self.last_byte = None
+        self.hcs_ok = None
+
+    def _update(self, chunk):
+        if not chunk:
+            return
+        self.prev_register = crc16_update(self.register, chunk[:-1])
+        self.last_byte = chunk[-1]
+        self.register = (self.prev_register >> 8) ^ CRC16_TABLE[(self.prev_register ^ self.last_byte) & 0xFF]
+        self.position += len(chunk)
+
+    def feed(self, data):
+        """
+        累计一段接收数据
+
+        Args:
+            data: 新收到的数据片段
+        """
+        chunk = memoryview(data)
+        if not self.started:
+            # 跳过FE唤醒前导符等起始符之前的字节
+            start = bytes(chunk).find(self.START_MARK)
+            if start < 0:
+                return
+            self.started = True
+            chunk = chunk[start + 1:]
+
+        if self.hcs_ok is None:
+            if self.header_len is None and self.position + len(chunk) > 3:
+                # 偏移3为SA标志，D3-D0为地址长度编码
+                sa_flag = chunk[3 - self.position]
+                # 长度域(2) + 控制域(1) + SA标志(1) + 地址 + CA(1) + HCS(2)
+                self.header_len = 7 + (sa_flag & 0x0F) + 1
+            if self.header_len is not None and self.position + len(chunk) >= self.header_len:
+                cut = self.header_len - self.position
+                self._update(chunk[:cut])
+                self.hcs_ok = self.register == CRC16_GOOD_RESIDUE
+                chunk = chunk[cut:]
+
+        self._update(chunk)
+
+    @property
+    def fcs_ok(self):
+        """已收到结束符时FCS是否通过，尚未结束返回None"""
+        if self.header_len is None or self.position < self.header_len + 3:
+            return None
+        if self.last_byte != self.END_MARK:
+            return None
+        return self.prev_register == CRC16_GOOD_RESIDUE
+
+    def verdict(self):
+        """
+        返回当前帧的校验结论
+
+        Returns:
+            tuple: (hcs_ok, fcs_ok)，尚不能判定的项为None
+        """
+        return self.hcs_ok, self.fcs_ok
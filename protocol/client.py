@@ -0,0 +1,197 @@
+"""
+698.45客户机读取接口
+按表地址生成请求帧，经传输对象发送并解码响应；
+iter_get在服务器以分帧响应(GetResponseNext)返回时自动发送GetRequestNext续读，
+逐块产出结果，内存中只保留当前一块
+"""
+
+from . import axdr
+from .apdu import GET_RESPONSE_NEXT, GetResponse
+from .compact import (COMPACT_GET_RESPONSE, COMPACT_SET_RESPONSE, decode_get_response, decode_set_response,
+                      encode_get_request, encode_set_request)
+from .frame_spec import FrameSpec
+from .split_frame import fragment_link_data
+
+GET_REQUEST = 0x05
+GET_REQUEST_NORMAL = 0x01
+GET_REQUEST_NORMAL_LIST = 0x02
+GET_REQUEST_RECORD = 0x03
+GET_REQUEST_NEXT = 0x05
+SET_REQUEST = 0x06
+SET_REQUEST_NORMAL_LIST = 0x02
+SET_RESPONSE = 0x86
+
+TIME_TAG_NONE = b'\x00'
+
+# 单次iter_get最多跟读的块数，防止服务器不置末帧标志时无限续读
+MAX_BLOCKS = 4096
+
+
+class Client698:
+    """
+    698.45客户机
+
+    Args:
+        transport: 传输对象，须提供request(frames, timeout)，返回响应的完整APDU或None（如SerialHandler）
+        address: 服务器通信地址（高字节在前的十六进制字符串）
+        ca: 客户机地址
+        logic_addr: 服务器逻辑地址
+        timeout: 每次请求的超时(ms)
+        max_frame_size: 最大帧长，请求超过时拆成分帧发送；None表示不限制
+        security: 安全传输通道（security.SecureChannel），给出时每个请求以SECURITY-Request发送
+        compact: 表是否支持简化读取/设置服务（私有扩展，见compact模块），按表显式配置，默认不使用
+    """
+
+    def __init__(self, transport, address, ca=0x10, logic_addr=0, timeout=2000, max_frame_size=None,
+                 security=None, compact=False):
+        self.transport = transport
+        self.compact = compact
+        self.timeout = timeout
+        self.max_frame_size = max_frame_size
+        self.security = security
+        # 请求均带APDU，控制域与create_frame一致（客户机发出、启动站、有数据域、用户数据: 53H）
+        spec = FrameSpec(address, service=GET_REQUEST, ca=ca, logic_addr=logic_addr)
+        self.address = spec.address
+        self.template = spec.template()
+        self.piid = 0
+
+    def next_piid(self):
+        """下一个PIID（优先级0，序号0~63循环）"""
+        self.piid = (self.piid + 1) & 0x3F
+        return self.piid
+
+    def request(self, apdu):
+        """
+        发送一个APDU并返回响应APDU，启用安全传输时收发的是SECURITY-Request/Response，返回解开后的APDU
+
+        Raises:
+            TimeoutError: 未收到响应
+            SecurityError: 安全响应校验失败
+        """
+        context = None
+        if self.security is not None:
+            apdu, context = self.security.wrap(self.address, apdu)
+        user_data = apdu + TIME_TAG_NONE
+        if self.max_frame_size:
+            frames = fragment_link_data(self.template, user_data, self.max_frame_size)
+        else:
+            frames = [self.template.render_user_data(user_data)]
+        response = self.transport.request(frames, self.timeout)
+        if response is None:
+            raise TimeoutError(f'请求{apdu[:8].hex()}未收到响应')
+        if context is not None:
+            response = self.security.unwrap(context, response)
+        return response
+
+    def iter_get(self, oad, rsd=None, rcsd=()):
+        """
+        读取一个对象属性（给出rsd时为记录型读取），服务器分帧响应时逐块发送GetRequestNext
+
+        Args:
+            oad: OAD（整数或8位十六进制字符串）
+            rsd: 记录选择描述(选择方法, 参数列表)，见axdr；None表示普通读取
+            rcsd: 记录列选择（CSD列表），空表示全部列
+
+        Yields:
+            GetResult: 每块响应中的结果，按到达顺序
+        """
+        if isinstance(oad, str):
+            oad = int(oad, 16)
+        apdu = bytearray((GET_REQUEST, GET_REQUEST_NORMAL if rsd is None else GET_REQUEST_RECORD,
+                          self.next_piid()))
+        axdr.encode_value(apdu, axdr.OAD, oad)
+        if rsd is not None:
+            axdr.encode_value(apdu, axdr.RSD, rsd)
+            axdr.encode_value(apdu, axdr.RCSD, list(rcsd))
+        return self._iter_blocks(bytes(apdu))
+
+    def _iter_blocks(self, apdu):
+        """发送GET请求，逐块产出结果，分帧响应时续读"""
+        response = GetResponse(self.request(apdu))
+        blocks = 1
+        while True:
+            yield from response.results()
+            if response.choice != GET_RESPONSE_NEXT or response.last_frame or response.dar is not None:
+                return
+            if blocks >= MAX_BLOCKS:
+                raise axdr.AXDRDecodeError(f'分帧响应超过{MAX_BLOCKS}块仍未结束')
+            sequence = response.sequence
+            apdu = bytearray((GET_REQUEST, GET_REQUEST_NEXT, self.next_piid()))
+            axdr.encode_value(apdu, axdr.LONG_UNSIGNED, sequence)
+            response = GetResponse(self.request(bytes(apdu)))
+            blocks += 1
+            if response.choice == GET_RESPONSE_NEXT and response.sequence == sequence:
+                raise axdr.AXDRDecodeError(f'分帧响应序号{sequence}未递增')
+
+    def _compact_request(self, apdu, response_code):
+        """发送简化请求，返回简化响应APDU"""
+        response = self.request(apdu)
+        if response[0] != response_code:
+            raise axdr.AXDRDecodeError(f'简化请求的响应服务类型{response[0]:02X}H无效')
+        return response
+
+    def get_many(self, oads):
+        """
+        批量读取若干个对象属性，启用compact时使用简化读取服务，否则使用GetRequestNormalList
+
+        Args:
+            oads: OAD列表（整数或8位十六进制字符串）
+
+        Returns:
+            list: 与oads顺序对应的GetResult
+        """
+        oads = [int(oad, 16) if isinstance(oad, str) else oad for oad in oads]
+        if self.compact:
+            response = self._compact_request(encode_get_request(self.next_piid(), oads), COMPACT_GET_RESPONSE)
+            return decode_get_response(response, oads)[0]
+
+        apdu = bytearray((GET_REQUEST, GET_REQUEST_NORMAL_LIST, self.next_piid()))
+        axdr.encode_value(apdu, axdr.SEQUENCE_OF + axdr.OAD, oads)
+        results = {result.oad: result for result in self._iter_blocks(bytes(apdu))}
+        return [results.get(oad) for oad in oads]
+
+    def set_many(self, items):
+        """
+        批量设置若干个对象属性，启用compact时使用简化设置服务，否则使用SetRequestNormalList
+
+        Args:
+            items: (OAD, Data)列表
+
+        Returns:
+            list: 与items顺序对应的DAR，0为成功
+        """
+        items = [(int(oad, 16) if isinstance(oad, str) else oad, data) for oad, data in items]
+        if self.compact:
+            response = self._compact_request(encode_set_request(self.next_piid(), items), COMPACT_SET_RESPONSE)
+            dars = decode_set_response(response)[0]
+            if len(dars) != len(items):
+                raise axdr.AXDRDecodeError(f'简化设置响应结果数{len(dars)}与请求项数{len(items)}不符')
+            return dars
+
+        apdu = bytearray((SET_REQUEST, SET_REQUEST_NORMAL_LIST, self.next_piid()))
+        axdr.write_length(apdu, len(items))
+        for oad, data in items:
+            axdr.encode_value(apdu, axdr.OAD, oad)
+            axdr.encode_value(apdu, axdr.DATA, data)
+        response = self.request(bytes(apdu))
+        if response[0] != SET_RESPONSE or response[1] != SET_REQUEST_NORMAL_LIST:
+            raise axdr.AXDRDecodeError(f'设置请求的响应{bytes(response[:2]).hex()}无效')
+        count, pos = axdr.read_length(response, 3)
+        dars = {}
+        for _ in range(count):
+            oad, pos = axdr.decode(response, pos, axdr.OAD)
+            dars[oad], pos = axdr.decode(response, pos, axdr.ENUM)
+        return [dars.get(oad) for oad, _ in items]
+
+    def iter_records(self, oad, rsd, rcsd=()):
+        """
+        记录型读取，逐行产出记录
+
+        Yields:
+            tuple: (列选择CSD列表, 记录行)；失败时抛出ValueError并带DAR
+        """
+        for result in self.iter_get(oad, rsd, rcsd):
+            if not result.ok:
+                raise ValueError(f'读取{result.oad:08X}失败 DAR={result.dar}')
+            for row in result.data:
+                yield result.rcsd, row
@@ -0,0 +1,175 @@
+"""
+698.45简化读取/设置服务（COMPACT-GET / COMPACT-SET）
+面向小数据量的批量读写，省去响应中逐个回送的OAD和跟随上报信息域。
+这是本工具与配套表计之间的私有扩展，标准未定义，普通表计不会应答；
+只在按表显式启用时使用（Client698(compact=True)），帧结构与普通请求相同（带时间标签）：
+
+COMPACT-GET-Request(85H, 客户机发出)
+    CompactGetRequestNormal [1]      PIID, OAD
+    CompactGetRequestNormalList [2]  PIID, SEQUENCE OF OAD
+COMPACT-GET-Response(C5H)
+    [1] PIID-ACD, Get-Result          [2] PIID-ACD, SEQUENCE OF Get-Result（与请求的OAD顺序一一对应）
+COMPACT-SET-Request(86H, 客户机发出)
+    CompactSetRequestNormal [1]      PIID, OAD, Data
+    CompactSetRequestNormalList [2]  PIID, SEQUENCE OF (OAD, Data)
+COMPACT-SET-Response(C6H)
+    [1] PIID-ACD, DAR                 [2] PIID-ACD, SEQUENCE OF DAR
+
+请求服务码85H/86H与服务器发出的GET-Response/SET-Response相同，按传输方向区分；
+响应无法按方向区分，因此使用C5H/C6H
+"""
+
+from . import axdr
+from .apdu import GetResult
+
+COMPACT_GET_REQUEST = 0x85
+COMPACT_SET_REQUEST = 0x86
+COMPACT_GET_RESPONSE = 0xC5
+COMPACT_SET_RESPONSE = 0xC6
+
+COMPACT_REQUESTS = (COMPACT_GET_REQUEST, COMPACT_SET_REQUEST)
+
+COMPACT_NORMAL = 1
+COMPACT_NORMAL_LIST = 2
+
+COMPACT_REQUEST_NAMES = {
+    COMPACT_GET_REQUEST: 'COMPACT-GET-Request',
+    COMPACT_SET_REQUEST: 'COMPACT-SET-Request',
+}
+
+
+def is_compact_request(control, service_code):
+    """客户机发出（传输方向位为0）的85H/86H为简化请求"""
+    return not control & 0x80 and service_code in COMPACT_REQUESTS
+
+
+def encode_get_request(piid, oads):
+    """生成COMPACT-GET-Request，单个OAD时为Normal形式"""
+    if len(oads) == 1:
+        out = bytearray((COMPACT_GET_REQUEST, COMPACT_NORMAL, piid))
+        axdr.encode_value(out, axdr.OAD, oads[0])
+    else:
+        out = bytearray((COMPACT_GET_REQUEST, COMPACT_NORMAL_LIST, piid))
+        axdr.encode_value(out, axdr.SEQUENCE_OF + axdr.OAD, oads)
+    return bytes(out)
+
+
+def encode_set_request(piid, items):
+    """
+    生成COMPACT-SET-Request，单项时为Normal形式
+
+    Args:
+        items: (OAD, Data)列表
+    """
+    if len(items) == 1:
+        out = bytearray((COMPACT_SET_REQUEST, COMPACT_NORMAL, piid))
+    else:
+        out = bytearray((COMPACT_SET_REQUEST, COMPACT_NORMAL_LIST, piid))
+        axdr.write_length(out, len(items))
+    for oad, data in items:
+        axdr.encode_value(out, axdr.OAD, oad)
+        axdr.encode_value(out, axdr.DATA, data)
+    return bytes(out)
+
+
+def _check(apdu, service_code):
+    if len(apdu) < 3:
+        raise axdr.AXDRDecodeError('简化服务APDU长度不足')
+    if apdu[0] != service_code:
+        raise axdr.AXDRDecodeError(f'服务类型{apdu[0]:02X}H不是{service_code:02X}H')
+    if apdu[1] not in (COMPACT_NORMAL, COMPACT_NORMAL_LIST):
+        raise axdr.AXDRDecodeError(f'简化服务数据类型{apdu[1]}无效')
+    return apdu[1], apdu[2]
+
+
+def decode_get_request(apdu):
+    """
+    Returns:
+        tuple: (PIID, OAD列表, 结束偏移)
+    """
+    choice, piid = _check(apdu, COMPACT_GET_REQUEST)
+    if choice == COMPACT_NORMAL:
+        oad, pos = axdr.decode(apdu, 3, axdr.OAD)
+        return piid, [oad], pos
+    oads, pos = axdr.decode(apdu, 3, axdr.SEQUENCE_OF + axdr.OAD)
+    return piid, oads, pos
+
+
+def decode_set_request(apdu):
+    """
+    Returns:
+        tuple: (PIID, (OAD, Data)列表, 结束偏移)
+    """
+    choice, piid = _check(apdu, COMPACT_SET_REQUEST)
+    pos = 3
+    count = 1
+    if choice == COMPACT_NORMAL_LIST:
+        count, pos = axdr.read_length(apdu, pos)
+    items = []
+    for _ in range(count):
+        oad, pos = axdr.decode(apdu, pos, axdr.OAD)
+        data, pos = axdr.decode_data(apdu, pos)
+        items.append((oad, data))
+    return piid, items, pos
+
+
+def encode_get_response(piid_acd, results, choice=COMPACT_NORMAL_LIST):
+    """
+    生成COMPACT-GET-Response
+
+    Args:
+        results: Get-Result列表，每项为(0, DAR)或(1, Data)
+        choice: 与请求相同的形式
+    """
+    out = bytearray((COMPACT_GET_RESPONSE, choice, piid_acd))
+    if choice == COMPACT_NORMAL:
+        axdr.encode_value(out, axdr.GET_RESULT, results[0])
+    else:
+        axdr.encode_value(out, axdr.SEQUENCE_OF + axdr.GET_RESULT, results)
+    return bytes(out)
+
+
+def encode_set_response(piid_acd, dars, choice=COMPACT_NORMAL_LIST):
+    """生成COMPACT-SET-Response"""
+    out = bytearray((COMPACT_SET_RESPONSE, choice, piid_acd))
+    if choice == COMPACT_NORMAL_LIST:
+        axdr.write_length(out, len(dars))
+    out += bytes(dars)
+    return bytes(out)
+
+
+def decode_get_response(apdu, oads=None):
+    """
+    解码COMPACT-GET-Response
+
+    Args:
+        oads: 请求的OAD列表，给出时与结果一一对应并校验个数
+
+    Returns:
+        tuple: (GetResult列表, 结束偏移)；未给出oads时结果的oad为None
+    """
+    choice, _ = _check(apdu, COMPACT_GET_RESPONSE)
+    if choice == COMPACT_NORMAL:
+        value, pos = axdr.decode(apdu, 3, axdr.GET_RESULT)
+        values = [value]
+    else:
+        values, pos = axdr.decode(apdu, 3, axdr.SEQUENCE_OF + axdr.GET_RESULT)
+    if oads is None:
+        oads = [None] * len(values)
+    elif len(oads) != len(values):
+        raise axdr.AXDRDecodeError(f'简化读取响应结果数{len(values)}与请求OAD数{len(oads)}不符')
+    results = [GetResult(oad, value, None, None) if status == 0 else GetResult(oad, None, value, None)
+               for oad, (status, value) in zip(oads, values)]
+    return results, pos
+
+
+def decode_set_response(apdu):
+    """
+    Returns:
+        tuple: (DAR列表, 结束偏移)
+    """
+    choice, _ = _check(apdu, COMPACT_SET_RESPONSE)
+    if choice == COMPACT_NORMAL:
+        dar, pos = axdr.decode(apdu, 3, axdr.ENUM)
+        return [dar], pos
+    return axdr.decode(apdu, 3, axdr.SEQUENCE_OF + axdr.ENUM)
@@ -0,0 +1,123 @@
+"""
+698.45接收字节流分帧
+按状态机切分：跳过FE唤醒前导符和68H之前的杂散字节，读到68H和长度域后等待恰好一帧的字节数，
+帧尾必须为16H；一次读到的多帧逐帧切出，半帧留待下次。HCS在帧头收齐时即校验，
+伪起始符（帧内数据中的68H、长度域错误）立即丢弃一个字节重新同步；
+半帧之后接收空闲超过idle_timeout时丢弃半帧，截断的帧不会阻塞后续帧
+"""
+
+from .checksum import FrameCrcAccumulator
+from .frame_template import decode_length
+from .ring_buffer import DEFAULT_CAPACITY, RingBuffer
+
+FRAME_START = 0x68
+FRAME_END = 0x16
+PREAMBLE = 0xFE
+# 起始符(1) + 长度域(2) + 控制域(1) + SA标志(1) + 地址(>=1) + CA(1) + HCS(2) + FCS(2) + 结束符(1)
+MIN_FRAME_SIZE = 12
+# 串口半帧空闲判定：字符时间数，及考虑操作系统/USB转串口延迟的下限（秒）
+IDLE_CHARACTERS = 20
+MIN_IDLE_TIMEOUT = 0.05
+
+
+def serial_idle_timeout(baudrate, bits_per_character=11):
+    """按波特率计算串口的半帧空闲超时（秒），默认每字符11位（8数据位+校验位+起止位）"""
+    return max(MIN_IDLE_TIMEOUT, IDLE_CHARACTERS * bits_per_character / baudrate)
+
+
+class FrameDelimiter:
+    """
+    接收字节流分帧器
+
+    Args:
+        max_frame_size: 允许的最大帧长（字节），长度域超过时按伪起始符处理；None表示不限制
+        capacity: 接收环形缓冲区的初始容量
+        idle_timeout: 半帧后的最长接收空闲（秒），超过时丢弃半帧；None表示不按空闲丢弃
+    """
+
+    def __init__(self, max_frame_size=None, capacity=DEFAULT_CAPACITY, idle_timeout=None):
+        self.max_frame_size = max_frame_size
+        self.idle_timeout = idle_timeout
+        self.last_received = None  # 上次送入数据的时刻
+        self.buffer = RingBuffer(capacity)
+        self.crc = FrameCrcAccumulator()
+        self.expected = None  # 当前帧总字节数（68H至16H），长度域未收齐时为None
+        self.fed = 0  # 当前帧已送入校验累计器的字节数
+        self.discarded = 0  # 同步过程中丢弃的字节数（不含FE前导符）
+
+    def reset(self):
+        self.buffer.clear()
+        self._restart()
+
+    def _restart(self):
+        self.expected = None
+        self.fed = 0
+        self.crc.reset()
+
+    def _resync(self):
+        """当前68H不是帧起始，丢弃该字节后重新查找"""
+        self.buffer.consume(1)
+        self.discarded += 1
+        self._restart()
+
+    @property
+    def pending(self):
+        """缓冲中尚未成帧的字节数"""
+        return len(self.buffer)
+
+    def feed(self, data, received_at=None):
+        """
+        送入一段接收数据
+
+        Args:
+            data: 接收数据
+            received_at: 收到数据的时刻（秒，单调时钟），与上次间隔超过idle_timeout时先丢弃半帧
+
+        Returns:
+            list: 本次切出的完整帧，每项为(帧字节, (hcs_ok, fcs_ok))
+        """
+        buffer = self.buffer
+        if received_at is not None:
+            if (self.idle_timeout is not None and self.last_received is not None and len(buffer)
+                    and received_at - self.last_received > self.idle_timeout):
+                self.discarded += len(buffer)
+                self.reset()
+            self.last_received = received_at
+        buffer.write(data)
+        frames = []
+        while True:
+            if self.expected is None:
+                start = buffer.find(FRAME_START)
+                if start < 0:
+                    self.discarded += len(buffer) - buffer.count(PREAMBLE)
+                    buffer.clear()
+                    break
+                if start:
+                    self.discarded += start - buffer.count(PREAMBLE, 0, start)
+                    buffer.consume(start)
+                if len(buffer) < 3:
+                    break
+                total = decode_length(buffer[1] | (buffer[2] << 8)) + 2
+                if total < MIN_FRAME_SIZE or (self.max_frame_size and total > self.max_frame_size):
+                    self._resync()
+                    continue
+                self.expected = total
+
+            # 校验随数据到达累计，帧头收齐即可判定HCS
+            available = min(len(buffer), self.expected)
+            if available > self.fed:
+                for view in buffer.views(self.fed, available):
+                    self.crc.feed(view)
+                self.fed = available
+            if self.crc.hcs_ok is False:
+                self._resync()
+                continue
+            if len(buffer) < self.expected:
+                break
+            if buffer[self.expected - 1] != FRAME_END:
+                self._resync()
+                continue
+
+            frames.append((buffer.read(self.expected), self.crc.verdict()))
+            self._restart()
+        return frames
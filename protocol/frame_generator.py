@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+698.45批量抄读方案生成器
+按表地址范围/列表 × OAD列表 × 服务类型惰性生成请求帧，可分发到进程池并行生成，
+结果以流的方式直接写入帧数据库或CSV帧列表
+
+用法:
+    python -m protocol.frame_generator --range 000000000001-000000005000 \\
+        --oad 40000200 --oad 00100200 --service get --csv 抄读方案.csv
+    python -m protocol.frame_generator --addresses 表地址.txt --oad 20000200 --db frames.db --workers 4
+"""
+
+import argparse
+import csv
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .protocol_698 import Protocol698
+
+# 命令行服务简写 -> (服务类型, 数据类型)，取值与界面下拉框一致
+SERVICE_ALIASES = {
+    'get': ('GET-Request 读取请求 (5)', 'GetRequestNormal 读取一个对象属性 [1]'),
+    'get-md5': ('GET-Request 读取请求 (5)', 'GetRequestMD5 读取一个对象属性的MD5值 [6]'),
+    'set': ('SET-Request 设置请求 (6)', 'SetRequestNormal 设置一个对象属性 [1]'),
+    'action': ('ACTION-Request 操作请求 (7)', 'ActionRequestNormal 操作一个对象方法 [1]'),
+}
+
+# 默认帧参数，与界面默认选项一致
+DEFAULT_FRAME_PARAMS = {
+    'direction': '客户机发出(0)',
+    'prm': '启动站(1)',
+    'function': '用户数据(3)',
+    'split_frame': '不分帧(0)',
+    'addr_type': '单地址(0)',
+    'sa_logic_value': 0,
+    'bit5': 0,
+    'logic_addr': '16',
+}
+
+# 每个进程池任务处理的表地址数
+CHUNK_SIZE = 256
+
+
+def iter_address_range(first, last):
+    """
+    按十进制(BCD)递增生成表地址
+
+    Args:
+        first: 起始地址字符串，如'000000000001'
+        last: 结束地址字符串（包含）
+
+    Yields:
+        str: 与起始地址等宽（补齐到整字节）的地址字符串
+    """
+    width = len(first) + len(first) % 2
+    for value in range(int(first), int(last) + 1):
+        yield str(value).zfill(width)
+
+
+def parse_address_spec(spec):
+    """解析'起始-结束'形式的地址范围"""
+    first, _, last = spec.partition('-')
+    return iter_address_range(first.strip(), (last or first).strip())
+
+
+def _resolve_service(service):
+    if service in SERVICE_ALIASES:
+        return SERVICE_ALIASES[service]
+    if isinstance(service, tuple):
+        return service
+    return service, ''
+
+
+def _service_name(service_type):
+    """取服务类型的中文名称，如'GET-Request 读取请求 (5)' -> '读取请求'"""
+    for part in service_type.split(' '):
+        if any('\u4e00' <= c <= '\u9fff' for c in part):
+            return part
+    return service_type
+
+
+class FrameSweep:
+    """
+    地址 × OAD × 服务类型 的帧生成计划
+
+    Args:
+        oads: OAD列表（8位十六进制字符串）
+        services: 服务列表，可为SERVICE_ALIASES中的简写或(服务类型, 数据类型)元组
+        data: 每个OAD后附加的数据（bytes，如axdr.encode的结果，或十六进制字符串），SET/ACTION时使用
+        frame_params: 覆盖DEFAULT_FRAME_PARAMS的帧参数
+    """
+
+    def __init__(self, oads, services=('get',), data='', frame_params=None):
+        self.oads = [oad.replace(' ', '') for oad in oads]
+        self.services = [_resolve_service(service) for service in services]
+        self.data = bytes.fromhex(data.replace(' ', '')) if isinstance(data, str) else bytes(data)
+        self.frame_params = dict(DEFAULT_FRAME_PARAMS)
+        if frame_params:
+            self.frame_params.update(frame_params)
+        self._protocol = None
+
+    def __getstate__(self):
+        # 进程池传递时不携带协议对象和模板缓存
+        state = self.__dict__.copy()
+        state['_protocol'] = None
+        return state
+
+    def frames_for(self, address):
+        """
+        生成单个表地址的全部帧
+
+        Args:
+            address: 表地址字符串
+
+        Returns:
+            list: [(名称, 帧字节)]
+        """
+        if self._protocol is None:
+            self._protocol = Protocol698()
+        protocol = self._protocol
+        params = self.frame_params
+        bit5 = params['bit5']
+        address = address.zfill(len(address) + len(address) % 2)
+        addr_len = str(len(address) // 2 + (1 if bit5 else 0))
+        data = self.data
+        frames = []
+        for service_type, service_data_type in self.services:
+            template = protocol.get_template(params['direction'], params['prm'], params['function'],
+                                             params['split_frame'], params['addr_type'], addr_len,
+                                             params['sa_logic_value'], bit5, params['logic_addr'],
+                                             address, service_type, service_data_type)
+            service_name = _service_name(service_type)
+            for oad in self.oads:
+                piid = protocol.get_next_piid()
+                frame = template.render(piid, bytes.fromhex(oad), data)
+                frames.append((f"{service_name}_{oad}_{address}", frame))
+        return frames
+
+    def frames_for_chunk(self, addresses, start=0):
+        """
+        生成一批表地址的帧（进程池任务）
+
+        Args:
+            addresses: 表地址列表
+            start: 本批首个地址在全部地址中的序号，用于接续PIID，使结果与进程数无关
+        """
+        if self._protocol is None:
+            self._protocol = Protocol698()
+        frames_per_address = len(self.services) * len(self.oads)
+        self._protocol.piid = (start * frames_per_address) & 0x3F
+        frames = []
+        for address in addresses:
+            frames.extend(self.frames_for(address))
+        return frames
+
+    def iter_frames(self, addresses, workers=1, chunk_size=CHUNK_SIZE):
+        """
+        惰性生成全部帧
+
+        Args:
+            addresses: 表地址可迭代对象
+            workers: 进程数，1表示在当前进程生成
+            chunk_size: 每个进程池任务的地址数
+
+        Yields:
+            tuple: (名称, 帧字节)，顺序与地址顺序一致
+        """
+        if workers <= 1:
+            for address in addresses:
+                yield from self.frames_for(address)
+            return
+
+        addresses = iter(addresses)
+        chunks = iter(lambda: list(islice(addresses, chunk_size)), [])
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 限制同时在途的任务数，避免一次性提交全部地址
+            pending = []
+            start = 0
+            for chunk in chunks:
+                pending.append(executor.submit(self.frames_for_chunk, chunk, start))
+                start += len(chunk)
+                if len(pending) >= workers * 2:
+                    yield from pending.pop(0).result()
+            for future in pending:
+                yield from future.result()
+
+
+def write_csv(frames, path, timeout_ms=1000):
+    """
+    将帧流式写入CSV帧列表（格式与界面导出一致）
+
+    Returns:
+        int: 写入的帧数
+    """
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['名称', '帧内容', '状态', '启用匹配', '匹配规则', '匹配模式', '测试结果', '超时(ms)'])
+        for name, frame in frames:
+            writer.writerow([name, frame.hex(), '就绪', '0', '', 'HEX', '', timeout_ms])
+            count += 1
+    return count
+
+
+def write_database(frames, db_path='frames.db', timeout_ms=1000):
+    """
+    将帧流式写入帧数据库
+
+    Returns:
+        int: 写入的帧数
+    """
+    from utils.database_handler import DatabaseHandler
+    database = DatabaseHandler(db_path)
+    return database.add_frames_bulk(((name, frame.hex()) for name, frame in frames),
+                                    status='就绪', timeout_ms=timeout_ms)
+
+
+def _read_address_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            address = line.strip().replace(' ', '')
+            if address:
+                yield address
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='698.45批量抄读方案生成')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--range', help='表地址范围，如000000000001-000000005000')
+    source.add_argument('--addresses', help='表地址列表文件，每行一个地址')
+    parser.add_argument('--oad', action='append', required=True, help='OAD，可重复指定')
+    parser.add_argument('--service', action='append', choices=sorted(SERVICE_ALIASES),
+                        help='服务类型，可重复指定，默认get')
+    parser.add_argument('--data', default='', help='SET/ACTION附加数据(HEX)')
+    parser.add_argument('--ca', default=DEFAULT_FRAME_PARAMS['logic_addr'], help='客户机地址CA(十进制)')
+    parser.add_argument('--workers', type=int, default=1, help='并行进程数')
+    parser.add_argument('--timeout', type=int, default=1000, help='每帧超时(ms)')
+    sink = parser.add_mutually_exclusive_group(required=True)
+    sink.add_argument('--csv', help='输出CSV帧列表路径')
+    sink.add_argument('--db', help='输出帧数据库路径')
+    args = parser.parse_args(argv)
+
+    addresses = parse_address_spec(args.range) if args.range else _read_address_file(args.addresses)
+    sweep = FrameSweep(args.oad, args.service or ['get'], args.data, {'logic_addr': args.ca})
+    frames = sweep.iter_frames(addresses, workers=args.workers)
+    if args.csv:
+        count = write_csv(frames, args.csv, args.timeout)
+    else:
+        count = write_database(frames, args.db, args.timeout)
+    print(f"已生成 {count} 帧")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+698.45帧参数的类型化描述
+FrameSpec以整数编码描述控制域、SA、CA和APDU服务类型，脚本和生成器直接构造，不经过界面选项文本；
+相同的FrameSpec只编译一次FrameTemplate。界面选项文本由Protocol698.spec_from_ui转换
+"""
+
+from dataclasses import dataclass
+from enum import IntEnum
+from functools import lru_cache
+from typing import Optional, Union
+
+from .frame_template import FrameTemplate
+from .header_tables import encode_sa_flag
+
+
+class Direction(IntEnum):
+    """D7 传输方向"""
+    CLIENT = 0
+    SERVER = 1
+
+
+class Function(IntEnum):
+    """D2-D0 功能码"""
+    LINK = 1
+    USER_DATA = 3
+
+
+class AddrType(IntEnum):
+    """SA标志 D7-D6 地址类型"""
+    SINGLE = 0
+    WILDCARD = 1
+    GROUP = 2
+    BROADCAST = 3
+
+
+class Service(IntEnum):
+    """客户机发出的APDU服务类型"""
+    LINK_REQUEST = 0x01
+    CONNECT_REQUEST = 0x02
+    RELEASE_REQUEST = 0x03
+    GET_REQUEST = 0x05
+    SET_REQUEST = 0x06
+    ACTION_REQUEST = 0x07
+    REPORT_RESPONSE = 0x08
+    PROXY_REQUEST = 0x09
+    SECURITY_REQUEST = 0x10
+    COMPACT_GET_REQUEST = 0x85
+    COMPACT_SET_REQUEST = 0x86
+
+
+class GetChoice(IntEnum):
+    NORMAL = 1
+    NORMAL_LIST = 2
+    RECORD = 3
+    RECORD_LIST = 4
+    NEXT = 5
+    MD5 = 6
+
+
+class SetChoice(IntEnum):
+    NORMAL = 1
+    NORMAL_LIST = 2
+    THEN_GET_NORMAL_LIST = 3
+
+
+class ActionChoice(IntEnum):
+    NORMAL = 1
+    NORMAL_LIST = 2
+    THEN_GET_NORMAL_LIST = 3
+
+
+def make_piid(priority, number):
+    """PIID: D7-D6 服务优先级，D5-D0 服务序号"""
+    return ((priority & 0x03) << 6) | (number & 0x3F)
+
+
+@dataclass(frozen=True)
+class FrameSpec:
+    """
+    帧参数
+
+    Args:
+        address: 服务器通信地址（高字节在前的bytes或十六进制字符串）
+        service: APDU服务类型码，None表示无APDU（无数据域）
+        choice: APDU数据类型（CHOICE）码
+        ca: 客户机地址
+        logic_addr: 服务器逻辑地址，0/1使用SA标志D4，2~255使用扩展逻辑地址字节
+        ext_logic: 逻辑地址为0/1时也使用扩展逻辑地址字节
+        addr_len: SA地址字节数（含扩展逻辑地址），None表示按address长度；地址较短时高位补0
+        direction, prm, split, function, addr_type: 控制域和SA标志的其余位
+    """
+
+    address: Union[bytes, str]
+    service: Optional[int] = Service.GET_REQUEST
+    choice: int = GetChoice.NORMAL
+    ca: int = 0x10
+    logic_addr: int = 0
+    ext_logic: bool = False
+    addr_len: Optional[int] = None
+    direction: int = Direction.CLIENT
+    prm: bool = True
+    split: bool = False
+    function: int = Function.USER_DATA
+    addr_type: int = AddrType.SINGLE
+
+    def __post_init__(self):
+        address = self.address
+        if isinstance(address, str):
+            address = address.replace(' ', '').replace('\t', '')
+            address = bytes.fromhex(address.zfill(len(address) + len(address) % 2))
+        else:
+            address = bytes(address)
+        if self.addr_len is not None:
+            size = self.addr_len - (1 if self.has_ext_logic else 0)
+            if len(address) < size:
+                address = bytes(size - len(address)) + address
+        object.__setattr__(self, 'address', address)
+
+    @property
+    def has_ext_logic(self):
+        return self.ext_logic or self.logic_addr > 1
+
+    @property
+    def control(self):
+        """控制域字节"""
+        return ((self.direction & 1) << 7 | (1 if self.prm else 0) << 6 | (1 if self.split else 0) << 5
+                | (0 if self.service is None else 1) << 4 | (self.function & 0x07))
+
+    @property
+    def sa_flag(self):
+        """SA标志字节"""
+        ext = self.has_ext_logic
+        addr_len = self.addr_len or len(self.address) + (1 if ext else 0)
+        return encode_sa_flag(self.addr_type, 1 if ext else 0, 0 if ext else self.logic_addr & 1, addr_len)
+
+    @property
+    def sa_address(self):
+        """帧中的SA地址字节（扩展逻辑地址 + 低字节在前的通信地址）"""
+        ext = bytes((self.logic_addr & 0xFF,)) if self.has_ext_logic else b''
+        return ext + self.address[::-1]
+
+    def template(self):
+        """编译（或取缓存的）帧模板"""
+        return compile_spec(self)
+
+    def render(self, piid=0, oad=b'', data=b''):
+        """生成一帧，参数见FrameTemplate.render"""
+        return compile_spec(self).render(piid, oad, data)
+
+
+@lru_cache(maxsize=4096)
+def compile_spec(spec):
+    """FrameSpec -> FrameTemplate，相同参数只编译一次"""
+    return FrameTemplate(spec.control, spec.sa_flag, spec.sa_address, spec.ca, spec.service,
+                         0 if spec.service is None else spec.choice)
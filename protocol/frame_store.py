@@ -0,0 +1,138 @@
+"""
+内容寻址的帧库
+帧字节按其SHA1只保存一份，帧名称、测试步骤只引用哈希；
+帧视图、解析结果、分帧结果等按唯一帧计算一次并缓存，无引用的帧随最后一个名称一起释放
+"""
+
+import hashlib
+import threading
+
+from .frame_view import FrameView
+
+
+def frame_key(frame):
+    """帧字节 -> 哈希（十六进制字符串）"""
+    return hashlib.sha1(bytes(frame)).hexdigest()
+
+
+def content_key(content):
+    """
+    帧内容文本（十六进制，可含空格）-> (哈希, 规范文本)
+    规范文本为小写无空格的十六进制；不是有效十六进制的文本按原文哈希，原样返回
+    """
+    try:
+        frame = bytes.fromhex(content)
+    except ValueError:
+        return hashlib.sha1(content.encode('utf-8')).hexdigest(), content
+    return frame_key(frame), frame.hex()
+
+
+class FrameStore:
+    """
+    帧库：哈希 -> 帧字节，名称 -> 哈希
+
+    同一帧字节以不同名称保存多次时只占一份内存，派生数据（metadata）也只计算一次
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frames = {}  # 哈希 -> 帧字节
+        self._refs = {}  # 哈希 -> 引用该帧的名称数
+        self._names = {}  # 名称 -> 哈希
+        self._metadata = {}  # 哈希 -> {类别: 派生数据}
+
+    def __len__(self):
+        """唯一帧数"""
+        return len(self._frames)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def get(self, key):
+        """哈希 -> 帧字节，不存在时为None"""
+        return self._frames.get(key)
+
+    def bind(self, name, frame):
+        """以名称保存帧，名称已存在时改为引用新帧，返回哈希"""
+        frame = bytes(frame)
+        key = frame_key(frame)
+        with self._lock:
+            old = self._names.get(name)
+            if old == key:
+                return key
+            self._frames.setdefault(key, frame)
+            self._refs[key] = self._refs.get(key, 0) + 1
+            self._names[name] = key
+            if old is not None:
+                self._release(old)
+        return key
+
+    def unbind(self, name):
+        """删除名称，帧不再被引用时一并释放"""
+        with self._lock:
+            key = self._names.pop(name, None)
+            if key is not None:
+                self._release(key)
+
+    def rename(self, old_name, new_name):
+        """名称改名，不复制帧"""
+        with self._lock:
+            key = self._names.pop(old_name, None)
+            if key is None:
+                return False
+            previous = self._names.get(new_name)
+            self._names[new_name] = key
+            if previous is not None:
+                self._release(previous)
+            return True
+
+    def _release(self, key):
+        count = self._refs.get(key, 0) - 1
+        if count > 0:
+            self._refs[key] = count
+            return
+        self._refs.pop(key, None)
+        self._frames.pop(key, None)
+        self._metadata.pop(key, None)
+
+    def key_for(self, name):
+        """名称 -> 哈希"""
+        return self._names.get(name)
+
+    def frame_for(self, name):
+        """名称 -> 帧字节"""
+        key = self._names.get(name)
+        return None if key is None else self._frames.get(key)
+
+    def metadata(self, key, kind, compute):
+        """
+        返回帧的派生数据，每个(帧, 类别)只计算一次
+
+        Args:
+            key: 帧哈希
+            kind: 类别（可哈希对象，如'view'、('fragments', 最大帧长)）
+            compute: 计算函数，参数为帧字节
+        """
+        try:
+            return self._metadata[key][kind]
+        except KeyError:
+            pass
+        frame = self._frames.get(key)
+        if frame is None:
+            return None
+        value = compute(frame)
+        with self._lock:
+            if key in self._frames:
+                self._metadata.setdefault(key, {})[kind] = value
+        return value
+
+    def view(self, key):
+        """帧的惰性视图（帧头解码、校验结果在视图中缓存）"""
+        return self.metadata(key, 'view', FrameView)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._refs.clear()
+            self._names.clear()
+            self._metadata.clear()
@@ -0,0 +1,123 @@
+"""
+698.45协议预编译帧模板
+控制域、SA标志、SA地址、CA在模板编译时固定，生成帧时只写入APDU，
+再按长度补写长度域和FCS；帧头(含HCS)按帧长缓存，FCS从帧头之后的寄存器值续算
+"""
+
+from .checksum import CRC16_INIT, CRC16_XOROUT, crc16, crc16_update
+
+FRAME_START = 0x68
+FRAME_END = 0x16
+TIME_TAG_NONE = b'\x00'  # 无时间标签
+
+# 长度域: D13-D0 长度，D14 长度单位（0字节，1千字节）
+LENGTH_MASK = 0x3FFF
+LENGTH_UNIT_KB = 0x4000
+
+
+def encode_length(length):
+    """
+    生成长度域数值，超过16383字节时使用千字节单位
+
+    Raises:
+        ValueError: 长度超出范围，或以千字节为单位时不是1024的整数倍
+    """
+    if length <= LENGTH_MASK:
+        return length
+    kilobytes, remainder = divmod(length, 1024)
+    if remainder or kilobytes > LENGTH_MASK:
+        raise ValueError(f'帧长度{length}无法用长度域表示（超过{LENGTH_MASK}字节时须为1024的整数倍）')
+    return kilobytes | LENGTH_UNIT_KB
+
+
+def decode_length(value):
+    """长度域数值 -> 字节数"""
+    if value & LENGTH_UNIT_KB:
+        return (value & LENGTH_MASK) << 10
+    return value & LENGTH_MASK
+
+
+class FrameTemplate:
+    """
+    预编译帧模板
+
+    Args:
+        control: 控制域字节
+        sa_flag: SA标志字节
+        sa_address: 帧中SA地址字节（含扩展逻辑地址，已按低字节在前排列）
+        ca: 客户机地址
+        service_code: APDU服务类型码，None表示无APDU
+        data_type_code: APDU数据类型（CHOICE）码
+    """
+
+    __slots__ = ('control', 'sa_flag', 'sa_address', 'ca', 'service_code',
+                 'data_type_code', '_header_tail', '_apdu_prefix', '_heads')
+
+    def __init__(self, control, sa_flag, sa_address, ca, service_code=None, data_type_code=0):
+        self.control = control & 0xFF
+        self.sa_flag = sa_flag & 0xFF
+        self.sa_address = bytes(sa_address)
+        self.ca = ca & 0xFF
+        self.service_code = service_code
+        self.data_type_code = data_type_code
+        # 长度域之后、HCS之前的固定字节
+        self._header_tail = bytes((self.control, self.sa_flag)) + self.sa_address + bytes((self.ca,))
+        self._apdu_prefix = b'' if service_code is None else bytes((service_code & 0xFF, data_type_code & 0xFF))
+        # 帧长 -> (起始符~HCS的字节, HCS之后的CRC寄存器值)
+        self._heads = {}
+
+    @property
+    def overhead(self):
+        """除链路用户数据外的帧字节数（含起始符和结束符）"""
+        return 1 + 2 + len(self._header_tail) + 2 + 2 + 1
+
+    def _head(self, length):
+        entry = self._heads.get(length)
+        if entry is None:
+            field = encode_length(length)
+            length_bytes = bytes((field & 0xFF, field >> 8))
+            hcs = crc16(length_bytes + self._header_tail)
+            head = bytes((FRAME_START,)) + length_bytes + self._header_tail + bytes((hcs & 0xFF, hcs >> 8))
+            entry = (head, crc16_update(CRC16_INIT, head[1:]))
+            self._heads[length] = entry
+        return entry
+
+    def render_user_data(self, user_data):
+        """
+        用给定的链路用户数据生成完整帧
+
+        Args:
+            user_data: 链路用户数据（APDU及时间标签）
+
+        Returns:
+            bytes: 完整帧
+        """
+        # 长度域 = 长度域(2) + 控制域到CA + HCS(2) + 用户数据 + FCS(2)
+        length = 2 + len(self._header_tail) + 2 + len(user_data) + 2
+        head, register = self._head(length)
+        fcs = crc16_update(register, user_data) ^ CRC16_XOROUT
+        return b''.join((head, user_data, bytes((fcs & 0xFF, fcs >> 8, FRAME_END))))
+
+    def user_data(self, piid, oad=b'', data=b''):
+        """
+        生成请求的链路用户数据（APDU及时间标签），参数同render
+        """
+        if self.service_code is None:
+            return TIME_TAG_NONE
+        if isinstance(oad, str):
+            oad = bytes.fromhex(oad)
+        return b''.join((self._apdu_prefix, bytes((piid & 0xFF,)), oad, data, TIME_TAG_NONE))
+
+    def render(self, piid, oad=b'', data=b''):
+        """
+        生成一帧请求
+
+        Args:
+            piid: PIID字节
+            oad: OAD，可为4字节bytes或8位十六进制字符串
+            data: OAD之后的数据字节
+
+        Returns:
+            bytes: 完整帧
+        """
+        return self.render_user_data(self.user_data(piid, oad, data))
@@ -0,0 +1,353 @@
+"""
+698.45协议帧的零拷贝惰性视图
+基于memoryview，帧头字段、地址、APDU偏移在首次访问时才解码；
+完整的中文解析字典仅在调用to_dict()时生成
+"""
+
+from .checksum import crc16
+from .frame_template import decode_length
+from .header_tables import ADDR_TYPE_NAMES, CONTROL_TABLE, SA_FLAG_TABLE
+
+FRAME_START = 0x68
+FRAME_END = 0x16
+PREAMBLE = 0xFE
+
+SPLIT_TYPE_NAMES = {0: '起始帧', 1: '最后帧', 2: '确认帧', 3: '中间帧'}
+
+
+class FrameView:
+    """
+    698.45协议帧视图
+
+    Args:
+        frame_bytes: 帧数据（bytes/bytearray/memoryview），可带FE前导符
+    """
+
+    __slots__ = ('_mv', '_start', '_end', '_sa_len', '_addr_offset', '_hcs_offset',
+                 '_hcs_ok', '_fcs_ok')
+
+    def __init__(self, frame_bytes):
+        mv = memoryview(frame_bytes)
+        if mv.format != 'B':
+            mv = mv.cast('B')
+        start = 0
+        size = len(mv)
+        # 跳过FE唤醒前导符（只移动下标，不重新切片）
+        while start < size and mv[start] == PREAMBLE:
+            start += 1
+        self._mv = mv
+        self._start = start
+        self._end = None
+        self._sa_len = None
+        self._addr_offset = None
+        self._hcs_offset = None
+        self._hcs_ok = None
+        self._fcs_ok = None
+
+    # ---- 基本信息 ----
+
+    @property
+    def start(self):
+        """起始符68H在缓冲区中的偏移"""
+        return self._start
+
+    @property
+    def is_valid_start(self):
+        return self._start < len(self._mv) and self._mv[self._start] == FRAME_START
+
+    @property
+    def raw_length(self):
+        """长度域原始值"""
+        mv = self._mv
+        return mv[self._start + 1] | (mv[self._start + 2] << 8)
+
+    @property
+    def length(self):
+        """长度域表示的字节数（D13-D0，D14为千字节单位）"""
+        return decode_length(self.raw_length)
+
+    @property
+    def end(self):
+        """帧结束位置（不含），按长度域计算，超出缓冲区时取缓冲区末尾"""
+        if self._end is None:
+            size = len(self._mv)
+            end = self._start + self.length + 2
+            self._end = end if self._start + 3 <= end <= size else size
+        return self._end
+
+    @property
+    def frame(self):
+        """去掉前导符后的帧内容（memoryview）"""
+        return self._mv[self._start:self.end]
+
+    # ---- 控制域 ----
+
+    @property
+    def control(self):
+        return self._mv[self._start + 3]
+
+    @property
+    def direction(self):
+        """D7 传输方向：0客户机发出，1服务器发出"""
+        return self.control >> 7
+
+    @property
+    def prm(self):
+        """D6 启动标志"""
+        return (self.control >> 6) & 0x01
+
+    @property
+    def split_frame(self):
+        """D5 分帧标志"""
+        return (self.control >> 5) & 0x01
+
+    @property
+    def sc_flag(self):
+        """D4 数据域标志"""
+        return (self.control >> 4) & 0x01
+
+    @property
+    def func_code(self):
+        """D2-D0 功能码"""
+        return self.control & 0x07
+
+    # ---- SA/CA ----
+
+    @property
+    def sa_flag(self):
+        return self._mv[self._start + 4]
+
+    @property
+    def addr_type(self):
+        """D7-D6 地址类型"""
+        return (self.sa_flag >> 6) & 0x03
+
+    @property
+    def has_ext_logic(self):
+        """D5 扩展逻辑地址标志"""
+        return bool(self.sa_flag & 0x20)
+
+    @property
+    def logic_addr_bit(self):
+        """D4 逻辑地址标志"""
+        return (self.sa_flag >> 4) & 0x01
+
+    @property
+    def addr_len(self):
+        """D3-D0 地址长度（字节数，含扩展逻辑地址）"""
+        return (self.sa_flag & 0x0F) + 1
+
+    def _decode_header(self):
+        ext_len = 1 if self.has_ext_logic else 0
+        self._addr_offset = self._start + 5 + ext_len
+        self._sa_len = self.addr_len - ext_len
+        self._hcs_offset = self._addr_offset + self._sa_len + 1
+
+    @property
+    def sa_logic(self):
+        """SA逻辑地址：有扩展逻辑地址时为扩展字节，否则为D4"""
+        if self.has_ext_logic:
+            return self._mv[self._start + 5]
+        return self.logic_addr_bit
+
+    @property
+    def sa_address(self):
+        """SA通信地址字节（帧中顺序，低字节在前）"""
+        if self._hcs_offset is None:
+            self._decode_header()
+        return self._mv[self._addr_offset:self._addr_offset + self._sa_len]
+
+    @property
+    def sa_address_hex(self):
+        """SA通信地址（高字节在前的十六进制字符串）"""
+        return bytes(self.sa_address)[::-1].hex().upper()
+
+    @property
+    def sa_field(self):
+        """SA字段原始字节（SA标志、扩展逻辑地址、通信地址），可作为会话键"""
+        return self._mv[self._start + 4:self.hcs_offset - 1]
+
+    @property
+    def ca(self):
+        if self._hcs_offset is None:
+            self._decode_header()
+        return self._mv[self._hcs_offset - 1]
+
+    # ---- 校验 ----
+
+    @property
+    def hcs_offset(self):
+        if self._hcs_offset is None:
+            self._decode_header()
+        return self._hcs_offset
+
+    @property
+    def hcs(self):
+        offset = self.hcs_offset
+        return self._mv[offset] | (self._mv[offset + 1] << 8)
+
+    @property
+    def calculated_hcs(self):
+        return crc16(self._mv[self._start + 1:self.hcs_offset])
+
+    @property
+    def hcs_ok(self):
+        if self._hcs_ok is None:
+            self._hcs_ok = self.hcs == self.calculated_hcs
+        return self._hcs_ok
+
+    @property
+    def fcs_offset(self):
+        return self.end - 3
+
+    @property
+    def fcs(self):
+        offset = self.fcs_offset
+        return self._mv[offset] | (self._mv[offset + 1] << 8)
+
+    @property
+    def calculated_fcs(self):
+        return crc16(self._mv[self._start + 1:self.fcs_offset])
+
+    @property
+    def fcs_ok(self):
+        if self._fcs_ok is None:
+            self._fcs_ok = self.fcs == self.calculated_fcs
+        return self._fcs_ok
+
+    # ---- APDU ----
+
+    @property
+    def apdu_offset(self):
+        """链路用户数据起始偏移"""
+        return self.hcs_offset + 2
+
+    @property
+    def user_data(self):
+        """链路用户数据（不含时间标签、FCS、结束符）"""
+        return self._mv[self.apdu_offset:self.end - 4]
+
+    @property
+    def link_data(self):
+        """HCS与FCS之间的全部字节（分帧时为分帧格式域 + APDU片段）"""
+        return self._mv[self.apdu_offset:self.fcs_offset]
+
+    @property
+    def service_code(self):
+        """APDU服务类型码，无APDU时为None"""
+        offset = self.apdu_offset
+        return self._mv[offset] if offset < self.end - 4 else None
+
+    @property
+    def piid(self):
+        """PIID/PIID-ACD，APDU过短时为None"""
+        offset = self.apdu_offset + 2
+        return self._mv[offset] if offset < self.end - 4 else None
+
+    # ---- 显示 ----
+
+    def to_dict(self, user_data_parser=None):
+        """
+        生成与Protocol698.parse_frame相同结构的解析结果字典
+
+        Args:
+            user_data_parser: 解析链路用户数据的函数，结果放在'用户数据解析'
+
+        Returns:
+            dict: 解析结果
+        """
+        try:
+            mv = self._mv
+            size = len(mv)
+            if size - self._start < 10:
+                return {'error': '帧长度不足'}
+            if mv[self._start] != FRAME_START:
+                return {'error': f'起始符错误: {mv[self._start]:02X}'}
+
+            result = {'起始符': '68'}
+            raw_length = self.raw_length
+            if raw_length & 0x4000:
+                result['长度域'] = f'{self.length} ({raw_length:04X}H, 千字节单位)'
+            else:
+                result['长度域'] = f'{raw_length} ({raw_length:04X}H)'
+
+            control = self.control
+            result['控制域'] = dict(CONTROL_TABLE[control].display)
+
+            sa_flag = self.sa_flag
+            addr_type_name = ADDR_TYPE_NAMES[sa_flag >> 6]
+            result['SA标志'] = dict(SA_FLAG_TABLE[sa_flag].display)
+            if sa_flag & 0x10:
+                result['SA逻辑地址'] = f'{self.logic_addr_bit:02X}H'
+            if sa_flag & 0x20:
+                result['扩展逻辑地址'] = f'{self.sa_logic:02X}H'
+
+            sa_address = self.sa_address
+            result['SA地址'] = {
+                '原始值': self.sa_address_hex,
+                '长度': len(sa_address),
+                '地址类型': addr_type_name
+            }
+
+            ca = self.ca
+            result['CA客户机地址'] = {
+                '原始值': f'{ca:02X}H',
+                '十进制': ca
+            }
+
+            hcs = self.hcs
+            calculated_hcs = self.calculated_hcs
+            result['HCS帧头校验'] = {
+                '原始值': f'{hcs:04X}H',
+                '计算值': f'{calculated_hcs:04X}H',
+                '校验结果': '通过' if hcs == calculated_hcs else '失败'
+            }
+
+            end = self.end
+            idx = self.apdu_offset
+            if control:
+                user_data_len = end - idx - 4  # 减去时间标签(1) + FCS(2) + 结束符(1)
+                if user_data_len > 0:
+                    user_data = bytes(mv[idx:idx + user_data_len])
+                    result['应用层链路用户数据'] = {
+                        '原始值': user_data.hex(),
+                        '长度': user_data_len
+                    }
+                    idx += user_data_len
+                    # 分帧传输时链路用户数据为分帧格式域 + APDU片段，片段需重组后才能解析
+                    if user_data_parser and not control & 0x20:
+                        user_data_info = user_data_parser(user_data)
+                        if user_data_info:
+                            result['用户数据解析'] = user_data_info
+                if control & 0x20 and self.fcs_offset - self.apdu_offset >= 2:
+                    split_format = mv[self.apdu_offset] | (mv[self.apdu_offset + 1] << 8)
+                    result['分帧格式域'] = {
+                        '原始值': f'{split_format:04X}H',
+                        '帧序号': split_format & 0x0FFF,
+                        '帧类型': SPLIT_TYPE_NAMES[split_format >> 14]
+                    }
+
+            if idx < end - 3:
+                result['时间标签'] = f'{mv[idx]:02X}H'
+                idx += 1
+
+            if idx + 2 < end:
+                fcs = mv[idx] | (mv[idx + 1] << 8)
+                calculated_fcs = crc16(mv[self._start + 1:idx])
+                result['FCS校验'] = {
+                    '原始值': f'{fcs:04X}H',
+                    '计算值': f'{calculated_fcs:04X}H',
+                    '校验结果': '通过' if fcs == calculated_fcs else '失败'
+                }
+                idx += 2
+
+            if idx < end:
+                end_mark = mv[idx]
+                result['结束符'] = f'{end_mark:02X}H'
+                if end_mark != FRAME_END:
+                    result['warning'] = f'结束符应为16H，实际为{end_mark:02X}H'
+
+            return result
+
+        except Exception as e:
+            return {'error': f'解析错误: {str(e)}'}
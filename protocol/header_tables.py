@@ -0,0 +1,102 @@
+"""
+698.45控制域、SA标志字节的256项预计算表
+每个字节值对应一个解码元组和预先生成的显示字典，生成帧、解析帧和界面共用：
+解析帧头只需两次查表，生成帧时界面选项文本直接查得对应的位值
+"""
+
+from collections import namedtuple
+from types import MappingProxyType
+
+# 界面选项文本，文本末尾括号内为位值
+DIRECTION_LABELS = ('客户机发出(0)', '服务器发出(1)')
+PRM_LABELS = ('从动站(0)', '启动站(1)')
+SPLIT_LABELS = ('不分帧(0)', '分帧(1)')
+SC_LABELS = ('无数据域(0)', '有数据域(1)')
+FUNCTION_LABELS = ('保留(0)', '链路管理(1)', '保留(2)', '用户数据(3)',
+                   '保留(4)', '保留(5)', '保留(6)', '保留(7)')
+ADDR_TYPE_LABELS = ('单地址(0)', '通配地址(1)', '组地址(2)', '广播地址(3)')
+
+ADDR_TYPE_NAMES = {0: '单地址', 1: '通配地址', 2: '组地址', 3: '广播地址'}
+
+# 地址长度选项文本 -> D3-D0
+ADDR_LEN_CODES = {
+    '1字节(0)': 0x00,
+    '2字节(1)': 0x01,
+    '4字节(2)': 0x03,
+    '6字节(3)': 0x05
+}
+
+
+class ControlInfo(namedtuple('ControlInfo', 'dir prm split sc func display')):
+    """控制域解码结果: D7传输方向, D6启动标志, D5分帧标志, D4数据域标志, D2-D0功能码, 显示字典（只读）"""
+    __slots__ = ()
+
+
+class SAFlagInfo(namedtuple('SAFlagInfo', 'addr_type ext_logic logic_addr addr_len display')):
+    """SA标志解码结果: D7-D6地址类型, D5扩展逻辑地址, D4逻辑地址, 地址字节数(D3-D0加1), 显示字典（只读）"""
+    __slots__ = ()
+
+
+def _control_info(value):
+    display = {
+        '原始值': f'{value:02X}H',
+        'D7-传输方向': '服务器发出' if value & 0x80 else '客户机发出',
+        'D6-启动标志': '启动站' if value & 0x40 else '从动站',
+        'D5-分帧标志': '分帧' if value & 0x20 else '不分帧',
+        'D4-数据域标志': '有数据域' if value & 0x10 else '无数据域',
+        'D2-D0-功能码': value & 0x07
+    }
+    return ControlInfo(value >> 7, (value >> 6) & 1, (value >> 5) & 1, (value >> 4) & 1, value & 0x07,
+                       MappingProxyType(display))
+
+
+def _sa_flag_info(value):
+    addr_len = (value & 0x0F) + 1
+    display = {
+        '原始值': f'{value:02X}H',
+        'D7-D6-地址类型': ADDR_TYPE_NAMES[value >> 6],
+        'D5-扩展逻辑地址': '有' if value & 0x20 else '无',
+        'D4-逻辑地址标志': '有' if value & 0x10 else '无',
+        'D3-D0-地址长度': f'{addr_len}字节 ({value & 0x0F})'
+    }
+    return SAFlagInfo(value >> 6, (value >> 5) & 1, (value >> 4) & 1, addr_len, MappingProxyType(display))
+
+
+CONTROL_TABLE = tuple(_control_info(value) for value in range(256))
+SA_FLAG_TABLE = tuple(_sa_flag_info(value) for value in range(256))
+
+
+def _label_bits(labels, shift):
+    return MappingProxyType({label: index << shift for index, label in enumerate(labels)})
+
+
+# 界面选项文本 -> 在控制域/SA标志中的位值
+DIRECTION_BITS = _label_bits(DIRECTION_LABELS, 7)
+PRM_BITS = _label_bits(PRM_LABELS, 6)
+SPLIT_BITS = _label_bits(SPLIT_LABELS, 5)
+SC_BITS = _label_bits(SC_LABELS, 4)
+FUNCTION_BITS = _label_bits(FUNCTION_LABELS, 0)
+ADDR_TYPE_BITS = _label_bits(ADDR_TYPE_LABELS, 6)
+
+
+def encode_control(direction, prm, function, split_frame, sc_flag):
+    """界面选项文本 -> 控制域字节，未知文本按0处理"""
+    return (DIRECTION_BITS.get(direction, 0) | PRM_BITS.get(prm, 0) | SPLIT_BITS.get(split_frame, 0)
+            | SC_BITS.get(sc_flag, 0) | FUNCTION_BITS.get(function, 0))
+
+
+def encode_sa_flag(addr_type, ext_logic, logic_addr, addr_len):
+    """
+    生成SA标志字节
+
+    Args:
+        addr_type: 地址类型选项文本或0~3
+        ext_logic: D5扩展逻辑地址标志(0/1)
+        logic_addr: D4逻辑地址(0/1)
+        addr_len: 地址字节数(1~16)
+    """
+    if isinstance(addr_type, str):
+        addr_type_bits = ADDR_TYPE_BITS[addr_type]
+    else:
+        addr_type_bits = (addr_type & 0x03) << 6
+    return addr_type_bits | ((ext_logic & 1) << 5) | ((logic_addr & 1) << 4) | ((addr_len - 1) & 0x0F)
@@ -1,36 +1,21 @@
-from ctypes import Structure, c_uint8
-from crcmod import predefined
+from . import axdr
+from .apdu import GET_RESPONSE, GET_RESPONSE_NEXT, GET_RESPONSE_NORMAL, GetResponse, format_csd
+from .checksum import crc16
+from .compact import (COMPACT_GET_RESPONSE, COMPACT_REQUEST_NAMES, COMPACT_SET_RESPONSE,
+                      decode_get_response, decode_set_response, is_compact_request)
+from .frame_spec import FrameSpec
+from .frame_store import FrameStore
+from .frame_view import FrameView
+from .header_tables import (ADDR_LEN_CODES, ADDR_TYPE_BITS, DIRECTION_BITS, FUNCTION_BITS, PRM_BITS, SPLIT_BITS,
+                            encode_control, encode_sa_flag)
+from .security import (SECURITY_REQUEST, SECURITY_RESPONSE, VERIFY_NAMES, VERIFY_RN, VERIFY_RN_MAC,
+                       VERIFY_SID, VERIFY_SID_MAC, SecurityError, decode_request, decode_response)
+from .split_frame import fragment_frame, fragment_link_data
 
-class ControlField(Structure):
-    """698.45协议控制域结构"""
-    _pack_ = 1
-    _fields_ = [
-        # 使用位域来定义每个标志位
-        ("func_code", c_uint8, 3),  # D2-D0: 功能码
-        ("reserved", c_uint8, 1),   # D3: 保留位
-        ("sc_flag", c_uint8, 1),    # D4: 数据域标志
-        ("split_frame", c_uint8, 1), # D5: 分帧标志
-        ("prm", c_uint8, 1),        # D6: 启动标志位
-        ("dir", c_uint8, 1),        # D7: 传输方向位
-    ]
-
-class SAFlagField(Structure):
-    """698.45协议SA标志字节结构"""
-    _pack_ = 1
-    _fields_ = [
-        ("addr_len", c_uint8, 4),      # D3-D0: 地址长度
-        ("logic_addr", c_uint8, 1),    # D4: 逻辑地址标志
-        ("ext_logic", c_uint8, 1),     # D5: 扩展逻辑地址标志
-        ("addr_type", c_uint8, 2),     # D7-D6: 地址类型
-    ]
-
-    # 添加地址长度映射
-    ADDR_LEN_MAP = {
-        '1字节(0)': 0x00,
-        '2字节(1)': 0x01,
-        '4字节(2)': 0x03,
-        '6字节(3)': 0x05  # 修正6字节的码
-    }
+CONNECT_RESPONSE = 0x82
+# CONNECT-Response中服务器接收帧最大尺寸(long-unsigned)的偏移：服务类型码(1) + PIID-ACD(1) + 厂商版本信息(32)
+# + 商定的应用层协议版本号(2) + 商定的协议一致性块(8) + 商定的功能一致性块(16) + 服务器发送帧最大尺寸(2)
+CONNECT_RECEIVE_SIZE_OFFSET = 62
 
 class Protocol698:
     # 功能码映射 (D2-D0)
@@ -227,11 +212,76 @@ class Protocol698:
         }
     }
     
+    # APDU服务类型码 -> 名称
+    SERVICE_NAMES = {
+        0x01: 'LINK-Request',
+        0x02: 'CONNECT-Request',
+        0x03: 'RELEASE-Request',
+        0x05: 'GET-Request',
+        0x06: 'SET-Request',
+        0x07: 'ACTION-Request',
+        0x08: 'REPORT-Response',
+        0x09: 'PROXY-Request',
+        0x10: 'SECURITY-Request',
+        0x81: 'LINK-Response',
+        0x82: 'CONNECT-Response',
+        0x83: 'RELEASE-Response',
+        0x84: 'RELEASE-Notification',
+        0x85: 'GET-Response',
+        0x86: 'SET-Response',
+        0x87: 'ACTION-Response',
+        0x88: 'REPORT-Notification',
+        0x89: 'PROXY-Response',
+        0x90: 'SECURITY-Response',
+        0xC5: 'COMPACT-GET-Response',
+        0xC6: 'COMPACT-SET-Response',
+        0xEE: 'ERROR-Response'
+    }
+    
+    # (服务类型码, 服务数据类型) -> PIID之后各字段的(名称, A-XDR解码种类)，GET-Response另见parse_get_response
+    APDU_LAYOUTS = {
+        (0x05, 0x01): (('OAD', axdr.OAD),),
+        (0x05, 0x02): (('OAD列表', axdr.SEQUENCE_OF + axdr.OAD),),
+        (0x05, 0x03): (('OAD', axdr.OAD), ('RSD', axdr.RSD), ('RCSD', axdr.RCSD)),
+        (0x05, 0x05): (('最近一次接收的分帧序号', axdr.LONG_UNSIGNED),),
+        (0x05, 0x06): (('OAD', axdr.OAD),),
+        (0x06, 0x01): (('OAD', axdr.OAD), ('数据', axdr.DATA)),
+        (0x07, 0x01): (('OMD', axdr.OMD), ('参数', axdr.DATA)),
+        (0x86, 0x01): (('OAD', axdr.OAD), ('DAR', axdr.ENUM)),
+        (0x87, 0x01): (('OMD', axdr.OMD), ('DAR', axdr.ENUM), ('返回数据', axdr.OPTIONAL_DATA))
+    }
+    
+    # 客户机发出的简化请求，服务类型码与GET-Response/SET-Response相同，见compact模块
+    COMPACT_LAYOUTS = {
+        (0x85, 0x01): (('OAD', axdr.OAD),),
+        (0x85, 0x02): (('OAD列表', axdr.SEQUENCE_OF + axdr.OAD),),
+        (0x86, 0x01): (('OAD', axdr.OAD), ('数据', axdr.DATA))
+    }
+    
+    # 帧模板缓存上限
+    TEMPLATE_CACHE_SIZE = 4096
+    
     def __init__(self):
-        self.frames = {}
-        # 使用预定义的X-25 CRC算法
-        self.crc16 = predefined.mkPredefinedCrcFun('x-25')
+        self.frame_store = FrameStore()  # 命名帧，相同帧字节只保存一份
+        self._templates = {}
         self.piid = 0  # 初始化PIID为0
+        self.max_frame_size = None  # 配置或协商的最大帧长（字节），None表示不限制
+    
+    def update_max_frame_size(self, apdu):
+        """
+        从CONNECT-Response中取服务器接收帧最大尺寸，与当前最大帧长取较小者
+        
+        Returns:
+            int: 更新后的最大帧长；apdu不是CONNECT-Response或尺寸为0时为None
+        """
+        offset = CONNECT_RECEIVE_SIZE_OFFSET
+        if not apdu or apdu[0] != CONNECT_RESPONSE or len(apdu) < offset + 2:
+            return None
+        size = int.from_bytes(apdu[offset:offset + 2], 'big')
+        if not size:
+            return None
+        self.max_frame_size = min(self.max_frame_size, size) if self.max_frame_size else size
+        return self.max_frame_size
     
     def get_next_piid(self):
         """获取下一个PIID值（0-63循环）"""
@@ -247,26 +297,7 @@ class Protocol698:
         split_frame: 分帧标志 ('不分帧(0)'/'分帧(1)')
         sc_flag: 数据域标志 ('无数据域(0)'/'有数据域(1)')
         """
-        control = ControlField()
-        
-        # 设置方向位 D7
-        control.dir = 1 if direction == '服务器发出(1)' else 0
-        
-        # 设置启动标志位 D6
-        control.prm = 1 if prm == '启动站(1)' else 0
-        
-        # 设置分帧标志 D5
-        control.split_frame = 1 if split_frame == '分帧(1)' else 0
-        
-        # 设置数据域标志 D4
-        control.sc_flag = 1 if sc_flag == '有数据域(1)' else 0
-        
-        # 设置功能码 D2-D0
-        func_name = function.split('(')[0]
-        control.func_code = self.FUNCTION_CODES.get(function, 0) & 0x07  # 确保只使用低3位
-        
-        # 将Structure转换为字节
-        return bytes(control)[0]  # 只需要第一个字节
+        return encode_control(direction, prm, function, split_frame, sc_flag)
     
     def create_sa_flag(self, addr_type, ext_logic_addr, logic_addr_flag, addr_len):
         """
@@ -276,22 +307,55 @@ class Protocol698:
         logic_addr_flag: 逻辑地址标志 ('无逻辑地址(0)'/'有逻辑地址(1)')
         addr_len: 地址长度 ('1字节(0)'等)
         """
-        sa_flag = SAFlagField()
-        
-        # 设置地址类型 D7-D6
-        sa_flag.addr_type = int(addr_type.split('(')[1].split(')')[0])
-        
-        # 设置扩展逻辑地址标志 D5
-        sa_flag.ext_logic = 1 if ext_logic_addr == '有扩展逻辑地址(1)' else 0
-        
-        # 设置逻辑地址标志 D4
-        sa_flag.logic_addr = 1 if logic_addr_flag == '有逻辑地址(1)' else 0
-        
-        # 设置地址长度 D3-D0
-        sa_flag.addr_len = SAFlagField.ADDR_LEN_MAP[addr_len]
-        
-        # 将Structure转换为字节
-        return bytes(sa_flag)[0]
+        return encode_sa_flag(addr_type,
+                              1 if ext_logic_addr == '有扩展逻辑地址(1)' else 0,
+                              1 if logic_addr_flag == '有逻辑地址(1)' else 0,
+                              ADDR_LEN_CODES[addr_len] + 1)
+    
+    def spec_from_ui(self, direction, prm, function, split_frame, addr_type, addr_len,
+                     sa_logic_value, bit5, logic_addr, comm_addr,
+                     service_type='', service_data_type=''):
+        """
+        界面选项文本 -> FrameSpec，参数含义与create_frame相同
+        bit5=0时sa_logic_value为SA标志D4（0或1），bit5=1时为扩展逻辑地址字节
+        """
+        service = None
+        choice = 0
+        if service_type:
+            service_info = self.APDU_SERVICES.get(service_type, {})
+            service = service_info.get('code', 0)
+            choice = service_info.get('data_types', {}).get(service_data_type, 0)
+        return FrameSpec(
+            address=comm_addr,
+            service=service,
+            choice=choice,
+            ca=int(logic_addr),
+            logic_addr=sa_logic_value & 0xFF if bit5 == 1 else sa_logic_value & 1,
+            ext_logic=bit5 == 1,
+            addr_len=int(addr_len),
+            direction=DIRECTION_BITS.get(direction, 0) >> 7,
+            prm=bool(PRM_BITS.get(prm, 0)),
+            split=bool(SPLIT_BITS.get(split_frame, 0)),
+            function=FUNCTION_BITS.get(function, 0),
+            addr_type=ADDR_TYPE_BITS[addr_type] >> 6 if isinstance(addr_type, str) else addr_type
+        )
+
+    def create_template(self, *args):
+        """
+        编译帧模板（控制域、SA标志、SA地址、CA和服务类型）
+        参数同spec_from_ui，返回的模板可重复用于生成不同PIID/OAD/数据的帧
+        """
+        return self.spec_from_ui(*args).template()
+    
+    def get_template(self, *args):
+        """按create_template参数获取缓存的帧模板"""
+        template = self._templates.get(args)
+        if template is None:
+            if len(self._templates) >= self.TEMPLATE_CACHE_SIZE:
+                self._templates.clear()
+            template = self.create_template(*args)
+            self._templates[args] = template
+        return template
     
     def create_frame(self, direction, prm, function, split_frame, addr_type, addr_len,
                     sa_logic_value, bit5, logic_addr, comm_addr,
@@ -302,303 +366,104 @@ class Protocol698:
         sa_logic_value: SA逻辑地址值（0, 1, 或 2-255）
         bit5: 扩展逻辑地址标志（0或1）
         """
-        frame = []
-        
-        # 1. 帧起始符
-        frame.append(0x68)
-        
-        # 2. 长度域（临时占位，后面计算）
-        frame.extend([0x00, 0x00])
-        
-        # 3. 控制域
-        control = ControlField()
-        if direction == '服务器发出(1)':
-            control.dir = 1
-        if prm == '启动站(1)':
-            control.prm = 1
-        if split_frame == '分帧(1)':
-            control.split_frame = 1
-        # 如果有服务类型，说明有数据域
-        if service_type:
-            control.sc_flag = 1
-        control.func_code = self.FUNCTION_CODES.get(function, 0) & 0x07
-        frame.append(bytes(control)[0])
-        
-        # 4. SA标志字节
-        # 根据协议：bit5=扩展逻辑地址标志，bit4根据sa_logic_value确定
-        sa_flag = SAFlagField()
-        sa_flag.addr_type = int(addr_type.split('(')[1].split(')')[0])
-        sa_flag.ext_logic = bit5
-        
-        # bit4的值根据SA逻辑地址确定
-        if bit5 == 0:
-            # bit5=0时，bit4表示逻辑地址0或1
-            sa_flag.logic_addr = sa_logic_value  # 0或1
-        else:
-            # bit5=1时，bit4备用
-            sa_flag.logic_addr = 0
-        
-        sa_flag.addr_len = self.ADDR_LEN_REVERSE_MAP[int(addr_len)]
-        frame.append(bytes(sa_flag)[0])
-        
-        # 5. 扩展逻辑地址（如果bit5=1）
-        # 根据698.45协议：扩展逻辑地址是固定1字节长度，值为sa_logic_value（2-255）
-        ext_logic_content_len = 0
-        if bit5 == 1:
-            ext_logic_content_len = 1
-            frame.append(sa_logic_value & 0xFF)  # 写入扩展逻辑地址值
-        
-        # 6. SA地址（低字节在前）
-        # 注意：SA地址长度 = addr_len(总长度) - ext_logic_content_len(扩展逻辑地址长度)
-        sa_comm_addr_len = int(addr_len) - ext_logic_content_len
-        comm_addr_hex = comm_addr.replace(' ', '').replace('\t', '')
-        sa_bytes = bytes.fromhex(comm_addr_hex.zfill(sa_comm_addr_len*2))
-        frame.extend(list(reversed(sa_bytes)))
-        
-        # 7. CA客户机地址
-        ca_int = int(logic_addr)
-        frame.append(ca_int & 0xFF)
-        
-        # 8. HCS帧头校验（占位，后面计算）
-        hcs_pos = len(frame)
-        frame.extend([0x00, 0x00])
-        
-        # 9. APDU（如果有服务类型）
-        if service_type:
-            service_info = self.APDU_SERVICES.get(service_type, {})
-            service_code = service_info.get('code', 0)
-            data_type_code = service_info.get('data_types', {}).get(service_data_type, 0)
-            
-            frame.append(service_code)  # 服务类型码
-            frame.append(data_type_code)  # 数据类型码
-            
-            # PIID
-            piid = (int(service_priority) << 6) | (service_number & 0x3F)
-            frame.append(piid)
-            
-            # OAD
-            oad_bytes = bytes.fromhex(oad)
-            frame.extend(oad_bytes)
-            
-            # 自定义数据
-            if custom_data:
-                try:
-                    custom_bytes = bytes.fromhex(custom_data)
-                    frame.extend(custom_bytes)
-                except ValueError as e:
-                    print(f"自定义报文格式错误: {e}")
-        
-        # 10. 时间标签
-        frame.append(0x00)
-        
-        # 11. FCS帧校验（占位，后面计算）
-        fcs_pos = len(frame)
-        frame.extend([0x00, 0x00])
-        
-        # 12. 帧结束符
-        frame.append(0x16)
-        
-        # 13. 计算并更新长度域
-        # 根据DL/T 698.45协议：长度域 = 长度域自身(2) + 控制域到FCS(包含)的字节数
-        length = fcs_pos + 1  # fcs_pos是FCS开始位置，+1是加上长度域本身（已减去起始符）
-        frame[1] = length & 0xFF
-        frame[2] = (length >> 8) & 0xFF
-        
-        # 14. 计算并更新HCS
-        # HCS范围：从长度域到CA（包含长度域，不包含HCS自身）
-        # 长度域在frame[1]，CA在hcs_pos-1
-        hcs_data = bytes(frame[1:hcs_pos])
-        hcs = self.crc16(hcs_data)
-        frame[hcs_pos] = hcs & 0xFF
-        frame[hcs_pos + 1] = (hcs >> 8) & 0xFF
+        template, user_data = self.build_user_data(direction, prm, function, split_frame, addr_type, addr_len,
+                                                   sa_logic_value, bit5, logic_addr, comm_addr,
+                                                   service_type, service_data_type, service_priority,
+                                                   service_number, oad, custom_data)
+        return template.render_user_data(user_data)
+    
+    def create_frames(self, *args, max_frame_size=None):
+        """
+        创建698.45协议帧，链路用户数据超过最大帧长时拆成分帧
+        参数同create_frame；max_frame_size默认使用协商的self.max_frame_size
         
-        # 15. 计算并更新FCS（必须在HCS填充之后）
-        # FCS范围：从长度域到时间标签（包含长度域和HCS，不包含FCS自身）
-        # 长度域在frame[1]，时间标签在fcs_pos-1
-        fcs_data = bytes(frame[1:fcs_pos])
-        fcs = self.crc16(fcs_data)
-        frame[fcs_pos] = fcs & 0xFF
-        frame[fcs_pos + 1] = (fcs >> 8) & 0xFF
+        Returns:
+            list: 帧字节列表，分帧时第i帧的帧序号为i
+        """
+        template, user_data = self.build_user_data(*args)
+        max_frame_size = max_frame_size or self.max_frame_size
+        if not max_frame_size:
+            return [template.render_user_data(user_data)]
+        return fragment_link_data(template, user_data, max_frame_size)
+    
+    def build_user_data(self, direction, prm, function, split_frame, addr_type, addr_len,
+                        sa_logic_value, bit5, logic_addr, comm_addr,
+                        service_type, service_data_type, service_priority, service_number, oad,
+                        custom_data=''):
+        """
+        按create_frame参数生成帧模板和链路用户数据
         
-        return bytes(frame)
+        Returns:
+            tuple: (FrameTemplate, 链路用户数据)
+        """
+        template = self.get_template(direction, prm, function, split_frame, addr_type, addr_len,
+                                     sa_logic_value, bit5, logic_addr, comm_addr,
+                                     service_type, service_data_type)
+        if not service_type:
+            return template, template.user_data(0)
+        
+        # PIID
+        piid = (int(service_priority) << 6) | (service_number & 0x3F)
+        
+        # 自定义数据
+        data = b''
+        if custom_data:
+            try:
+                data = bytes.fromhex(custom_data)
+            except ValueError as e:
+                print(f"自定义报文格式错误: {e}")
+        
+        return template, template.user_data(piid, bytes.fromhex(oad), data)
     
     def save_frame(self, name, frame):
-        """保存命名帧"""
-        self.frames[name] = frame
+        """保存命名帧，返回帧哈希"""
+        return self.frame_store.bind(name, frame)
         
     def get_frame(self, name):
         """获取已保存的帧"""
-        return self.frames.get(name)
+        return self.frame_store.frame_for(name)
+    
+    def remove_frame(self, name):
+        """删除命名帧"""
+        self.frame_store.unbind(name)
+    
+    def rename_frame(self, old_name, new_name):
+        """命名帧改名，原名称不存在时返回False"""
+        return self.frame_store.rename(old_name, new_name)
+    
+    def frame_fragments(self, name, max_frame_size):
+        """
+        命名帧按最大帧长拆成的分帧列表，同一帧内容只拆分一次
+        
+        Returns:
+            list: 分帧列表；帧不存在时为None
+        """
+        key = self.frame_store.key_for(name)
+        if key is None:
+            return None
+        view = self.frame_store.view(key)
+        return self.frame_store.metadata(key, ('fragments', max_frame_size),
+                                         lambda frame: fragment_frame(view, max_frame_size))
+    
+    def view_frame(self, frame_bytes):
+        """
+        返回帧的惰性视图，只读取需要的字段时使用（如按服务类型、校验结果分类）
+        """
+        return FrameView(frame_bytes)
     
     def parse_frame(self, frame_bytes):
         """
         解析698.45协议帧
         返回解析结果字典
         """
-        try:
-            if not frame_bytes or len(frame_bytes) < 10:
-                return {'error': '帧长度不足'}
-
-            for byte in frame_bytes:
-                if byte == 0xfe:
-                    frame_bytes = frame_bytes[1:]
-                else:
-                    break
-            
-            print(frame_bytes.hex(' '))
-            
-            result = {}
-            
-            idx = 0
-            
-            # 1. 起始符 (0x68)
-            if frame_bytes[idx] != 0x68:
-                return {'error': f'起始符错误: {frame_bytes[idx]:02X}'}
-            result['起始符'] = '68'
-            idx += 1
-            
-            # 2. 长度域 (2字节，小端)
-            length = frame_bytes[idx] | (frame_bytes[idx+1] << 8)
-            result['长度域'] = f'{length} ({length:04X}H)'
-            idx += 2
-            
-            # 3. 控制域 (1字节)
-            control = frame_bytes[idx]
-            result['控制域'] = {
-                '原始值': f'{control:02X}H',
-                'D7-传输方向': '服务器发出' if (control & 0x80) else '客户机发出',
-                'D6-启动标志': '启动站' if (control & 0x40) else '从动站',
-                'D5-分帧标志': '分帧' if (control & 0x20) else '不分帧',
-                'D4-数据域标志': '有数据域' if (control & 0x10) else '无数据域',
-                'D2-D0-功能码': control & 0x07
-            }
-            idx += 1
-            
-            # 4. SA标志 (1字节)
-            sa_flag = frame_bytes[idx]
-            addr_type_code = (sa_flag >> 6) & 0x03
-            addr_type_map = {0: '单地址', 1: '通配地址', 2: '组地址', 3: '广播地址'}
-            addr_len_code = sa_flag & 0x0F
-            addr_len = self.ADDR_LEN_MAP.get(addr_len_code, 1)
-            
-            result['SA标志'] = {
-                '原始值': f'{sa_flag:02X}H',
-                'D7-D6-地址类型': addr_type_map.get(addr_type_code, '未知'),
-                'D5-扩展逻辑地址': '有' if (sa_flag & 0x20) else '无',
-                'D4-逻辑地址标志': '有' if (sa_flag & 0x10) else '无',
-                'D3-D0-地址长度': f'{addr_len}字节 ({addr_len_code})'
-            }
-            idx += 1
-            
-            # 5. SA逻辑地址 (如果有)
-            if sa_flag & 0x10:  # 有逻辑地址
-                sa_logic = frame_bytes[idx]
-                result['SA逻辑地址'] = f'{sa_logic:02X}H'
-                idx += 1
-            
-            # 5.5 扩展逻辑地址 (如果有)
-            # 根据698.45协议：扩展逻辑地址是固定1字节长度，无需长度字段
-            ext_logic_content_len = 0
-            if sa_flag & 0x20:  # 有扩展逻辑地址
-                if idx < len(frame_bytes):
-                    ext_logic_byte = frame_bytes[idx]
-                    ext_logic_content_len = 1  # 固定1字节
-                    result['扩展逻辑地址'] = f'{ext_logic_byte:02X}H'
-                    idx += 1
-                else:
-                    result['扩展逻辑地址'] = '错误：缺少扩展逻辑地址字节'
-            
-            # 6. SA地址 (实际长度 = addr_len - ext_logic_content_len, 小端)
-            sa_actual_len = addr_len - ext_logic_content_len
-            sa_addr_bytes = frame_bytes[idx:idx+sa_actual_len]
-            sa_addr = ''.join(f'{b:02X}' for b in reversed(sa_addr_bytes))
-            result['SA地址'] = {
-                '原始值': sa_addr,
-                '长度': sa_actual_len,
-                '地址类型': addr_type_map.get(addr_type_code, '未知')
-            }
-            idx += sa_actual_len
-            
-            # 7. CA客户机地址 (1字节)
-            ca = frame_bytes[idx]
-            result['CA客户机地址'] = {
-                '原始值': f'{ca:02X}H',
-                '十进制': ca
-            }
-            idx += 1
-            
-            # 8. HCS帧头校验 (2字节)
-            hcs_pos = idx
-            hcs = frame_bytes[idx] | (frame_bytes[idx+1] << 8)
-            
-            # 计算HCS校验值：从长度域到CA（包含长度域，不包含HCS自身）
-            hcs_data = bytes(frame_bytes[1:hcs_pos])
-            calculated_hcs = self.crc16(hcs_data)
-            
-            result['HCS帧头校验'] = {
-                '原始值': f'{hcs:04X}H',
-                '计算值': f'{calculated_hcs:04X}H',
-                '校验结果': '通过' if hcs == calculated_hcs else '失败'
-            }
-            idx += 2
-            
-            # 9. 应用层链路用户数据 (如果有数据域)
-            if control & 0xff:
-                # 计算应用层链路用户数据长度
-                # 从当前位置到帧结束（不包括时间标签、FCS和结束符）
-                remaining_bytes = len(frame_bytes) - idx - 4  # 减去时间标签(1) + FCS(2) + 结束符(1)
-                user_data_len = remaining_bytes
-                
-                if user_data_len > 0 and idx + user_data_len <= len(frame_bytes):
-                    user_data = frame_bytes[idx:idx+user_data_len]
-                    print(f"应用层链路用户数据原始值: {user_data.hex()}")
-                    result['应用层链路用户数据'] = {
-                        '原始值': user_data.hex(),
-                        '长度': user_data_len
-                    }
-                    idx += user_data_len
-                    
-                    # 尝试解析用户数据
-                    user_data_info = self.parse_user_data(user_data)
-                    if user_data_info:
-                        result['用户数据解析'] = user_data_info
-            
-            # 10. 时间标签 (1字节)
-            if idx < len(frame_bytes) - 3:
-                time_tag = frame_bytes[idx]
-                result['时间标签'] = f'{time_tag:02X}H'
-                idx += 1
-            
-            # 11. FCS校验 (2字节)
-            if idx + 2 < len(frame_bytes):
-                fcs = frame_bytes[idx] | (frame_bytes[idx+1] << 8)
-                
-                # 计算FCS校验值：从长度域到时间标签（包含长度域和HCS，不包含FCS自身）
-                fcs_data = bytes(frame_bytes[1:idx])
-                calculated_fcs = self.crc16(fcs_data)
-                
-                result['FCS校验'] = {
-                    '原始值': f'{fcs:04X}H',
-                    '计算值': f'{calculated_fcs:04X}H',
-                    '校验结果': '通过' if fcs == calculated_fcs else '失败'
-                }
-                idx += 2
-            
-            # 12. 结束符 (0x16)
-            if idx < len(frame_bytes):
-                end_mark = frame_bytes[idx]
-                result['结束符'] = f'{end_mark:02X}H'
-                if end_mark != 0x16:
-                    result['warning'] = f'结束符应为16H，实际为{end_mark:02X}H'
-            
-            return result
-            
-        except Exception as e:
-            return {'error': f'解析错误: {str(e)}'}
+        view = FrameView(frame_bytes)
+        if view.control & 0x80:
+            return view.to_dict(self.parse_user_data)
+        return view.to_dict(lambda user_data: self.parse_user_data(user_data, from_server=False))
     
     def crc16(self, data):
         """
-        计算CRC16校验值 (CRC-CCITT)
+        计算CRC16校验值 (CRC-16/X-25)
         
         Args:
             data: 要计算的数据字节
@@ -606,22 +471,15 @@ class Protocol698:
         Returns:
             int: CRC16校验值
         """
-        crc = 0xFFFF
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x0001:
-                    crc = (crc >> 1) ^ 0x8408
-                else:
-                    crc >>= 1
-        return crc
+        return crc16(data)
     
-    def parse_user_data(self, user_data):
+    def parse_user_data(self, user_data, from_server=True):
         """
         解析应用层链路用户数据
         
         Args:
             user_data: 应用层链路用户数据
+            from_server: 是否为服务器发出（客户机发出的85H/86H为简化请求）
             
         Returns:
             dict: 解析结果
@@ -629,98 +487,202 @@ class Protocol698:
         if len(user_data) < 1:
             return {'error': '应用层链路用户数据长度不足'}
         
-        result = {}
-        idx = 0
-        
-        # 控制域 (1字节)
-        if idx < len(user_data):
-            control = user_data[idx]
-            idx += 1
-            
-            result['控制域'] = {
-                '原始值': f'{control:02X}',
-                'DIR': '主站->从站' if (control & 0x80) == 0 else '从站->主站',
-                'PRM': '启动帧' if (control & 0x40) != 0 else '确认帧',
-                'FCB': '帧计数位有效' if (control & 0x20) != 0 else '帧计数位无效',
-                'FCV': '帧计数有效' if (control & 0x10) != 0 else '帧计数无效',
-                '功能码': control & 0x0F
+        result = {
+            '链路用户数据': {
+                '数据长度': len(user_data),
+                '数据内容': bytes(user_data).hex()
             }
-        
-        # 链路用户数据
-        if idx < len(user_data):
-            # 剩余数据即为链路用户数据
-            remaining_data = user_data[idx:]
-            
-            if len(remaining_data) > 0:
-                # 检查第一个字节是否为长度字段（常见模式）
-                data_length = remaining_data[0]
-                
-                # 如果剩余数据长度与声明的长度匹配，按长度解析
-                if len(remaining_data) >= 1 + data_length:
-                    data_content = remaining_data[1:1+data_length]
-                    
-                    result['链路用户数据'] = {
-                        '数据长度': data_length,
-                        '数据内容': data_content.hex()
-                    }
-                    
-                    # 尝试解析数据内容
-                    if data_length >= 4:
-                        # 可能是APDU结构
-                        apdu_info = self.parse_apdu(data_content)
-                        if apdu_info:
-                            result['APDU解析'] = apdu_info
-                else:
-                    # 无法按长度解析，直接显示全部数据
-                    result['链路用户数据'] = {
-                        '数据长度': len(remaining_data),
-                        '数据内容': remaining_data.hex()
-                    }
-                    
-                    # 尝试将整个数据作为APDU解析
-                    if len(remaining_data) >= 4:
-                        apdu_info = self.parse_apdu(remaining_data)
-                        if apdu_info:
-                            result['APDU解析'] = apdu_info
-        
+        }
+        apdu_info = self.parse_apdu(user_data, from_server)
+        if apdu_info:
+            result['APDU解析'] = apdu_info
         return result
     
-    def parse_apdu(self, apdu_data):
+    def parse_apdu(self, apdu_data, from_server=True):
         """
-        解析APDU数据
+        解析APDU数据，服务数据按APDU_LAYOUTS逐字段进行A-XDR解码
         
         Args:
             apdu_data: APDU数据
+            from_server: 是否为服务器发出（客户机发出的85H/86H为简化请求）
             
         Returns:
             dict: 解析结果
         """
-        if len(apdu_data) < 4:
+        if len(apdu_data) < 1:
             return None
-            
+        
         result = {}
-        idx = 0
+        service_code = apdu_data[0]
+        compact_request = not from_server and is_compact_request(0, service_code)
+        if compact_request:
+            service_name = COMPACT_REQUEST_NAMES[service_code]
+        else:
+            service_name = self.SERVICE_NAMES.get(service_code, '未知服务')
+        result['服务类型'] = f'{service_code:02X}H {service_name}'
+        if service_code in (SECURITY_REQUEST, SECURITY_RESPONSE):
+            return self.parse_security(apdu_data, result)
+        if len(apdu_data) < 3:
+            if len(apdu_data) > 1:
+                result['服务数据'] = bytes(apdu_data[1:]).hex()
+            return result
+        
+        choice = apdu_data[1]
+        result['服务数据类型'] = choice
+        result['PIID-ACD' if service_code & 0x80 and not compact_request else 'PIID'] = f'{apdu_data[2]:02X}H'
+        
+        if compact_request:
+            layout = self.COMPACT_LAYOUTS.get((service_code, choice), ())
+        elif service_code == GET_RESPONSE:
+            return self.parse_get_response(apdu_data, result)
+        elif service_code in (COMPACT_GET_RESPONSE, COMPACT_SET_RESPONSE):
+            return self.parse_compact_response(apdu_data, result)
+        else:
+            layout = self.APDU_LAYOUTS.get((service_code, choice), ())
         
-        # 服务类型 (1字节)
-        service_type = apdu_data[idx]
-        idx += 1
-        result['服务类型'] = f'{service_type:02X}'
+        idx = 3
+        try:
+            for field_name, kind in layout:
+                value, idx = axdr.decode(apdu_data, idx, kind)
+                if kind == axdr.GET_RESULT:
+                    if value[0] == 0:
+                        result['结果'] = f'失败 DAR={value[1]}'
+                    else:
+                        result['结果'] = '成功'
+                        result['数据'] = axdr.format_value(value[1])
+                elif kind in (axdr.OAD, axdr.OMD):
+                    result[field_name] = f'{value:08X}'
+                elif kind == axdr.SEQUENCE_OF + axdr.OAD:
+                    result[field_name] = [f'{oad:08X}' for oad in value]
+                elif value is not None:
+                    result[field_name] = axdr.format_value(value)
+        except axdr.AXDRDecodeError as e:
+            result['error'] = f'数据解码错误: {e}'
         
-        # 服务属性 (1字节)
         if idx < len(apdu_data):
-            service_attr = apdu_data[idx]
-            idx += 1
-            result['服务属性'] = f'{service_attr:02X}'
+            result['剩余数据'] = bytes(apdu_data[idx:]).hex()
+        return result
+    
+    def parse_compact_response(self, apdu_data, result):
+        """
+        解析COMPACT-GET/SET-Response，结果按请求的OAD顺序排列，不回送OAD
         
-        # 数据长度 (2字节，小端序)
-        if idx + 1 < len(apdu_data):
-            data_length = apdu_data[idx] | (apdu_data[idx+1] << 8)
-            idx += 2
-            result['数据长度'] = data_length
+        Args:
+            apdu_data: APDU数据
+            result: 已包含服务类型、PIID-ACD的解析结果
             
-            # 数据内容
-            if idx + data_length <= len(apdu_data):
-                data_content = apdu_data[idx:idx+data_length]
-                result['数据内容'] = data_content.hex()
+        Returns:
+            dict: 解析结果
+        """
+        try:
+            entries = []
+            if apdu_data[0] == COMPACT_GET_RESPONSE:
+                items, end = decode_get_response(apdu_data)
+                for item in items:
+                    if item.ok:
+                        entries.append({'结果': '成功', '数据': axdr.format_value(item.data)})
+                    else:
+                        entries.append({'结果': f'失败 DAR={item.dar}'})
+            else:
+                dars, end = decode_set_response(apdu_data)
+                for dar in dars:
+                    entries.append({'结果': '成功' if dar == 0 else f'失败 DAR={dar}'})
+        except axdr.AXDRDecodeError as e:
+            result['error'] = f'数据解码错误: {e}'
+            return result
+        
+        if apdu_data[1] == 1 and entries:
+            result.update(entries[0])
+        else:
+            result['结果列表'] = entries
+        if end < len(apdu_data):
+            result['剩余数据'] = bytes(apdu_data[end:]).hex()
+        return result
+    
+    def parse_security(self, apdu_data, result):
+        """
+        解析SECURITY-Request/Response，明文应用数据单元继续按APDU解析
         
+        Args:
+            apdu_data: APDU数据
+            result: 已包含服务类型的解析结果
+            
+        Returns:
+            dict: 解析结果
+        """
+        try:
+            if apdu_data[0] == SECURITY_REQUEST:
+                security, end = decode_request(apdu_data)
+                result['数据验证信息'] = VERIFY_NAMES[security.verify_choice]
+                choice, verify = security.verify_choice, security.verify
+                if choice in (VERIFY_SID_MAC, VERIFY_SID):
+                    sid = verify[0] if choice == VERIFY_SID_MAC else verify
+                    result['SID'] = f'{sid[0]:08X} {sid[1].hex()}'.rstrip()
+                if choice in (VERIFY_RN, VERIFY_RN_MAC):
+                    result['RN'] = (verify[0] if choice == VERIFY_RN_MAC else verify).hex()
+                if choice in (VERIFY_SID_MAC, VERIFY_RN_MAC):
+                    result['MAC'] = verify[1].hex()
+            else:
+                security, end = decode_response(apdu_data)
+                if security.dar is not None:
+                    result['结果'] = f'异常 DAR={security.dar}'
+                if security.mac is not None:
+                    result['MAC'] = security.mac.hex()
+        except SecurityError as e:
+            result['error'] = f'安全传输解码错误: {e}'
+            return result
+        
+        if security.data is not None:
+            if security.ciphered:
+                result['应用数据单元'] = '密文'
+                result['密文'] = security.data.hex()
+            else:
+                result['应用数据单元'] = '明文'
+                result['明文APDU解析'] = self.parse_apdu(security.data, apdu_data[0] == SECURITY_RESPONSE)
+        if end < len(apdu_data):
+            result['剩余数据'] = bytes(apdu_data[end:]).hex()
+        return result
+    
+    def parse_get_response(self, apdu_data, result):
+        """
+        解析GET-Response各种形式，结果逐个解码
+        
+        Args:
+            apdu_data: APDU数据
+            result: 已包含服务类型、PIID-ACD的解析结果
+            
+        Returns:
+            dict: 解析结果
+        """
+        try:
+            response = GetResponse(apdu_data)
+            result['响应类型'] = response.name
+            if response.choice == GET_RESPONSE_NEXT:
+                result['末帧标志'] = '是' if response.last_frame else '否'
+                result['分帧序号'] = response.sequence
+                if response.dar is not None:
+                    result['结果'] = f'失败 DAR={response.dar}'
+            
+            entries = []
+            for item in response:
+                entry = {'OAD': f'{item.oad:08X}'}
+                if not item.ok:
+                    entry['结果'] = f'失败 DAR={item.dar}'
+                elif item.rcsd is not None:
+                    entry['结果'] = '成功'
+                    entry['列'] = [format_csd(csd) for csd in item.rcsd]
+                    entry['记录'] = [axdr.format_value(row) for row in item.data]
+                else:
+                    entry['结果'] = '成功'
+                    entry['数据'] = axdr.format_value(item.data)
+                entries.append(entry)
+            
+            if response.choice == GET_RESPONSE_NORMAL or (len(entries) == 1 and response.choice != GET_RESPONSE_NEXT):
+                result.update(entries[0])
+            elif entries:
+                result['结果列表'] = entries
+            if response.end < len(apdu_data):
+                result['剩余数据'] = bytes(apdu_data[response.end:]).hex()
+        except axdr.AXDRDecodeError as e:
+            result['error'] = f'数据解码错误: {e}'
         return result
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+接收重组用的预分配环形缓冲区
+容量为2的幂，写入、查找、丢弃只移动读写位置；按逻辑区间取出的数据为指向缓冲区的memoryview（至多两段），
+取出完整帧时只复制一次。缓冲区只在单次待处理数据超过容量时倍增，稳定运行时内存不变
+"""
+
+DEFAULT_CAPACITY = 4096
+
+
+class RingBuffer:
+    """
+    字节环形缓冲区，下标均为相对读位置的逻辑偏移
+
+    Args:
+        capacity: 初始容量（向上取整为2的幂）
+    """
+
+    __slots__ = ('_buf', '_mv', '_mask', '_head', '_size')
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self._allocate(capacity)
+        self._head = 0
+        self._size = 0
+
+    def _allocate(self, capacity):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._buf = bytearray(size)
+        self._mv = memoryview(self._buf)
+        self._mask = size - 1
+
+    @property
+    def capacity(self):
+        return self._mask + 1
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._size:
+            raise IndexError('环形缓冲区下标越界')
+        return self._buf[(self._head + index) & self._mask]
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+    def _grow(self, needed):
+        """扩容到至少needed字节，已有数据移到新缓冲区开头"""
+        data = b''.join(self.views(0, self._size))
+        self._allocate(needed)
+        self._buf[:len(data)] = data
+        self._head = 0
+
+    def write(self, data):
+        """追加数据，空间不足时扩容"""
+        count = len(data)
+        if not count:
+            return
+        if self._size + count > self.capacity:
+            self._grow(self._size + count)
+        capacity = self.capacity
+        tail = (self._head + self._size) & self._mask
+        first = min(count, capacity - tail)
+        data = memoryview(data)
+        self._mv[tail:tail + first] = data[:first]
+        if first < count:
+            self._mv[:count - first] = data[first:]
+        self._size += count
+
+    def _segments(self, start, end):
+        """逻辑区间 -> 缓冲区中至多两段物理区间[(起, 止), ...]"""
+        capacity = self.capacity
+        begin = self._head + start
+        stop = self._head + end
+        if stop <= capacity:
+            return ((begin, stop),)
+        if begin >= capacity:
+            return ((begin - capacity, stop - capacity),)
+        return ((begin, capacity), (0, stop - capacity))
+
+    def views(self, start, end):
+        """逻辑区间[start, end)的memoryview列表（零拷贝，缓冲区再次写入前有效）"""
+        end = min(end, self._size)
+        if start >= end:
+            return []
+        return [self._mv[begin:stop] for begin, stop in self._segments(start, end)]
+
+    def find(self, value, start=0):
+        """从逻辑偏移start起查找字节值，返回逻辑偏移，未找到为-1"""
+        if start >= self._size:
+            return -1
+        for begin, stop in self._segments(start, self._size):
+            position = self._buf.find(value, begin, stop)
+            if position >= 0:
+                return (position - self._head) & self._mask
+        return -1
+
+    def count(self, value, start=0, end=None):
+        """逻辑区间[start, end)中字节值出现的次数"""
+        end = self._size if end is None else min(end, self._size)
+        if start >= end:
+            return 0
+        return sum(self._buf.count(value, begin, stop) for begin, stop in self._segments(start, end))
+
+    def consume(self, count):
+        """丢弃开头count字节"""
+        count = min(count, self._size)
+        self._size -= count
+        self._head = 0 if not self._size else (self._head + count) & self._mask
+
+    def read(self, count):
+        """取出开头count字节（复制一次）"""
+        views = self.views(0, count)
+        data = bytes(views[0]) if len(views) == 1 else b''.join(views)
+        self.consume(count)
+        return data
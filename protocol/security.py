@@ -0,0 +1,444 @@
+"""
+698.45安全传输
+SECURITY-Request(10H) / SECURITY-Response(90H) 把任意APDU包装为明文或密文应用数据单元，
+并附带数据验证信息：
+
+SECURITY-Request ::= SEQUENCE {
+    应用数据单元 CHOICE { 明文 [0] octet-string, 密文 [1] octet-string },
+    数据验证信息 CHOICE { SID_MAC [0], RN [1], RN_MAC [2], SID [3] }
+}
+SECURITY-Response ::= SEQUENCE {
+    应用数据单元 CHOICE { 明文 [0] octet-string, 密文 [1] octet-string, 异常错误 [2] DAR },
+    数据验证信息 CHOICE { 数据MAC [0] MAC } OPTIONAL
+}
+
+加解密和MAC计算由可替换的密码后端完成（真实设备为ESAM，SoftwareESAM为测试用软件替身）；
+SecureChannel按表地址缓存会话密钥和计数器，连续的安全读取不必重复协商
+"""
+
+import hashlib
+import hmac
+import os
+import time
+from collections import OrderedDict, namedtuple
+
+from . import axdr
+
+SECURITY_REQUEST = 0x10
+SECURITY_RESPONSE = 0x90
+
+# 应用数据单元
+APP_PLAIN = 0
+APP_CIPHER = 1
+APP_ERROR = 2
+
+# 请求的数据验证信息
+VERIFY_SID_MAC = 0
+VERIFY_RN = 1
+VERIFY_RN_MAC = 2
+VERIFY_SID = 3
+
+VERIFY_NAMES = {
+    VERIFY_SID_MAC: 'SID_MAC',
+    VERIFY_RN: 'RN',
+    VERIFY_RN_MAC: 'RN_MAC',
+    VERIFY_SID: 'SID',
+}
+
+# 安全传输模式: 明文+随机数（响应明文+MAC）、明文+MAC、密文+MAC
+MODE_PLAIN_RN = 'plain_rn'
+MODE_PLAIN_MAC = 'plain_mac'
+MODE_CIPHER = 'cipher'
+
+RN_SIZE = 16
+COUNTER_MASK = 0xFFFFFFFF
+
+# 服务器端异常DAR：ESAM验证失败、安全认证不匹配、其它
+DAR_ESAM_FAILED = 22
+DAR_SECURITY_MISMATCH = 20
+DAR_OTHER = 255
+
+# 默认同时缓存的会话数、会话有效期(秒)
+DEFAULT_MAX_SESSIONS = 64
+DEFAULT_SESSION_LIFETIME = 3600.0
+
+
+class SecurityError(ValueError):
+    """安全传输错误（格式错误、MAC校验失败、服务器返回异常DAR等）"""
+
+
+class SecurityRequest(namedtuple('SecurityRequest', 'ciphered data verify_choice verify')):
+    """
+    SECURITY-Request
+
+    ciphered: 应用数据单元是否为密文
+    data: 明文APDU或密文
+    verify_choice: 数据验证信息选择（VERIFY_SID_MAC等）
+    verify: SID_MAC为((标识, 附加数据), MAC)；RN为随机数；RN_MAC为(随机数, MAC)；SID为(标识, 附加数据)
+    """
+    __slots__ = ()
+
+
+class SecurityResponse(namedtuple('SecurityResponse', 'ciphered data dar mac')):
+    """
+    SECURITY-Response
+
+    ciphered: 应用数据单元是否为密文
+    data: 明文APDU或密文，异常时为None
+    dar: 异常错误的DAR，正常时为None
+    mac: 数据MAC，没有时为None
+    """
+    __slots__ = ()
+
+
+def _encode_rn_mac(out, value):
+    rn, mac = value
+    axdr.encode_value(out, axdr.RN, rn)
+    axdr.encode_value(out, axdr.MAC, mac)
+
+
+def _decode_rn_mac(buf, pos):
+    rn, pos = axdr.decode(buf, pos, axdr.RN)
+    mac, pos = axdr.decode(buf, pos, axdr.MAC)
+    return (rn, mac), pos
+
+
+def encode_request(data, verify_choice, verify, ciphered=False):
+    """生成SECURITY-Request APDU"""
+    out = bytearray((SECURITY_REQUEST, APP_CIPHER if ciphered else APP_PLAIN))
+    axdr.encode_value(out, axdr.OCTET_STRING, data)
+    out.append(verify_choice)
+    if verify_choice == VERIFY_SID_MAC:
+        axdr.encode_value(out, axdr.SID_MAC, verify)
+    elif verify_choice == VERIFY_RN:
+        axdr.encode_value(out, axdr.RN, verify)
+    elif verify_choice == VERIFY_RN_MAC:
+        _encode_rn_mac(out, verify)
+    elif verify_choice == VERIFY_SID:
+        axdr.encode_value(out, axdr.SID, verify)
+    else:
+        raise SecurityError(f'数据验证信息选择{verify_choice}无效')
+    return bytes(out)
+
+
+def decode_request(apdu):
+    """
+    解析SECURITY-Request APDU
+
+    Returns:
+        tuple: (SecurityRequest, 结束偏移)
+    """
+    try:
+        if apdu[0] != SECURITY_REQUEST:
+            raise SecurityError(f'服务类型{apdu[0]:02X}H不是SECURITY-Request')
+        choice = apdu[1]
+        if choice not in (APP_PLAIN, APP_CIPHER):
+            raise SecurityError(f'应用数据单元选择{choice}无效')
+        data, pos = axdr.decode(apdu, 2, axdr.OCTET_STRING)
+        verify_choice = apdu[pos]
+        pos += 1
+        if verify_choice == VERIFY_SID_MAC:
+            verify, pos = axdr.decode(apdu, pos, axdr.SID_MAC)
+        elif verify_choice == VERIFY_RN:
+            verify, pos = axdr.decode(apdu, pos, axdr.RN)
+        elif verify_choice == VERIFY_RN_MAC:
+            verify, pos = _decode_rn_mac(apdu, pos)
+        elif verify_choice == VERIFY_SID:
+            verify, pos = axdr.decode(apdu, pos, axdr.SID)
+        else:
+            raise SecurityError(f'数据验证信息选择{verify_choice}无效')
+    except IndexError:
+        raise SecurityError('SECURITY-Request长度不足') from None
+    except axdr.AXDRDecodeError as e:
+        raise SecurityError(str(e)) from None
+    return SecurityRequest(choice == APP_CIPHER, data, verify_choice, verify), pos
+
+
+def encode_response(data=None, mac=None, ciphered=False, dar=None):
+    """生成SECURITY-Response APDU，给出dar时为异常错误响应"""
+    out = bytearray((SECURITY_RESPONSE,))
+    if dar is not None:
+        out += bytes((APP_ERROR, dar))
+    else:
+        out.append(APP_CIPHER if ciphered else APP_PLAIN)
+        axdr.encode_value(out, axdr.OCTET_STRING, data)
+    if mac is None:
+        out.append(0)
+    else:
+        out += b'\x01\x00'
+        axdr.encode_value(out, axdr.MAC, mac)
+    return bytes(out)
+
+
+def decode_response(apdu):
+    """
+    解析SECURITY-Response APDU
+
+    Returns:
+        tuple: (SecurityResponse, 结束偏移)
+    """
+    try:
+        if apdu[0] != SECURITY_RESPONSE:
+            raise SecurityError(f'服务类型{apdu[0]:02X}H不是SECURITY-Response')
+        choice = apdu[1]
+        data = dar = mac = None
+        if choice == APP_ERROR:
+            dar, pos = axdr.decode(apdu, 2, axdr.ENUM)
+        elif choice in (APP_PLAIN, APP_CIPHER):
+            data, pos = axdr.decode(apdu, 2, axdr.OCTET_STRING)
+        else:
+            raise SecurityError(f'应用数据单元选择{choice}无效')
+        if apdu[pos]:
+            if apdu[pos + 1] != 0:
+                raise SecurityError(f'数据验证信息选择{apdu[pos + 1]}无效')
+            mac, pos = axdr.decode(apdu, pos + 2, axdr.MAC)
+        else:
+            pos += 1
+    except IndexError:
+        raise SecurityError('SECURITY-Response长度不足') from None
+    except axdr.AXDRDecodeError as e:
+        raise SecurityError(str(e)) from None
+    return SecurityResponse(choice == APP_CIPHER, data, dar, mac), pos
+
+
+class _SoftwareKey:
+    __slots__ = ('enc', 'mac')
+
+    def __init__(self, session_key):
+        self.enc = hmac.new(session_key, b'enc', hashlib.sha256)
+        self.mac = hmac.new(session_key, b'mac', hashlib.sha256)
+
+
+class SoftwareESAM:
+    """
+    ESAM软件替身，仅用于测试和仿真，与真实ESAM的算法不兼容
+
+    会话密钥由主密钥和表地址派生；加密为HMAC-SHA256计数器模式密钥流异或，MAC为HMAC-SHA256前4字节。
+    派生后的HMAC状态随会话缓存，每次加密/MAC只需复制状态
+
+    密码后端须提供:
+        negotiate(address) -> 会话密钥对象（协商代价较高，由SecureChannel缓存）
+        encrypt(key, counter, data) / decrypt(key, counter, data) -> bytes
+        mac(key, counter, data) -> bytes
+        random(size) -> bytes
+    """
+
+    MAC_SIZE = 4
+
+    def __init__(self, master_key):
+        self.master_key = bytes(master_key)
+        self.negotiations = 0
+
+    def negotiate(self, address):
+        self.negotiations += 1
+        return _SoftwareKey(hmac.new(self.master_key, bytes(address), hashlib.sha256).digest())
+
+    def _keystream(self, key, counter, size):
+        prefix = counter.to_bytes(4, 'big')
+        blocks = []
+        for block in range((size + 31) >> 5):
+            h = key.enc.copy()
+            h.update(prefix + block.to_bytes(4, 'big'))
+            blocks.append(h.digest())
+        return b''.join(blocks)[:size]
+
+    def encrypt(self, key, counter, data):
+        size = len(data)
+        if not size:
+            return b''
+        stream = self._keystream(key, counter, size)
+        return (int.from_bytes(data, 'big') ^ int.from_bytes(stream, 'big')).to_bytes(size, 'big')
+
+    decrypt = encrypt
+
+    def mac(self, key, counter, data):
+        h = key.mac.copy()
+        h.update(counter.to_bytes(4, 'big'))
+        h.update(data)
+        return h.digest()[:self.MAC_SIZE]
+
+    def random(self, size):
+        return os.urandom(size)
+
+
+class Session:
+    """
+    一个表的安全会话
+
+    address: 表地址
+    key: 密码后端返回的会话密钥对象
+    counter: 最近使用的计数器
+    expires: 过期时刻
+    """
+
+    __slots__ = ('address', 'key', 'counter', 'expires')
+
+    def __init__(self, address, key, expires):
+        self.address = address
+        self.key = key
+        self.counter = 0
+        self.expires = expires
+
+    def next_counter(self):
+        self.counter = (self.counter + 1) & COUNTER_MASK
+        return self.counter
+
+
+class SessionKeyCache:
+    """
+    会话密钥/计数器缓存，按表地址保存，超出数量时丢弃最久未使用的会话
+
+    Args:
+        max_sessions: 同时缓存的会话数上限
+        lifetime: 会话有效期(秒)，过期后重新协商
+        clock: 时间函数，默认time.monotonic
+    """
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, lifetime=DEFAULT_SESSION_LIFETIME,
+                 clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.lifetime = lifetime
+        self.clock = clock
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, address):
+        """返回有效的会话，不存在、已过期或计数器将要回绕时返回None"""
+        session = self._sessions.get(address)
+        if session is None:
+            return None
+        if session.expires <= self.clock() or session.counter == COUNTER_MASK:
+            del self._sessions[address]
+            return None
+        self._sessions.move_to_end(address)
+        return session
+
+    def put(self, address, key):
+        session = Session(address, key, self.clock() + self.lifetime)
+        self._sessions[address] = session
+        self._sessions.move_to_end(address)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def invalidate(self, address=None):
+        """丢弃指定表的会话，address为None时丢弃全部会话"""
+        if address is None:
+            self._sessions.clear()
+        else:
+            self._sessions.pop(address, None)
+
+
+class SecureChannel:
+    """
+    安全传输通道
+
+    Args:
+        backend: 密码后端（见SoftwareESAM）
+        mode: 默认安全传输模式（MODE_PLAIN_RN/MODE_PLAIN_MAC/MODE_CIPHER）
+        cache: 会话缓存，默认新建SessionKeyCache
+    """
+
+    def __init__(self, backend, mode=MODE_PLAIN_RN, cache=None):
+        self.backend = backend
+        self.mode = mode
+        self.cache = cache if cache is not None else SessionKeyCache()
+
+    def session(self, address):
+        """返回表的会话，没有有效会话时协商"""
+        address = bytes(address)
+        session = self.cache.get(address)
+        if session is None:
+            session = self.cache.put(address, self.backend.negotiate(address))
+        return session
+
+    def wrap(self, address, apdu, mode=None):
+        """
+        把APDU包装为SECURITY-Request
+
+        Returns:
+            tuple: (SECURITY-Request APDU, 供unwrap校验响应的上下文)
+        """
+        mode = mode or self.mode
+        session = self.session(address)
+        counter = session.next_counter()
+        backend = self.backend
+        if mode == MODE_PLAIN_RN:
+            rn = backend.random(RN_SIZE)
+            request = encode_request(apdu, VERIFY_RN, rn)
+        elif mode == MODE_PLAIN_MAC:
+            rn = None
+            mac = backend.mac(session.key, counter, apdu)
+            request = encode_request(apdu, VERIFY_SID_MAC, ((counter, b''), mac))
+        elif mode == MODE_CIPHER:
+            rn = None
+            data = backend.encrypt(session.key, counter, apdu)
+            mac = backend.mac(session.key, counter, data)
+            request = encode_request(data, VERIFY_SID_MAC, ((counter, b''), mac), ciphered=True)
+        else:
+            raise SecurityError(f'安全传输模式{mode}无效')
+        return request, (session, counter, rn)
+
+    def unwrap(self, context, apdu):
+        """
+        校验并解开SECURITY-Response，返回其中的明文APDU
+
+        Raises:
+            SecurityError: 响应格式错误、缺少MAC、MAC校验失败或服务器返回异常DAR；MAC失败和异常时丢弃会话，下次重新协商
+        """
+        session, counter, rn = context
+        response, _ = decode_response(apdu)
+        if response.dar is not None:
+            self.cache.invalidate(session.address)
+            raise SecurityError(f'安全传输异常 DAR={response.dar}')
+        data = response.data
+        if response.mac is not None:
+            if rn is None:
+                expected = self.backend.mac(session.key, counter, data)
+            else:
+                expected = self.backend.mac(session.key, 0, rn + data)
+            if not hmac.compare_digest(expected, response.mac):
+                self.cache.invalidate(session.address)
+                raise SecurityError('响应MAC校验失败')
+        else:
+            # 三种模式的响应都带数据MAC（明文+MAC方式同样如此），缺少MAC时不接受
+            raise SecurityError('响应缺少数据MAC')
+        if response.ciphered:
+            data = self.backend.decrypt(session.key, counter, data)
+        return data
+
+    def respond(self, address, request, handler):
+        """
+        服务器端处理SECURITY-Request（用于仿真）：校验、解密后交给handler，
+        按请求的方式包装handler返回的响应APDU
+
+        Args:
+            address: 本表地址
+            request: SECURITY-Request APDU
+            handler: handler(APDU) -> 响应APDU
+        """
+        try:
+            decoded, _ = decode_request(request)
+        except SecurityError:
+            return encode_response(dar=DAR_OTHER)
+        session = self.session(address)
+        backend = self.backend
+        data = decoded.data
+        if decoded.verify_choice == VERIFY_SID_MAC:
+            (counter, _), mac = decoded.verify
+            if not hmac.compare_digest(backend.mac(session.key, counter, data), mac):
+                return encode_response(dar=DAR_ESAM_FAILED)
+            if decoded.ciphered:
+                data = backend.decrypt(session.key, counter, data)
+            result = handler(data)
+            if decoded.ciphered:
+                result = backend.encrypt(session.key, counter, result)
+            return encode_response(result, backend.mac(session.key, counter, result), decoded.ciphered)
+        if decoded.verify_choice == VERIFY_RN and not decoded.ciphered:
+            result = handler(data)
+            # 明文+随机数方式的计数器固定为0，MAC覆盖随机数和响应
+            return encode_response(result, backend.mac(session.key, 0, decoded.verify + result))
+        return encode_response(dar=DAR_SECURITY_MISMATCH)
+
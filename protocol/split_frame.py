@@ -0,0 +1,279 @@
+"""
+698.45链路层分帧传输
+控制域D5=1时，链路用户数据为 分帧格式域(2字节) + APDU片段；
+分帧格式域 D11-D0 为帧序号(0~4095循环)，D15-D14 为帧类型：
+    0 起始帧，1 最后帧，2 确认帧，3 中间帧
+接收方对收到的每个片段回复确认帧（分帧格式域类型为2、序号为所收片段序号，无APDU片段）
+
+SplitFrameReassembler按(SA, CA, 传输方向)分别重组，每个会话的缓冲区有上限，
+重组完成后交出一段连续的APDU；fragment_frame把超过最大帧长的帧拆成分帧发送
+"""
+
+import time
+from collections import OrderedDict, namedtuple
+
+from .frame_template import LENGTH_MASK, FrameTemplate
+from .frame_view import FrameView
+
+SPLIT_START = 0
+SPLIT_LAST = 1
+SPLIT_CONFIRM = 2
+SPLIT_MIDDLE = 3
+
+SEQUENCE_MASK = 0x0FFF
+SPLIT_HEADER_SIZE = 2
+
+CONTROL_DIR = 0x80
+CONTROL_SPLIT = 0x20
+
+# 默认每个会话最多缓存的APDU字节数、同时重组的会话数、会话空闲超时(秒)
+DEFAULT_MAX_BUFFER = 1 << 20
+DEFAULT_MAX_SESSIONS = 16
+DEFAULT_SESSION_TIMEOUT = 30.0
+
+
+def pack_split_header(sequence, split_type):
+    """生成分帧格式域（低字节在前）"""
+    value = (sequence & SEQUENCE_MASK) | (split_type << 14)
+    return bytes((value & 0xFF, value >> 8))
+
+
+def unpack_split_header(data):
+    """
+    解析分帧格式域
+
+    Returns:
+        tuple: (帧序号, 帧类型)
+    """
+    value = data[0] | (data[1] << 8)
+    return value & SEQUENCE_MASK, value >> 14
+
+
+def confirm_control(control):
+    """由所收分帧的控制域生成确认帧控制域：传输方向取反，保留启动标志和功能码，置分帧标志"""
+    return ((control & 0xC7) ^ CONTROL_DIR) | CONTROL_SPLIT
+
+
+class SplitFrameError(ValueError):
+    """分帧重组错误（序号不连续、缓冲超限等），对应会话已丢弃"""
+
+
+class ReassemblyResult(namedtuple('ReassemblyResult', 'key apdu ack confirmed')):
+    """
+    一帧的重组结果
+
+    key: 会话键(SA字段, CA, 传输方向)
+    apdu: 完整APDU（不分帧的帧直接给出，分帧时仅在最后帧给出），否则为None
+    ack: 需要回复的确认帧，无需回复时为None
+    confirmed: 收到确认帧时为所确认的帧序号，否则为None
+    """
+    __slots__ = ()
+
+
+class _Session:
+    __slots__ = ('buffer', 'expected', 'last_sequence', 'updated')
+
+    def __init__(self, sequence, now):
+        self.buffer = bytearray()
+        self.expected = sequence
+        self.last_sequence = None
+        self.updated = now
+
+
+class SplitFrameReassembler:
+    """
+    分帧重组器
+
+    Args:
+        max_buffer: 每个会话最多缓存的APDU字节数，超出时丢弃该会话
+        max_sessions: 同时重组的会话数上限，超出时丢弃最久未更新的会话
+        session_timeout: 会话空闲超时(秒)
+        clock: 时间函数，默认time.monotonic
+    """
+
+    def __init__(self, max_buffer=DEFAULT_MAX_BUFFER, max_sessions=DEFAULT_MAX_SESSIONS,
+                 session_timeout=DEFAULT_SESSION_TIMEOUT, clock=time.monotonic):
+        self.max_buffer = max_buffer
+        self.max_sessions = max_sessions
+        self.session_timeout = session_timeout
+        self.clock = clock
+        self._sessions = OrderedDict()
+        # 最近完成的会话 -> 最后帧序号，用于重新确认重发的最后帧
+        self._completed = OrderedDict()
+        self._ack_templates = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    @property
+    def buffered_bytes(self):
+        """全部会话当前缓存的字节数"""
+        return sum(len(session.buffer) for session in self._sessions.values())
+
+    def reset(self, key=None):
+        """丢弃指定会话，key为None时丢弃全部会话"""
+        if key is None:
+            self._sessions.clear()
+            self._completed.clear()
+        else:
+            self._sessions.pop(key, None)
+            self._completed.pop(key, None)
+
+    def _expire(self, now):
+        deadline = now - self.session_timeout
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if session.updated >= deadline:
+                break
+            del self._sessions[key]
+
+    def _ack(self, view, sa_field, sequence):
+        key = (view.control, sa_field, view.ca)
+        template = self._ack_templates.get(key)
+        if template is None:
+            if len(self._ack_templates) >= 256:
+                self._ack_templates.clear()
+            template = FrameTemplate(confirm_control(view.control), sa_field[0], sa_field[1:], view.ca)
+            self._ack_templates[key] = template
+        return template.render_user_data(pack_split_header(sequence, SPLIT_CONFIRM))
+
+    def feed(self, frame):
+        """
+        处理一个完整帧
+
+        Args:
+            frame: 帧字节或FrameView
+
+        Returns:
+            ReassemblyResult: 重组结果
+
+        Raises:
+            SplitFrameError: 片段序号不连续、会话缓冲超限或分帧格式不完整，对应会话已丢弃
+        """
+        view = frame if isinstance(frame, FrameView) else FrameView(frame)
+        sa_field = bytes(view.sa_field)
+        control = view.control
+        key = (sa_field, view.ca, control >> 7)
+        link_data = view.link_data
+        if not control & CONTROL_SPLIT:
+            return ReassemblyResult(key, bytes(link_data), None, None)
+        if len(link_data) < SPLIT_HEADER_SIZE:
+            raise SplitFrameError('分帧格式域不完整')
+
+        sequence, split_type = unpack_split_header(link_data)
+        if split_type == SPLIT_CONFIRM:
+            return ReassemblyResult(key, None, None, sequence)
+
+        now = self.clock()
+        self._expire(now)
+        fragment = link_data[SPLIT_HEADER_SIZE:]
+        sessions = self._sessions
+        session = sessions.get(key)
+
+        if split_type == SPLIT_START:
+            session = _Session(sequence, now)
+            sessions[key] = session
+            while len(sessions) > self.max_sessions:
+                sessions.popitem(last=False)
+        elif session is None:
+            if self._completed.get(key) == sequence:
+                return ReassemblyResult(key, None, self._ack(view, sa_field, sequence), None)
+            raise SplitFrameError(f'收到帧序号{sequence}，但没有进行中的分帧会话')
+        elif sequence == session.last_sequence:
+            # 重发的片段（对方未收到确认）：重新确认，不重复拼接
+            session.updated = now
+            sessions.move_to_end(key)
+            return ReassemblyResult(key, None, self._ack(view, sa_field, sequence), None)
+        elif sequence != session.expected:
+            del sessions[key]
+            raise SplitFrameError(f'帧序号不连续: 期望{session.expected}，收到{sequence}')
+
+        if len(session.buffer) + len(fragment) > self.max_buffer:
+            del sessions[key]
+            raise SplitFrameError(f'分帧缓冲超出上限{self.max_buffer}字节')
+
+        session.buffer += fragment
+        session.last_sequence = sequence
+        session.expected = (sequence + 1) & SEQUENCE_MASK
+        session.updated = now
+        sessions.move_to_end(key)
+        ack = self._ack(view, sa_field, sequence)
+
+        if split_type == SPLIT_LAST:
+            del sessions[key]
+            self._completed[key] = sequence
+            self._completed.move_to_end(key)
+            while len(self._completed) > self.max_sessions:
+                self._completed.popitem(last=False)
+            return ReassemblyResult(key, bytes(session.buffer), ack, None)
+        return ReassemblyResult(key, None, ack, None)
+
+
+def plan_fragments(size, overhead, max_frame_size):
+    """
+    规划APDU片段长度
+
+    不超过16383字节的帧按字节计长度；允许更大的帧时，大片段对齐到长度域千字节单位，
+    剩余部分再按字节计长度的帧发送
+
+    Args:
+        size: 待分帧的字节数
+        overhead: 每帧除片段外的字节数（含分帧格式域）
+        max_frame_size: 每帧最大字节数（含起始符和结束符）
+
+    Returns:
+        list: 各片段长度
+    """
+    # 长度域不计起始符和结束符
+    byte_chunk = min(max_frame_size, LENGTH_MASK + 2) - overhead
+    if byte_chunk <= 0:
+        raise ValueError(f'最大帧长{max_frame_size}不足以容纳帧头和分帧格式域')
+    chunks = []
+    remaining = size
+    while remaining > byte_chunk:
+        kilobytes = min(max_frame_size - 2, remaining + overhead - 2) >> 10
+        chunk = (kilobytes << 10) + 2 - overhead
+        if kilobytes << 10 <= LENGTH_MASK or chunk <= byte_chunk:
+            chunk = byte_chunk
+        chunks.append(chunk)
+        remaining -= chunk
+    chunks.append(remaining)
+    return chunks
+
+
+def fragment_link_data(template, link_data, max_frame_size):
+    """
+    将链路用户数据（APDU及时间标签）按最大帧长拆成分帧
+
+    Args:
+        template: 不分帧的FrameTemplate
+        link_data: 链路用户数据
+        max_frame_size: 每帧最大字节数（含起始符和结束符）
+
+    Returns:
+        list: 帧字节列表，第i帧的帧序号为i；不超过最大帧长时只有一帧且不分帧
+    """
+    total = template.overhead + len(link_data)
+    if total <= max_frame_size and (total - 2 <= LENGTH_MASK or (total - 2) % 1024 == 0):
+        return [template.render_user_data(link_data)]
+    split_template = FrameTemplate(template.control | CONTROL_SPLIT, template.sa_flag,
+                                   template.sa_address, template.ca)
+    sizes = plan_fragments(len(link_data), split_template.overhead + SPLIT_HEADER_SIZE, max_frame_size)
+    view = memoryview(link_data)
+    frames = []
+    offset = 0
+    last = len(sizes) - 1
+    for sequence, size in enumerate(sizes):
+        split_type = SPLIT_START if sequence == 0 else SPLIT_LAST if sequence == last else SPLIT_MIDDLE
+        header = pack_split_header(sequence, split_type)
+        frames.append(split_template.render_user_data(header + view[offset:offset + size]))
+        offset += size
+    return frames
+
+
+def fragment_frame(frame, max_frame_size):
+    """将一个完整帧按最大帧长拆成分帧，见fragment_link_data"""
+    view = frame if isinstance(frame, FrameView) else FrameView(frame)
+    sa_field = bytes(view.sa_field)
+    template = FrameTemplate(view.control, sa_field[0], sa_field[1:], view.ca)
+    return fragment_link_data(template, bytes(view.link_data), max_frame_size)
@@ -0,0 +1,173 @@
+"""
+按(SA, PIID)关联请求与响应的事务表
+同一链路上可以有多个未完成的请求（不超过窗口大小），响应按服务器地址和PIID服务序号交给对应的等待者，
+乱序到达的响应（如TCP集中器）不会交错；迟到的响应找不到对应事务时作为主动上报帧处理
+"""
+
+import threading
+from collections import deque
+
+from .frame_view import FrameView
+
+DEFAULT_WINDOW = 8
+# 无法解析的请求帧使用的事务键，按先发先得匹配响应
+UNKEYED = ('unkeyed',)
+
+# PIID紧跟服务类型码（无CHOICE）的服务: LINK、CONNECT、RELEASE的请求与响应，ERROR-Response
+_PIID_AT_1 = frozenset((0x01, 0x02, 0x03, 0x81, 0x82, 0x83, 0xEE))
+# 无PIID的服务: SECURITY-Request/Response
+_NO_PIID = frozenset((0x10, 0x90))
+
+
+def apdu_piid(apdu):
+    """
+    APDU中的PIID/PIID-ACD服务序号（D5-D0），无PIID的服务返回None
+
+    Args:
+        apdu: 完整APDU
+    """
+    if not apdu or apdu[0] in _NO_PIID:
+        return None
+    index = 1 if apdu[0] in _PIID_AT_1 else 2
+    if len(apdu) <= index:
+        return None
+    return apdu[index] & 0x3F
+
+
+def frame_apdu(view):
+    """帧中的APDU（分帧时为本帧的APDU片段，首帧片段以服务类型码开头）"""
+    data = bytes(view.link_data)
+    return data[2:] if view.split_frame else data
+
+
+def request_key(frame):
+    """请求帧的事务键(服务器地址键, PIID服务序号)；帧无法解析时为UNKEYED（先发先得）"""
+    try:
+        view = FrameView(frame)
+        return server_key(view), apdu_piid(frame_apdu(view))
+    except (IndexError, ValueError):
+        return UNKEYED
+
+
+def server_key(view):
+    """帧的服务器地址键(逻辑地址, 通信地址)；非单地址（通配、组、广播）返回None"""
+    if view.addr_type != 0:
+        return None
+    return view.sa_logic, bytes(view.sa_address)
+
+
+class Transaction:
+    """一个未完成的请求，响应到达时event置位"""
+
+    __slots__ = ('key', 'tolerant', 'event', 'frame', 'apdu', 'checksum')
+
+    def __init__(self, key, tolerant=False):
+        self.key = key
+        self.tolerant = tolerant
+        self.event = threading.Event()
+        self.frame = None
+        self.apdu = None
+        self.checksum = (None, None)
+
+    def wait(self, timeout):
+        """等待响应，超时返回False"""
+        return self.event.wait(timeout)
+
+
+class TransactionTable:
+    """
+    事务表：(服务器地址键, PIID服务序号) -> 等待中的事务（先发先得）
+
+    Args:
+        window: 同时未完成的请求数上限
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self._slots = threading.BoundedSemaphore(window)
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(waiters) for waiters in self._pending.values())
+
+    def begin(self, request_frame, timeout=None, tolerant=False):
+        """
+        登记一个请求，窗口已满时等待
+
+        Args:
+            request_frame: 请求帧，分帧发送时为首帧
+            timeout: 等待窗口空位的秒数，None表示一直等待
+            tolerant: 为True时，若只有这一个未完成的请求，地址或PIID不匹配的响应也交给它
+
+        Returns:
+            Transaction；超时未取得窗口时为None
+        """
+        transaction = Transaction(request_key(request_frame), tolerant)
+        if not self._slots.acquire(timeout=timeout):
+            return None
+        with self._lock:
+            self._pending.setdefault(transaction.key, deque()).append(transaction)
+        return transaction
+
+    def finish(self, transaction):
+        """结束事务（收到响应或超时放弃），释放窗口"""
+        with self._lock:
+            waiters = self._pending.get(transaction.key)
+            if waiters is None or transaction not in waiters:
+                return
+            waiters.remove(transaction)
+            if not waiters:
+                del self._pending[transaction.key]
+        self._slots.release()
+
+    def resolve(self, response_frame, apdu, checksum=(None, None)):
+        """
+        把响应交给对应事务
+
+        依次查找(服务器地址, PIID)、以非单地址发出的同PIID请求、无法解析的请求；
+        都没有时，若只有一个未完成的请求且其为tolerant，交给该请求
+
+        Returns:
+            Transaction；没有对应事务（主动上报或迟到的响应）时为None
+        """
+        piid = apdu_piid(apdu)
+        address = server_key(FrameView(response_frame))
+        with self._lock:
+            for key in ((address, piid), (None, piid), UNKEYED):
+                transaction = self._pop(key)
+                if transaction is not None:
+                    break
+            else:
+                if len(self._pending) != 1:
+                    return None
+                key, waiters = next(iter(self._pending.items()))
+                if len(waiters) != 1 or not waiters[0].tolerant:
+                    return None
+                transaction = self._pop(key)
+        transaction.frame = response_frame
+        transaction.apdu = apdu
+        transaction.checksum = checksum
+        transaction.event.set()
+        self._slots.release()
+        return transaction
+
+    def _pop(self, key):
+        """取出key下最早的事务（调用方持有锁）"""
+        waiters = self._pending.get(key)
+        if not waiters:
+            return None
+        transaction = waiters.popleft()
+        if not waiters:
+            del self._pending[key]
+        return transaction
+
+    def cancel_all(self):
+        """断开连接时唤醒并放弃所有事务"""
+        with self._lock:
+            waiters = [transaction for queue in self._pending.values() for transaction in queue]
+            self._pending.clear()
+        for transaction in waiters:
+            transaction.event.set()
+            self._slots.release()
@@ -17,6 +17,83 @@ import json
 import serial.tools.list_ports
 import threading
 from utils.logger import Logger
+from utils.config_cache import get_config_cache
+from utils.oad_catalog import get_catalog
+from protocol import axdr
+from protocol.header_tables import (ADDR_TYPE_LABELS, DIRECTION_LABELS, FUNCTION_LABELS, PRM_LABELS,
+                                    SC_LABELS, SPLIT_LABELS)
+
+# 界面数据类型编号 -> A-XDR类型标签（编号与标准类型标签不一致的项）
+UI_DATA_TAGS = {
+    '45': axdr.OAD,
+    '81': axdr.OMD,
+    '83': axdr.REGION,
+    '84': axdr.SCALER_UNIT,
+    '85': axdr.RSD,
+    '86': axdr.CSD,
+    '87': axdr.MS,
+    '88': axdr.SID,
+    '89': axdr.SID_MAC,
+    '90': axdr.COMDCB,
+    '91': axdr.RCSD
+}
+
+
+class LazyComboBox(QComboBox):
+    """
+    延迟填充的下拉框：set_lazy_items时只放入第一项作为当前项，
+    其余项在首次展开或查找时才加入
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = None
+
+    def set_lazy_items(self, items):
+        """替换全部项，items可为任意可迭代对象（如配置字典的keys()）"""
+        items = list(items)
+        self.clear()
+        if items:
+            self.addItem(items[0])
+            self._pending = items[1:]
+
+    def clear(self):
+        """清空全部项，包括尚未填充的项"""
+        self._pending = None
+        super().clear()
+
+    def populate(self):
+        """加入尚未填充的项"""
+        if self._pending:
+            pending, self._pending = self._pending, None
+            self.blockSignals(True)
+            self.addItems(pending)
+            self.blockSignals(False)
+
+    def showPopup(self):
+        self.populate()
+        super().showPopup()
+
+    def findText(self, text, *args):
+        self.populate()
+        return super().findText(text, *args)
+
+    def wheelEvent(self, event):
+        self.populate()
+        super().wheelEvent(event)
+
+    def keyPressEvent(self, event):
+        self.populate()
+        super().keyPressEvent(event)
+
+    def count(self):
+        self.populate()
+        return super().count()
+
+    def itemText(self, index):
+        self.populate()
+        return super().itemText(index)
+
 
 class MainWindow(QMainWindow):
     frame_send_requested = Signal(str, int)  # (frame_name, row)
@@ -56,7 +133,9 @@ class MainWindow(QMainWindow):
         self.update_port_list()
         
         # 加载配置（在UI初始化之后）
+        self.max_frame_size = None  # 配置的最大帧长（字节），None表示不限制
         self.load_serial_config()
+        get_config_cache().flush()  # 启动时重新解析的配置一次写入缓存
         
         # 不再需要创建停靠日志窗口，因为已经在init_ui中创建
         # self.create_dockable_log_window()
@@ -286,38 +365,25 @@ class MainWindow(QMainWindow):
         # 先创建所有控件
         # 控制域控件
         self.dir_combo = QComboBox()
-        self.dir_combo.addItems(['客户机发出(0)', '服务器发出(1)'])
+        self.dir_combo.addItems(DIRECTION_LABELS)
         
         self.prm_combo = QComboBox()
-        self.prm_combo.addItems(['从动站(0)', '启动站(1)'])
+        self.prm_combo.addItems(PRM_LABELS)
         
         self.split_combo = QComboBox()
-        self.split_combo.addItems(['不分帧(0)', '分帧(1)'])
+        self.split_combo.addItems(SPLIT_LABELS)
         
         self.sc_combo = QComboBox()
-        self.sc_combo.addItems(['无数据域(0)', '有数据域(1)'])
+        self.sc_combo.addItems(SC_LABELS)
         
         self.func_combo = QComboBox()
-        self.func_combo.addItems([
-            '保留(0)',
-            '链路管理(1)',  # 链路连接管理（登录、心跳、退出登录）
-            '保留(2)',
-            '用户数据(3)',  # 应用连接管理及数据交换服务
-            '保留(4)',
-            '保留(5)',
-            '保留(6)',
-            '保留(7)'
-        ])
+        # 链路管理(1): 链路连接管理（登录、心跳、退出登录）；用户数据(3): 应用连接管理及数据交换服务
+        self.func_combo.addItems(FUNCTION_LABELS)
         self.func_combo.setCurrentText('用户数据(3)')  # 设置默认选项
         
         # SA标志控件
         self.addr_type_combo = QComboBox()
-        self.addr_type_combo.addItems([
-            '单地址(0)',
-            '通配地址(1)',
-            '组地址(2)',
-            '广播地址(3)'
-        ])
+        self.addr_type_combo.addItems(ADDR_TYPE_LABELS)
         
         # 服务器逻辑地址选择（根据协议：bit4和bit5组成逻辑地址）
         # bit5=0, bit4=0 → 逻辑地址0
@@ -445,9 +511,9 @@ class MainWindow(QMainWindow):
         self.service_number_spin.setRange(0, 63)
         
         # 创建OAD控件
-        self.oad_combo = QComboBox()
+        self.oad_combo = LazyComboBox()
         if self.oad_config and 'OAD' in self.oad_config:
-            self.oad_combo.addItems(self.oad_config['OAD'].keys())
+            self.oad_combo.set_lazy_items(self.oad_config['OAD'].keys())
         self.oad_combo.currentTextChanged.connect(self.on_oad_selected)
         
         self.oad_input = QLineEdit()
@@ -822,7 +888,7 @@ class MainWindow(QMainWindow):
         if self.oad_config and 'OI_SUBCLASS' in self.oad_config:
             if class_name in self.oad_config['OI_SUBCLASS']:
                 subclass_dict = self.oad_config['OI_SUBCLASS'][class_name]
-                self.oi_subclass_combo.addItems(subclass_dict.keys())
+                self.oi_subclass_combo.set_lazy_items(subclass_dict.keys())
         # 更新OAD输入框
         self.update_oad_input()
 
@@ -1272,85 +1338,39 @@ class MainWindow(QMainWindow):
             self.param_input_layout.addLayout(value_layout)
 
     def generate_element_data(self, type_code, value_input):
-        """生成单个元素的数据"""
-        try:
-            if type_code == '3':  # Bool
-                value = 1 if 'True' in value_input.currentText() else 0
-                return f"03 {value:02X}"
-                
-            elif type_code == '5':  # DoubleLong
-                value = int(value_input.text() or "0")
-                if value < 0:
-                    value = (1 << 32) + value
-                # 生成完整的十六进制字符串，然后按每2位切分
-                hex_value = f"{value:08X}"  # 8位十六进制
-                hex_bytes = ' '.join([hex_value[i:i+2] for i in range(0, len(hex_value), 2)])
-                return f"05 {hex_bytes}"
-                
-            elif type_code == '6':  # DoubleLongUnsigned
-                value = int(value_input.text() or "0")
-                hex_value = f"{value:08X}"
-                hex_bytes = ' '.join([hex_value[i:i+2] for i in range(0, len(hex_value), 2)])
-                return f"06 {hex_bytes}"
-                
-            elif type_code == '9':  # OctetString
-                value_hex = value_input.text().strip().replace(' ', '')
-                if value_hex:
-                    length = len(value_hex) // 2
-                    # 确保字节串按每2位切分
-                    hex_bytes = ' '.join([value_hex[i:i+2] for i in range(0, len(value_hex), 2)])
-                    return f"09 {length:02X} {hex_bytes}"
-                else:
-                    return "09 00"
-                    
-            elif type_code == '15':  # Integer
-                value = value_input.value()
-                if value < 0:
-                    value = 256 + value
-                return f"0F {value:02X}"
-                
-            elif type_code == '16':  # Long
-                value = int(value_input.text() or "0")
-                if value < 0:
-                    value = 65536 + value
-                hex_value = f"{value:04X}"
-                hex_bytes = ' '.join([hex_value[i:i+2] for i in range(0, len(hex_value), 2)])
-                return f"10 {hex_bytes}"
-                
-            elif type_code == '17':  # Unsigned
-                value = value_input.value()
-                return f"11 {value:02X}"
-                
-            elif type_code == '18':  # LongUnsigned
-                value = int(value_input.text() or "0")
-                hex_value = f"{value:04X}"
-                hex_bytes = ' '.join([hex_value[i:i+2] for i in range(0, len(hex_value), 2)])
-                return f"12 {hex_bytes}"
-                
-            elif type_code == '22':  # Enum
-                value = value_input.value()
-                return f"16 {value:02X}"
-                
-            elif type_code == '45':  # OAD
-                value_hex = value_input.text().strip().replace(' ', '')
-                if len(value_hex) == 8:
-                    hex_bytes = ' '.join([value_hex[i:i+2] for i in range(0, len(value_hex), 2)])
-                    return f"2D {hex_bytes}"
-                else:
-                    return "2D 40 00 02 00"
-                    
-            elif type_code == '80':  # OI
-                value_hex = value_input.text().strip().replace(' ', '')
-                if len(value_hex) == 4:
-                    hex_bytes = ' '.join([value_hex[i:i+2] for i in range(0, len(value_hex), 2)])
-                    return f"50 {hex_bytes}"
-                else:
-                    return "50 40 00"
-            else:
-                return f"{type_code} 00"
-        except Exception as e:
-            self.append_log(f"元素数据生成错误: {str(e)}", "error")
-            return f"{type_code} 00"
+        """生成单个元素的数据，返回(数据结构描述, 值)，由generate_data统一编码"""
+        if type_code == '3':  # Bool
+            return axdr.BOOL, 'True' in value_input.currentText()
+        elif type_code in ['5', '6', '16', '18']:  # DoubleLong, DoubleLongUnsigned, Long, LongUnsigned
+            return int(type_code), int(value_input.text() or "0")
+        elif type_code == '9':  # OctetString
+            return axdr.OCTET_STRING, bytes.fromhex(value_input.text().strip().replace(' ', ''))
+        elif type_code in ['15', '17', '22']:  # Integer, Unsigned, Enum
+            return int(type_code), value_input.value()
+        elif type_code == '45':  # OAD
+            return axdr.OAD, self.parse_hex_value(value_input.text(), 8, 0x40000200)
+        elif type_code == '80':  # OI
+            return axdr.OI, self.parse_hex_value(value_input.text(), 4, 0x4000)
+        raise ValueError(f"不支持的元素类型: {type_code}")
+
+    def default_element_data(self, type_code):
+        """元素输入无效时使用的默认值，返回(数据结构描述, 值)"""
+        if type_code == '3':  # Bool
+            return axdr.BOOL, False
+        elif type_code in ['5', '6', '15', '16', '17', '18', '22']:
+            return int(type_code), 0
+        elif type_code == '9':  # OctetString
+            return axdr.OCTET_STRING, b''
+        elif type_code == '45':  # OAD
+            return axdr.OAD, 0x40000200
+        elif type_code == '80':  # OI
+            return axdr.OI, 0x4000
+        raise ValueError(f"不支持的元素类型: {type_code}")
+
+    def parse_hex_value(self, text, digits, default):
+        """解析定长HEX输入（OAD/OI），位数不符时使用默认值"""
+        value_hex = text.strip().replace(' ', '')
+        return int(value_hex, 16) if len(value_hex) == digits else default
 
     def generate_data(self):
         """生成数据"""
@@ -1359,224 +1379,119 @@ class MainWindow(QMainWindow):
             
             # 根据数据类型生成示例数据
             type_code = data_type.split('(')[1].rstrip(')')
-            generated_data = ""
+            tag = UI_DATA_TAGS.get(type_code, int(type_code))
             
             # 生成数据，根据用户输入的参数
             if type_code == '0':  # NullData
-                generated_data = "00"  # NULL类型
+                generated = axdr.encode(axdr.NULL, None)
                 
-            elif type_code == '1':  # Array
-                # 复合类型，需要包含长度
+            elif type_code in ['1', '2']:  # Array, Structure
+                # 复合类型: 类型码 + 元素个数 + 各元素（每个元素带自己的类型码）
                 try:
-                    length = len(self.element_inputs)
-                    # 格式: 类型码 + 元素个数 + 元素内容
-                    generated_data = f"01 {length:02X}"
-                    
-                    # 读取每个元素的类型和值
-                    for elem in self.element_inputs:
+                    schemas = []
+                    values = []
+                    for index, elem in enumerate(self.element_inputs, 1):
                         elem_type = elem['type_combo'].currentText()
                         elem_type_code = elem_type.split('(')[1].rstrip(')')
                         elem_value_input = elem['value_widget'].property('value_input')
                         
-                        # 生成元素数据
-                        elem_data = self.generate_element_data(elem_type_code, elem_value_input)
-                        generated_data += f" {elem_data}"
-                except Exception as e:
-                    self.append_log(f"Array生成错误: {str(e)}", "error")
-                    generated_data = "01 02 06 00 00 00 00 06 00 00 00 01"  # 默认礧2个元素
-                    
-            elif type_code == '2':  # Structure
-                # 复合类型，需要包含长度
-                try:
-                    length = len(self.element_inputs)
-                    # 格式: 类型码 + 元素个数 + 元素内容
-                    generated_data = f"02 {length:02X}"
-                    
-                    # 读取每个元素的类型和值
-                    for elem in self.element_inputs:
-                        elem_type = elem['type_combo'].currentText()
-                        elem_type_code = elem_type.split('(')[1].rstrip(')')
-                        elem_value_input = elem['value_widget'].property('value_input')
-                        
-                        # 生成元素数据
-                        elem_data = self.generate_element_data(elem_type_code, elem_value_input)
-                        generated_data += f" {elem_data}"
+                        # 单个元素无效时只替换该元素，其余元素保持输入值
+                        try:
+                            schema, value = self.generate_element_data(elem_type_code, elem_value_input)
+                            axdr.encode(schema, value)
+                        except Exception as e:
+                            schema, value = self.default_element_data(elem_type_code)
+                            self.append_log(f"第{index}个元素 {elem_type} 输入无效({str(e)})，该元素使用默认值", "warning")
+                        schemas.append(schema)
+                        values.append(value)
+                    generated = axdr.encode((tag, *schemas), values)
                 except Exception as e:
-                    self.append_log(f"Structure生成错误: {str(e)}", "error")
-                    generated_data = "02 02 11 00 12 00 01"  # 默认礧2个元素
+                    if type_code == '1':
+                        self.append_log(f"Array生成错误: {str(e)}", "error")
+                        generated = bytes.fromhex("01 02 06 00 00 00 00 06 00 00 00 01")  # 默认2个元素
+                    else:
+                        self.append_log(f"Structure生成错误: {str(e)}", "error")
+                        generated = bytes.fromhex("02 02 11 00 12 00 01")  # 默认2个元素
                     
             elif type_code == '3':  # Bool
-                # 基本类型，不需要长度，只需要值
                 try:
-                    value = 1 if 'True' in self.bool_value_combo.currentText() else 0
-                    generated_data = f"03 {value:02X}"
-                except:
-                    generated_data = "03 00"  # 默认False
+                    generated = axdr.encode(axdr.BOOL, 'True' in self.bool_value_combo.currentText())
+                except Exception:
+                    generated = axdr.encode(axdr.BOOL, False)
                     
             elif type_code == '4':  # BitString
-                # 需要长度参数
                 try:
                     bit_len = self.bitstring_len_input.value()
-                    value_hex = self.bitstring_value_input.text().strip().replace(' ', '')
-                    if not value_hex:
-                        value_hex = "FF"
-                    generated_data = f"04 {bit_len:02X} {value_hex}"
-                except:
-                    generated_data = "04 08 FF"  # 默认8位
-                    
-            elif type_code == '5':  # DoubleLong
-                # 基本类型，不需要长度，直接是4字节值
-                try:
-                    value = int(self.double_long_input.text())
-                    # 转换为带符号4字节
-                    if value < 0:
-                        value = (1 << 32) + value
-                    generated_data = f"05 {value:08X}"
-                    # 插入空格
-                    generated_data = ' '.join([generated_data[i:i+2] for i in range(0, len(generated_data), 2)])
-                except:
-                    generated_data = "05 00 00 00 00"
+                    value_hex = self.bitstring_value_input.text().strip().replace(' ', '') or "FF"
+                    generated = axdr.encode(axdr.BIT_STRING, (bit_len, bytes.fromhex(value_hex)))
+                except Exception:
+                    generated = axdr.encode(axdr.BIT_STRING, (8, b'\xff'))  # 默认8位
                     
-            elif type_code == '6':  # DoubleLongUnsigned
-                # 基本类型，不需要长度
+            elif type_code in ['5', '6']:  # DoubleLong, DoubleLongUnsigned
                 try:
-                    value = int(self.double_long_input.text())
-                    generated_data = f"06 {value:08X}"
-                    generated_data = ' '.join([generated_data[i:i+2] for i in range(0, len(generated_data), 2)])
-                except:
-                    generated_data = "06 00 00 00 00"
+                    generated = axdr.encode(tag, int(self.double_long_input.text()))
+                except Exception:
+                    generated = axdr.encode(tag, 0)
                     
             elif type_code == '9':  # OctetString
-                # 需要长度参数
                 try:
                     value_hex = self.string_value_input.text().strip().replace(' ', '')
-                    if value_hex:
-                        length = len(value_hex) // 2
-                        generated_data = f"09 {length:02X} {value_hex}"
-                        generated_data = ' '.join([generated_data[i:i+2] for i in range(0, len(generated_data), 2)])
-                    else:
-                        generated_data = "09 00"  # 空字节串
-                except:
-                    generated_data = "09 04 01 02 03 04"
+                    generated = axdr.encode(axdr.OCTET_STRING, bytes.fromhex(value_hex))
+                except Exception:
+                    generated = axdr.encode(axdr.OCTET_STRING, b'\x01\x02\x03\x04')
                     
             elif type_code in ['10', '12']:  # VisibleString, Utf8String
-                # 需要长度参数
                 try:
-                    text = self.string_value_input.text().strip()
-                    if text:
-                        # 转换为HEX
-                        hex_str = ' '.join([f"{ord(c):02X}" for c in text])
-                        length = len(text)
-                        type_prefix = '0A' if type_code == '10' else '0C'
-                        generated_data = f"{type_prefix} {length:02X} {hex_str}"
-                    else:
-                        type_prefix = '0A' if type_code == '10' else '0C'
-                        generated_data = f"{type_prefix} 00"  # 空字符串
-                except:
-                    type_prefix = '0A' if type_code == '10' else '0C'
-                    generated_data = f"{type_prefix} 05 48 45 4C 4C 4F"  # "HELLO"
+                    generated = axdr.encode(tag, self.string_value_input.text().strip())
+                except Exception:
+                    generated = axdr.encode(tag, "HELLO")
                     
-            elif type_code == '15':  # Integer (1字节)
-                # 基本类型，不需要长度
+            elif type_code in ['15', '17']:  # Integer, Unsigned (1字节)
                 try:
-                    value = self.byte_value_input.value()
-                    if value < 0:
-                        value = 256 + value
-                    generated_data = f"0F {value:02X}"
-                except:
-                    generated_data = "0F 00"
+                    generated = axdr.encode(tag, self.byte_value_input.value())
+                except Exception:
+                    generated = axdr.encode(tag, 0)
                     
-            elif type_code == '16':  # Long (2字节)
-                # 基本类型，不需要长度
+            elif type_code in ['16', '18']:  # Long, LongUnsigned (2字节)
                 try:
-                    value = int(self.word_value_input.text())
-                    if value < 0:
-                        value = 65536 + value
-                    generated_data = f"10 {value:04X}"
-                    generated_data = ' '.join([generated_data[i:i+2] for i in range(0, len(generated_data), 2)])
-                except:
-                    generated_data = "10 00 00"
-                    
-            elif type_code == '17':  # Unsigned (1字节)
-                # 基本类型，不需要长度
-                try:
-                    value = self.byte_value_input.value()
-                    generated_data = f"11 {value:02X}"
-                except:
-                    generated_data = "11 00"
-                    
-            elif type_code == '18':  # LongUnsigned (2字节)
-                # 基本类型，不需要长度
-                try:
-                    value = int(self.word_value_input.text())
-                    generated_data = f"12 {value:04X}"
-                    generated_data = ' '.join([generated_data[i:i+2] for i in range(0, len(generated_data), 2)])
-                except:
-                    generated_data = "12 00 00"
+                    generated = axdr.encode(tag, int(self.word_value_input.text()))
+                except Exception:
+                    generated = axdr.encode(tag, 0)
                     
             elif type_code == '22':  # Enum
-                # 基本类型，不需要长度
                 try:
-                    value = self.enum_value_input.value()
-                    generated_data = f"16 {value:02X}"
-                except:
-                    generated_data = "16 00"
+                    generated = axdr.encode(axdr.ENUM, self.enum_value_input.value())
+                except Exception:
+                    generated = axdr.encode(axdr.ENUM, 0)
                     
             elif type_code in ['23', '24']:  # Float32, Float64
-                # 基本类型，不需要长度
                 try:
-                    import struct
-                    value = float(self.float_value_input.text())
-                    if type_code == '23':  # Float32
-                        hex_bytes = struct.pack('>f', value).hex().upper()
-                        generated_data = f"17 {hex_bytes}"
-                    else:  # Float64
-                        hex_bytes = struct.pack('>d', value).hex().upper()
-                        generated_data = f"18 {hex_bytes}"
-                    generated_data = ' '.join([generated_data[i:i+2] for i in range(0, len(generated_data), 2)])
-                except:
-                    if type_code == '23':
-                        generated_data = "17 00 00 00 00"
-                    else:
-                        generated_data = "18 00 00 00 00 00 00 00 00"
+                    generated = axdr.encode(tag, float(self.float_value_input.text()))
+                except Exception:
+                    generated = axdr.encode(tag, 0.0)
                         
-            elif type_code == '45':  # OAD
-                # 基本类型，不需要长度，4字节固定长度
+            elif type_code == '45':  # OAD，4字节固定长度
                 try:
-                    value_hex = self.oad_value_input.text().strip().replace(' ', '')
-                    if len(value_hex) == 8:
-                        generated_data = f"2D {value_hex}"
-                        generated_data = ' '.join([generated_data[i:i+2] for i in range(0, len(generated_data), 2)])
-                    else:
-                        generated_data = "2D 40 00 02 00"  # 默认值
-                except:
-                    generated_data = "2D 40 00 02 00"
+                    generated = axdr.encode(axdr.OAD, self.parse_hex_value(self.oad_value_input.text(), 8, 0x40000200))
+                except Exception:
+                    generated = axdr.encode(axdr.OAD, 0x40000200)
                     
-            elif type_code == '80':  # OI
-                # 基本类型，不需要长度，2字节固定长度
+            elif type_code == '80':  # OI，2字节固定长度
                 try:
-                    value_hex = self.oi_value_input.text().strip().replace(' ', '')
-                    if len(value_hex) == 4:
-                        generated_data = f"50 {value_hex}"
-                        generated_data = ' '.join([generated_data[i:i+2] for i in range(0, len(generated_data), 2)])
-                    else:
-                        generated_data = "50 40 00"  # 默认值
-                except:
-                    generated_data = "50 40 00"
+                    generated = axdr.encode(axdr.OI, self.parse_hex_value(self.oi_value_input.text(), 4, 0x4000))
+                except Exception:
+                    generated = axdr.encode(axdr.OI, 0x4000)
                     
             else:
-                # 其他类型使用通用输入
+                # 其他类型: 类型码 + 用户输入的HEX内容
                 try:
                     value_hex = self.generic_value_input.text().strip().replace(' ', '')
-                    if value_hex:
-                        generated_data = f"{type_code} {value_hex}"
-                        generated_data = ' '.join([generated_data[i:i+2] for i in range(0, len(generated_data), 2)])
-                    else:
-                        generated_data = f"{type_code} 00"
-                except:
-                    generated_data = f"{type_code} 00"
+                    generated = bytes([tag]) + (bytes.fromhex(value_hex) if value_hex else b'\x00')
+                except Exception:
+                    generated = bytes([tag, 0])
             
             # 显示生成的数据
+            generated_data = generated.hex(' ').upper()
             self.data_display.setPlainText(generated_data)
             self.append_log(f"生成数据类型: {data_type}, 数据: {generated_data}", "info")
             
@@ -1726,14 +1641,8 @@ class MainWindow(QMainWindow):
             config.write(f)
 
     def load_oad_config(self):
-        """加载OAD配置"""
-        try:
-            if os.path.exists('config/oad_config.json'):
-                with open('config/oad_config.json', 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"加载OAD配置失败: {e}")
-        return None
+        """加载OAD配置（与帧命名共用进程内的OadCatalog）"""
+        return get_catalog().load()
 
     def export_frames(self):
         """导出帧列表到CSV文件（从数据库）"""
@@ -2078,9 +1987,9 @@ class MainWindow(QMainWindow):
         # 第一行：对象大类
         oi_class_layout = QHBoxLayout()
         oi_class_layout.addWidget(QLabel("对象大类:"))
-        self.oi_class_combo = QComboBox()
+        self.oi_class_combo = LazyComboBox()
         if self.oad_config and 'OI_CLASS' in self.oad_config:
-            self.oi_class_combo.addItems(self.oad_config['OI_CLASS'].keys())
+            self.oi_class_combo.set_lazy_items(self.oad_config['OI_CLASS'].keys())
         self.oi_class_combo.currentTextChanged.connect(self.on_oi_class_changed)
         oi_class_layout.addWidget(self.oi_class_combo, 1)
         oad_layout.addLayout(oi_class_layout)
@@ -2088,7 +1997,7 @@ class MainWindow(QMainWindow):
         # 第二行：OI(对象标识)
         oi_layout = QHBoxLayout()
         oi_layout.addWidget(QLabel("OI(对象标识):"))
-        self.oi_subclass_combo = QComboBox()
+        self.oi_subclass_combo = LazyComboBox()
         self.oi_subclass_combo.currentTextChanged.connect(self.update_oad_input)
         oi_layout.addWidget(self.oi_subclass_combo, 1)
         oad_layout.addLayout(oi_layout)
@@ -2096,9 +2005,9 @@ class MainWindow(QMainWindow):
         # 第三行：属性ID
         property_layout = QHBoxLayout()
         property_layout.addWidget(QLabel("属性ID:"))
-        self.property_combo = QComboBox()
+        self.property_combo = LazyComboBox()
         if self.oad_config and 'PROPERTY' in self.oad_config:
-            self.property_combo.addItems(self.oad_config['PROPERTY'].keys())
+            self.property_combo.set_lazy_items(self.oad_config['PROPERTY'].keys())
         self.property_combo.currentTextChanged.connect(self.update_oad_input)
         property_layout.addWidget(self.property_combo, 1)
         oad_layout.addLayout(property_layout)
@@ -2106,9 +2015,9 @@ class MainWindow(QMainWindow):
         # 第四行：索引
         index_layout = QHBoxLayout()
         index_layout.addWidget(QLabel("索引:"))
-        self.index_combo = QComboBox()
+        self.index_combo = LazyComboBox()
         if self.oad_config and 'INDEX' in self.oad_config:
-            self.index_combo.addItems(self.oad_config['INDEX'].keys())
+            self.index_combo.set_lazy_items(self.oad_config['INDEX'].keys())
         self.index_combo.currentTextChanged.connect(self.update_oad_input)
         index_layout.addWidget(self.index_combo, 1)
         oad_layout.addLayout(index_layout)
@@ -2456,14 +2365,8 @@ class MainWindow(QMainWindow):
             if column == 1 and self.editing_frame_name is not None:  # 名称列
                 new_name = self.frame_table.item(row, 1).text()
                 if self.editing_frame_name != new_name and self.protocol:
-                    # 获取帧数据
-                    frame_data = self.protocol.get_frame(self.editing_frame_name)
-                    if frame_data:
-                        # 使用新名称保存帧数据
-                        self.protocol.save_frame(new_name, frame_data)
-                        # 删除旧名称的帧数据
-                        self.protocol.frames.pop(self.editing_frame_name, None)
-                        
+                    # 名称改为引用原帧（帧数据不复制）
+                    if self.protocol.rename_frame(self.editing_frame_name, new_name):
                         # 同步到数据库，但不发射信号避免循环
                         if hasattr(self, 'database') and self.database:
                             frames = self.database.get_all_frames()
@@ -2620,8 +2523,7 @@ class MainWindow(QMainWindow):
     def load_style_preference(self):
         """从配置文加载样式选择"""
         try:
-            config = configparser.ConfigParser()
-            config.read('config/style_config.ini')
+            config = get_config_cache().get('config/style_config.ini') or {}
             if 'Style' in config and 'theme' in config['Style']:
                 style_name = config['Style']['theme']
                 QApplication.setStyle(style_name)
@@ -2787,7 +2689,8 @@ class MainWindow(QMainWindow):
             'baudrate': self.baud_combo.currentText(),
             'parity': self.parity_combo.currentText(),
             'bytesize': self.bytesize_combo.currentText(),
-            'stopbits': self.stopbits_combo.currentText()
+            'stopbits': self.stopbits_combo.currentText(),
+            'max_frame_size': self.max_frame_size or 0
         }
         
         try:
@@ -2813,14 +2716,14 @@ class MainWindow(QMainWindow):
                     'baudrate': '9600',
                     'parity': '无校验(N)',
                     'bytesize': '8',
-                    'stopbits': '1'
+                    'stopbits': '1',
+                    'max_frame_size': 0
                 }
                 with open(config_path, 'w', encoding='utf-8') as f:
                     json.dump(default_config, f, ensure_ascii=False, indent=4)
                 config = default_config
             else:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                config = get_config_cache().get(config_path)
             
             # 用配置到UI
             # 设置波特率
@@ -2843,6 +2746,12 @@ class MainWindow(QMainWindow):
             if index >= 0:
                 self.stopbits_combo.setCurrentIndex(index)
             
+            # 最大帧长，0表示不限制
+            try:
+                self.max_frame_size = int(config.get('max_frame_size') or 0) or None
+            except (TypeError, ValueError):
+                self.max_frame_size = None
+            
             # 设置串口如果存在）
             saved_port = config.get('port', '')
             if saved_port:
@@ -2895,8 +2804,7 @@ class MainWindow(QMainWindow):
             return default_config
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return get_config_cache().get(config_path)
         except Exception as e:
             print(f"加载主题配置失败: {e}")
             return None
@@ -3057,8 +2965,8 @@ class MainWindow(QMainWindow):
                 frame_name = self.frame_table.item(row, 1).text()
                 
                 # 从协议对象中删除数据
-                if self.protocol and frame_name in self.protocol.frames:
-                    del self.protocol.frames[frame_name]
+                if self.protocol:
+                    self.protocol.remove_frame(frame_name)
                 
                 # 从表格中删除行
                 self.frame_table.removeRow(row)
@@ -3145,14 +3053,8 @@ class MainWindow(QMainWindow):
             QTimer.singleShot(100, self.send_next_batch_frame)
 
     def load_oad_config(self):
-        """加载OAD配置"""
-        try:
-            if os.path.exists('config/oad_config.json'):
-                with open('config/oad_config.json', 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"加载OAD配置失败: {e}")
-        return None
+        """加载OAD配置（与帧命名共用进程内的OadCatalog）"""
+        return get_catalog().load()
 
     def create_default_oad_config(self):
         """创建默认OAD配置"""
@@ -0,0 +1,286 @@
+import asyncio
+from collections import deque, namedtuple
+from typing import Dict, List, Optional, Union
+
+from protocol.frame_delimiter import FrameDelimiter, serial_idle_timeout
+from protocol.frame_view import FrameView
+from protocol.split_frame import CONTROL_SPLIT, SplitFrameError, SplitFrameReassembler
+from protocol.transactions import DEFAULT_WINDOW, UNKEYED, apdu_piid, request_key, server_key
+
+READ_SIZE = 4096
+DEFAULT_UNSOLICITED_QUEUE = 256
+# Silence after which a partial frame is dropped as truncated (serial links derive it from the baud rate)
+DEFAULT_IDLE_TIMEOUT = 0.5
+
+
+class Response(namedtuple('Response', 'frame apdu checksum')):
+    """A received frame with its reassembled APDU and (hcs_ok, fcs_ok)"""
+    __slots__ = ()
+
+
+class AsyncFrameTransport:
+    """698.45 frame transport over an asyncio stream pair
+
+    One reader task per link delimits frames, acknowledges split frames and
+    routes each response to its request by (SA, PIID), so one event loop can
+    drive many ports without a thread per port. Frames no request is waiting
+    for (reports, late responses) are queued for `async for`.
+
+    Subclasses implement _open_streams().
+
+    Args:
+        window: Maximum number of outstanding requests
+        max_unsolicited: Unsolicited frames kept before the oldest is dropped
+        idle_timeout: Seconds of silence after which a partial frame is dropped
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, max_unsolicited: int = DEFAULT_UNSOLICITED_QUEUE,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.window = window
+        self.reader = None
+        self.writer = None
+        self.delimiter = FrameDelimiter(idle_timeout=idle_timeout)
+        self.split_reassembler = SplitFrameReassembler()
+        self._slots = asyncio.Semaphore(window)
+        self._pending: Dict[tuple, deque] = {}
+        self._unsolicited = asyncio.Queue(max_unsolicited)
+        self._fragment_lock = asyncio.Lock()
+        self._confirm: Optional[asyncio.Future] = None
+        self._reader_task = None
+
+    async def _open_streams(self):
+        """Return (StreamReader, StreamWriter)"""
+        raise NotImplementedError
+
+    async def open(self):
+        """Open the link and start the reader task"""
+        if self.is_connected():
+            return
+        self.reader, self.writer = await self._open_streams()
+        self.delimiter.reset()
+        self.split_reassembler.reset()
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_loop())
+
+    async def close(self):
+        """Stop the reader task, close the link and wake every pending request"""
+        task, self._reader_task = self._reader_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self.writer = None
+            self.reader = None
+        self._fail_pending()
+
+    def is_connected(self) -> bool:
+        return self._reader_task is not None and not self._reader_task.done()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # ---- requests ----
+
+    async def request(self, frames: Union[bytes, List[bytes]], timeout: int = 1000) -> Optional[bytes]:
+        """Send a request (one frame or a list of split frames) and return the complete response APDU
+
+        Returns:
+            The reassembled response APDU, or None on timeout
+        """
+        response = await self.exchange(frames, timeout)
+        return response.apdu if response else None
+
+    async def exchange(self, frames: Union[bytes, List[bytes]], timeout: int = 1000,
+                       retries: int = 2) -> Optional[Response]:
+        """Send a request and wait for the response routed to it
+
+        Args:
+            frames: One frame or split frames as produced by protocol.split_frame
+            timeout: Response (and per-fragment confirmation) timeout in ms
+            retries: Resend attempts per fragment when no confirmation arrives
+
+        Returns:
+            Response, or None on timeout
+        """
+        if isinstance(frames, (bytes, bytearray)):
+            frames = [frames]
+        if not self.is_connected():
+            raise ConnectionError("Link not open")
+        if len(frames) == 1:
+            return await self._transact(frames[0], frames[0], timeout)
+
+        # Fragment confirmations carry no PIID, so split requests go out one at a time
+        async with self._fragment_lock:
+            last = len(frames) - 1
+            for sequence, frame in enumerate(frames[:last]):
+                sequence &= 0x0FFF
+                for attempt in range(retries + 1):
+                    if await self._send_fragment(sequence, frame, timeout):
+                        break
+                else:
+                    return None
+            # The last fragment is answered by the response to the whole APDU
+            for attempt in range(retries + 1):
+                response = await self._transact(frames[0], frames[last], timeout)
+                if response:
+                    return response
+            return None
+
+    async def _send_fragment(self, sequence, frame, timeout):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout / 1000.0
+        self.writer.write(frame)
+        await self.writer.drain()
+        while True:
+            self._confirm = loop.create_future()
+            try:
+                confirmed = await asyncio.wait_for(self._confirm, max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self._confirm = None
+            if confirmed == sequence:
+                return True
+
+    async def _transact(self, first_frame, frame_data, timeout):
+        """Register a waiter keyed by the (SA, PIID) of first_frame, send frame_data and await the response"""
+        seconds = timeout / 1000.0
+        key = request_key(first_frame)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), seconds)
+        except asyncio.TimeoutError:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(key, deque()).append(future)
+        try:
+            self.writer.write(frame_data)
+            await self.writer.drain()
+            return await asyncio.wait_for(future, seconds)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._pending.get(key)
+            if waiters is not None and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._pending[key]
+            self._slots.release()
+
+    # ---- receiving ----
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Response:
+        """Next unsolicited frame (report, or a response no request was waiting for)"""
+        if not self.is_connected() and self._unsolicited.empty():
+            raise StopAsyncIteration
+        getter = asyncio.ensure_future(self._unsolicited.get())
+        waiters = [getter] if self._reader_task is None else [getter, self._reader_task]
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        if getter.done():
+            return getter.result()
+        getter.cancel()
+        raise StopAsyncIteration
+
+    async def _read_loop(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                data = await self.reader.read(READ_SIZE)
+                if not data:
+                    break  # Link closed by peer
+                for frame, checksum in self.delimiter.feed(data, loop.time()):
+                    self._dispatch(frame, checksum)
+                await self.writer.drain()
+        finally:
+            self._fail_pending()
+
+    def _dispatch(self, frame, checksum):
+        hcs_ok, fcs_ok = checksum
+        if not (hcs_ok and fcs_ok) and frame[3] & CONTROL_SPLIT:
+            # Not acknowledged, so the peer resends the fragment
+            print("Split frame checksum error, dropped without acknowledgement")
+            return
+        try:
+            result = self.split_reassembler.feed(frame)
+        except (SplitFrameError, IndexError) as e:
+            print(f"Split frame reassembly error: {e}")
+            return
+        if result.ack:
+            self.writer.write(result.ack)
+        if result.confirmed is not None and self._confirm is not None and not self._confirm.done():
+            self._confirm.set_result(result.confirmed)
+        if result.apdu is None:
+            return
+
+        response = Response(frame, result.apdu, checksum)
+        piid = apdu_piid(result.apdu)
+        address = server_key(FrameView(frame))
+        for key in ((address, piid), (None, piid), UNKEYED):
+            waiters = self._pending.get(key)
+            while waiters:
+                future = waiters.popleft()
+                if not future.done():
+                    future.set_result(response)
+                    return
+        if self._unsolicited.full():
+            self._unsolicited.get_nowait()
+        self._unsolicited.put_nowait(response)
+
+    def _fail_pending(self):
+        for waiters in self._pending.values():
+            for future in waiters:
+                if not future.done():
+                    future.set_result(None)
+        self._pending.clear()
+
+
+class AsyncTcpHandler(AsyncFrameTransport):
+    """698.45 link over TCP (e.g. a concentrator or a serial server)"""
+
+    def __init__(self, host: str, port: int, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+
+    async def _open_streams(self):
+        return await asyncio.open_connection(self.host, self.port)
+
+
+class AsyncSerialHandler(AsyncFrameTransport):
+    """698.45 link over a serial port, requires pyserial-asyncio"""
+
+    def __init__(self, port: str, baudrate: int = 9600, parity: str = 'N', bytesize: int = 8,
+                 stopbits: int = 1, **kwargs):
+        kwargs.setdefault('idle_timeout', serial_idle_timeout(baudrate))
+        super().__init__(**kwargs)
+        self.port = port
+        self.baudrate = baudrate
+        self.parity = parity
+        self.bytesize = bytesize
+        self.stopbits = stopbits
+
+    async def _open_streams(self):
+        try:
+            import serial_asyncio
+        except ImportError as e:
+            raise ImportError("AsyncSerialHandler requires pyserial-asyncio (pip install pyserial-asyncio)") from e
+        return await serial_asyncio.open_serial_connection(
+            url=self.port,
+            baudrate=self.baudrate,
+            parity=self.parity,
+            bytesize=self.bytesize,
+            stopbits=self.stopbits
+        )
@@ -0,0 +1,123 @@
+import atexit
+import configparser
+import hashlib
+import json
+import os
+import pickle
+import threading
+from typing import Any, Dict, Optional
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = 'config/config_cache.pickle'
+
+
+def _parse_json(raw: bytes) -> Any:
+    return json.loads(raw.decode('utf-8'))
+
+
+def _parse_ini(raw: bytes) -> Dict[str, Dict[str, str]]:
+    config = configparser.ConfigParser()
+    config.read_string(raw.decode('utf-8'))
+    return {section: dict(config[section]) for section in config.sections()}
+
+
+# 扩展名 -> 解析函数
+PARSERS = {
+    '.json': _parse_json,
+    '.ini': _parse_ini,
+}
+
+
+class ConfigCache:
+    """
+    配置文件编译缓存
+
+    各配置文件解析后的结果按源文件内容的SHA1保存在一个pickle文件中，启动时一次读入；
+    源文件大小和修改时间未变时直接使用缓存，变化时按内容哈希判断是否需要重新解析。
+    ini文件解析为 {节: {键: 值}} 字典。返回的对象为缓存共享，调用方不应修改。
+    重新解析的结果只标记待保存，由flush()（进程退出时自动调用）一次写入缓存文件
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        # 源文件绝对路径 -> (大小, 修改时间ns, SHA1, 解析结果)
+        self._entries: Dict[str, tuple] = {}
+        self._dirty = False  # 有未写入缓存文件的更新
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'rb') as f:
+                blob = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"配置缓存无效，将重新生成: {e}")
+            return
+        if isinstance(blob, dict) and blob.get('version') == CACHE_VERSION:
+            self._entries = blob.get('entries', {})
+
+    def save(self):
+        """写入缓存文件（先写临时文件再替换，中途退出不会留下半个缓存）"""
+        directory = os.path.dirname(self.cache_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        temp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                pickle.dump({'version': CACHE_VERSION, 'entries': self._entries}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.cache_path)
+            self._dirty = False
+        except OSError as e:
+            print(f"保存配置缓存失败: {e}")
+
+    def flush(self):
+        """有未保存的更新时写入缓存文件"""
+        with self._lock:
+            if self._dirty:
+                self.save()
+
+    def get(self, path: str) -> Optional[Any]:
+        """
+        返回配置文件的解析结果，文件不存在时返回None
+
+        Raises:
+            Exception: 文件内容无法解析（json.JSONDecodeError、configparser.Error等）
+        """
+        key = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                return entry[3]
+
+            with open(path, 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha1(raw).hexdigest()
+            if entry is not None and entry[2] == digest:
+                data = entry[3]
+            else:
+                parser = PARSERS.get(os.path.splitext(path)[1].lower(), _parse_json)
+                data = parser(raw)
+            self._entries[key] = (stat.st_size, stat.st_mtime_ns, digest, data)
+            self._dirty = True
+            return data
+
+
+_cache: Optional[ConfigCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_config_cache() -> ConfigCache:
+    """返回进程内共享的ConfigCache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ConfigCache()
+            atexit.register(_cache.flush)
+        return _cache
@@ -2,6 +2,15 @@ import sqlite3
 import os
 from typing import List, Dict, Optional, Tuple
 from PySide6.QtCore import QObject, Signal
+from protocol.frame_store import content_key
+
+# 新写入的帧只在frames表保存帧内容哈希（frame_content列写入空串，旧版数据库该列为NOT NULL无默认值），
+# 帧内容在frame_contents表中每种只保存一份；迁移前已有的行保留frame_content原值，旧版程序仍可读取
+FRAME_SELECT = '''
+    SELECT f.id, f.name, COALESCE(c.content, f.frame_content), f.operation, f.status, f.match_enabled,
+           f.match_rule, f.match_mode, f.test_result, f.timeout_ms, f.created_at, f.updated_at, f.frame_hash
+    FROM frames f LEFT JOIN frame_contents c ON c.hash = f.frame_hash
+'''
 
 class DatabaseHandler(QObject):
     """数据库操作类，处理帧数据的CRUD操作"""
@@ -30,7 +39,8 @@ class DatabaseHandler(QObject):
                 CREATE TABLE IF NOT EXISTS frames (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     name TEXT NOT NULL,
-                    frame_content TEXT NOT NULL,
+                    frame_content TEXT NOT NULL DEFAULT '',
+                    frame_hash TEXT,
                     operation TEXT DEFAULT '单帧发送',
                     status TEXT DEFAULT '未发送',
                     match_enabled INTEGER DEFAULT 0,
@@ -43,6 +53,16 @@ class DatabaseHandler(QObject):
                 )
             ''')
             
+            # 创建帧内容表，按内容哈希去重
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS frame_contents (
+                    hash TEXT PRIMARY KEY,
+                    content TEXT NOT NULL
+                )
+            ''')
+            self._migrate_frame_contents(cursor)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_frames_hash ON frames(frame_hash)")
+            
             # 创建触发器，在更新时自动更新updated_at字段
             cursor.execute('''
                 CREATE TRIGGER IF NOT EXISTS update_frames_timestamp 
@@ -61,6 +81,51 @@ class DatabaseHandler(QObject):
             print(f"数据库初始化失败: {e}")
             raise
     
+    def _migrate_frame_contents(self, cursor):
+        """旧版数据库：增加frame_hash列，把各行的帧内容复制到frame_contents表（frame_content原值保留）"""
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(frames)")]
+        if 'frame_hash' not in columns:
+            cursor.execute("ALTER TABLE frames ADD COLUMN frame_hash TEXT")
+        rows = cursor.execute("SELECT id, frame_content FROM frames WHERE frame_hash IS NULL").fetchall()
+        if rows:
+            updates = [(self._store_content(cursor, frame_content), frame_id) for frame_id, frame_content in rows]
+            cursor.executemany("UPDATE frames SET frame_hash = ? WHERE id = ?", updates)
+            print(f"已将 {len(rows)} 条帧内容复制到frame_contents表")
+    
+    @staticmethod
+    def _store_content(cursor, frame_content: str) -> str:
+        """保存帧内容（相同内容只保存一份），返回内容哈希"""
+        frame_hash, content = content_key(frame_content or '')
+        cursor.execute("INSERT OR IGNORE INTO frame_contents (hash, content) VALUES (?, ?)",
+                       (frame_hash, content))
+        return frame_hash
+    
+    @staticmethod
+    def _prune_contents(cursor):
+        """删除不再被任何帧引用的帧内容"""
+        cursor.execute('''
+            DELETE FROM frame_contents
+            WHERE hash NOT IN (SELECT frame_hash FROM frames WHERE frame_hash IS NOT NULL)
+        ''')
+    
+    @staticmethod
+    def _row_to_dict(row) -> Dict:
+        return {
+            'id': row[0],
+            'name': row[1],
+            'frame_content': row[2],
+            'operation': row[3],
+            'status': row[4],
+            'match_enabled': bool(row[5]),
+            'match_rule': row[6] or '',
+            'match_mode': row[7] or 'HEX',
+            'test_result': row[8] or '',
+            'timeout_ms': row[9] or 1000,
+            'created_at': row[10],
+            'updated_at': row[11],
+            'frame_hash': row[12]
+        }
+    
     def add_frame(self, name: str, frame_content: str, **kwargs) -> int:
         """添加新帧，返回记录ID"""
         try:
@@ -79,11 +144,12 @@ class DatabaseHandler(QObject):
             }
             defaults.update(kwargs)
             
+            frame_hash = self._store_content(cursor, frame_content)
             cursor.execute('''
-                INSERT INTO frames (name, frame_content, operation, status, match_enabled, 
+                INSERT INTO frames (name, frame_content, frame_hash, operation, status, match_enabled, 
                                   match_rule, match_mode, test_result, timeout_ms)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (name, frame_content, defaults['operation'], defaults['status'],
+                VALUES (?, '', ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (name, frame_hash, defaults['operation'], defaults['status'],
                   defaults['match_enabled'], defaults['match_rule'], defaults['match_mode'],
                   defaults['test_result'], defaults['timeout_ms']))
             
@@ -100,41 +166,90 @@ class DatabaseHandler(QObject):
             print(f"添加帧失败: {e}")
             raise
     
+    def add_frames_bulk(self, frames, batch_size: int = 1000, **kwargs) -> int:
+        """批量添加帧，frames为(name, frame_content)的可迭代对象，按批写入后只发射一次变更信号
+
+        Args:
+            frames: (名称, 帧内容)可迭代对象，可为生成器
+            batch_size: 每批写入的记录数
+            **kwargs: 各帧共用的字段值，同add_frame
+
+        Returns:
+            写入的记录数
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            # 设置默认值
+            defaults = {
+                'operation': '单帧发送',
+                'status': '未发送',
+                'match_enabled': 0,
+                'match_rule': '',
+                'match_mode': 'HEX',
+                'test_result': '',
+                'timeout_ms': 1000
+            }
+            defaults.update(kwargs)
+            common = (defaults['operation'], defaults['status'], defaults['match_enabled'],
+                      defaults['match_rule'], defaults['match_mode'], defaults['test_result'],
+                      defaults['timeout_ms'])
+
+            count = 0
+            batch = []
+            contents = {}  # 本批新出现的帧内容: 哈希 -> 规范文本
+            known = {}  # 帧内容文本 -> 哈希，重复的帧内容不再计算哈希
+            for name, frame_content in frames:
+                frame_hash = known.get(frame_content)
+                if frame_hash is None:
+                    frame_hash, content = content_key(frame_content or '')
+                    known[frame_content] = frame_hash
+                    contents[frame_hash] = content
+                batch.append((name, frame_hash) + common)
+                if len(batch) >= batch_size:
+                    count += self._insert_batch(cursor, batch, contents)
+                    batch = []
+                    contents = {}
+            if batch:
+                count += self._insert_batch(cursor, batch, contents)
+
+            conn.commit()
+            conn.close()
+
+            # 发射数据变更信号
+            self.data_changed.emit()
+
+            return count
+
+        except Exception as e:
+            print(f"批量添加帧失败: {e}")
+            raise
+
+    @staticmethod
+    def _insert_batch(cursor, batch, contents) -> int:
+        cursor.executemany("INSERT OR IGNORE INTO frame_contents (hash, content) VALUES (?, ?)",
+                           contents.items())
+        cursor.executemany('''
+            INSERT INTO frames (name, frame_content, frame_hash, operation, status, match_enabled,
+                              match_rule, match_mode, test_result, timeout_ms)
+            VALUES (?, '', ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+        return len(batch)
+
     def get_all_frames(self) -> List[Dict]:
         """获取所有帧数据，按ID升序排列"""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT id, name, frame_content, operation, status, match_enabled,
-                       match_rule, match_mode, test_result, timeout_ms, created_at, updated_at
-                FROM frames
-                ORDER BY id ASC
-            ''')
+            cursor.execute(FRAME_SELECT + "ORDER BY f.id ASC")
             
             rows = cursor.fetchall()
             conn.close()
             
             # 转换为字典列表
-            frames = []
-            for row in rows:
-                frames.append({
-                    'id': row[0],
-                    'name': row[1],
-                    'frame_content': row[2],
-                    'operation': row[3],
-                    'status': row[4],
-                    'match_enabled': bool(row[5]),
-                    'match_rule': row[6] or '',
-                    'match_mode': row[7] or 'HEX',
-                    'test_result': row[8] or '',
-                    'timeout_ms': row[9] or 1000,
-                    'created_at': row[10],
-                    'updated_at': row[11]
-                })
-            
-            return frames
+            return [self._row_to_dict(row) for row in rows]
             
         except Exception as e:
             print(f"获取帧数据失败: {e}")
@@ -167,6 +282,12 @@ class DatabaseHandler(QObject):
                     if field == 'match_enabled':
                         update_fields.append(f"{field} = ?")
                         values.append(1 if value else 0)
+                    elif field == 'frame_content':
+                        update_fields.append("frame_hash = ?")
+                        values.append(self._store_content(cursor, value))
+                        # 迁移前的行保留的frame_content同步更新，避免旧版程序读到过期内容
+                        update_fields.append("frame_content = CASE WHEN frame_content = '' THEN '' ELSE ? END")
+                        values.append(value)
                     else:
                         update_fields.append(f"{field} = ?")
                         values.append(value)
@@ -178,6 +299,9 @@ class DatabaseHandler(QObject):
             sql = f"UPDATE frames SET {', '.join(update_fields)} WHERE id = ?"
             
             cursor.execute(sql, values)
+            updated = cursor.rowcount > 0
+            if 'frame_content' in kwargs:
+                self._prune_contents(cursor)
             conn.commit()
             conn.close()
             
@@ -185,7 +309,7 @@ class DatabaseHandler(QObject):
             if emit_signal:
                 self.data_changed.emit()
             
-            return cursor.rowcount > 0
+            return updated
             
         except Exception as e:
             print(f"更新帧失败: {e}")
@@ -198,6 +322,8 @@ class DatabaseHandler(QObject):
             cursor = conn.cursor()
             
             cursor.execute("DELETE FROM frames WHERE id = ?", (frame_id,))
+            deleted = cursor.rowcount > 0
+            self._prune_contents(cursor)
             
             conn.commit()
             conn.close()
@@ -205,7 +331,7 @@ class DatabaseHandler(QObject):
             # 发射数据变更信号
             self.data_changed.emit()
             
-            return cursor.rowcount > 0
+            return deleted
             
         except Exception as e:
             print(f"删除帧失败: {e}")
@@ -224,6 +350,7 @@ class DatabaseHandler(QObject):
             cursor.execute(f"DELETE FROM frames WHERE id IN ({placeholders})", frame_ids)
             
             deleted_count = cursor.rowcount
+            self._prune_contents(cursor)
             conn.commit()
             conn.close()
             
@@ -242,30 +369,13 @@ class DatabaseHandler(QObject):
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT id, name, frame_content, operation, status, match_enabled,
-                       match_rule, match_mode, test_result, timeout_ms, created_at, updated_at
-                FROM frames WHERE id = ?
-            ''', (frame_id,))
+            cursor.execute(FRAME_SELECT + "WHERE f.id = ?", (frame_id,))
             
             row = cursor.fetchone()
             conn.close()
             
             if row:
-                return {
-                    'id': row[0],
-                    'name': row[1],
-                    'frame_content': row[2],
-                    'operation': row[3],
-                    'status': row[4],
-                    'match_enabled': bool(row[5]),
-                    'match_rule': row[6] or '',
-                    'match_mode': row[7] or 'HEX',
-                    'test_result': row[8] or '',
-                    'timeout_ms': row[9] or 1000,
-                    'created_at': row[10],
-                    'updated_at': row[11]
-                }
+                return self._row_to_dict(row)
             return None
             
         except Exception as e:
@@ -279,6 +389,7 @@ class DatabaseHandler(QObject):
             cursor = conn.cursor()
             
             cursor.execute("DELETE FROM frames")
+            cursor.execute("DELETE FROM frame_contents")
             
             conn.commit()
             conn.close()
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+from utils.config_cache import get_config_cache
+
+DEFAULT_OAD_CONFIG = 'config/oad_config.json'
+
+
+def _display_name(key: str) -> str:
+    """配置键去掉编码前缀，例: "40000200-日期时间" -> "日期时间" """
+    return key.split('-', 1)[1] if '-' in key else key
+
+
+class OadCatalog:
+    """
+    OAD/OI名称索引，进程内只加载一次配置文件，文件修改时间变化时才重新加载
+
+    索引:
+        OI -> 名称: 65536项列表，按OI直接取值
+        OAD -> 名称、名称 -> OAD: 字典
+    """
+
+    def __init__(self, path: str = DEFAULT_OAD_CONFIG, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval  # 两次检查文件修改时间的最小间隔(秒)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._mtime = None
+        self._checked = None
+        self._config = None
+        self._oi_names: List[Optional[str]] = [None] * 0x10000
+        self._oad_names: Dict[int, str] = {}
+        self._name_oads: Dict[str, str] = {}
+
+    def _build(self, config: Optional[dict]):
+        oi_names: List[Optional[str]] = [None] * 0x10000
+        oad_names: Dict[int, str] = {}
+        name_oads: Dict[str, str] = {}
+        if config:
+            for key, value in config.get('OAD', {}).items():
+                try:
+                    oad = int(value, 16)
+                except ValueError:
+                    continue
+                oad_names.setdefault(oad, _display_name(key))
+                name_oads.setdefault(key, value.upper())
+                name_oads.setdefault(_display_name(key), value.upper())
+            for subclasses in config.get('OI_SUBCLASS', {}).values():
+                for key, value in subclasses.items():
+                    try:
+                        oi = int(value, 16)
+                    except ValueError:
+                        continue
+                    if oi < 0x10000 and oi_names[oi] is None:
+                        oi_names[oi] = _display_name(key)
+        self._config = config
+        self._oi_names = oi_names
+        self._oad_names = oad_names
+        self._name_oads = name_oads
+
+    def refresh(self, force: bool = False):
+        """检查配置文件修改时间，变化时重新加载；force为False时按check_interval限制检查频率"""
+        now = time.monotonic()
+        if not force and self._checked is not None and now - self._checked < self.check_interval:
+            return
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if self._loaded and mtime == self._mtime:
+                return
+            config = None
+            if mtime is not None:
+                try:
+                    config = get_config_cache().get(self.path)
+                except Exception as e:
+                    print(f"读取OAD配置失败: {e}")
+            self._mtime = mtime
+            self._loaded = True
+            self._build(config)
+
+    @property
+    def config(self) -> Optional[dict]:
+        """原始配置字典，文件不存在或无法解析时为None"""
+        self.refresh()
+        return self._config
+
+    def load(self) -> Optional[dict]:
+        """立即检查文件并返回配置（界面加载、配置文件刚写入时使用）"""
+        self.refresh(force=True)
+        return self._config
+
+    def oi_name(self, oi: int) -> Optional[str]:
+        """OI -> 名称，未配置时为None"""
+        self.refresh()
+        return self._oi_names[oi & 0xFFFF]
+
+    def oad_name(self, oad: Union[int, str]) -> Optional[str]:
+        """OAD -> 名称，未配置时为None"""
+        self.refresh()
+        if isinstance(oad, str):
+            try:
+                oad = int(oad, 16)
+            except ValueError:
+                return None
+        return self._oad_names.get(oad)
+
+    def oad_for_name(self, name: str) -> Optional[str]:
+        """名称（配置键或去掉编码前缀的名称）-> OAD十六进制字符串"""
+        self.refresh()
+        return self._name_oads.get(name)
+
+    def name(self, oad: str) -> str:
+        """
+        OAD的显示名称：先查预定义OAD，再按OAD的OI查OI子类，都没有时返回"OAD_<oad>"
+        """
+        name = self.oad_name(oad)
+        if name is None and len(oad) == 8:
+            try:
+                name = self._oi_names[int(oad[:4], 16)]
+            except ValueError:
+                name = None
+        return name if name is not None else f"OAD_{oad}"
+
+
+_catalogs: Dict[str, OadCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path: str = DEFAULT_OAD_CONFIG) -> OadCatalog:
+    """返回进程内共享的OadCatalog"""
+    key = os.path.abspath(path)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = OadCatalog(path)
+        return catalog
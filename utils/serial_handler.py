@@ -4,6 +4,39 @@ import time
 import serial
 import serial.tools.list_ports
 import traceback
+from protocol.frame_delimiter import FrameDelimiter, serial_idle_timeout
+from protocol.split_frame import CONTROL_SPLIT, SplitFrameError, SplitFrameReassembler
+from protocol.transactions import TransactionTable
+
+class DispatchLatency:
+    """Running statistics of the delay between bytes being read and the complete frame being dispatched"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = None
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def summary(self):
+        """Return a dict with frame count and last/mean/max latency in milliseconds"""
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            'frames': self.count,
+            'last_ms': None if self.last is None else self.last * 1000,
+            'mean_ms': mean * 1000,
+            'max_ms': self.max * 1000
+        }
+
 
 class SerialHandler(QObject):
     data_received = Signal(str)  # Define signal for received data
@@ -11,17 +44,33 @@ class SerialHandler(QObject):
     def __init__(self):
         super().__init__()  # Initialize the QObject parent class
         self.serial = None
+        self.receive_thread = None
         self.stop_receive_thread = False  # New flag bit
         self._is_connected = False  # Add connection status flag
         
-        # Frame reassembly buffer
-        self.frame_buffer = bytearray()
-        self.last_receive_time = 0
-        self.frame_timeout = 0.05  # 50ms timeout for frame completion
+        # Frame reassembly: delimits frames by the length field and keeps
+        # a running HCS/FCS over the frame being reassembled
+        self.delimiter = FrameDelimiter()
         
-        # Response frame event and data
-        self.response_event = threading.Event()
+        # Outstanding requests keyed by (SA, PIID); responses are routed to their waiter
+        self.transactions = TransactionTable()
+        
+        # Last response received by a request
         self.response_frame = None
+        self.response_checksum = (None, None)  # (hcs_ok, fcs_ok) of response_frame
+        self.last_frame_checksum = (None, None)
+        
+        # Link-layer split frame reassembly; response_apdu holds the complete APDU of response_frame
+        self.split_reassembler = SplitFrameReassembler()
+        self.response_apdu = None
+        
+        # Split frame confirmations received while sending fragments
+        self.confirm_event = threading.Event()
+        self.confirmed_sequence = None
+        self.fragment_lock = threading.Lock()
+        
+        # Delay from the read that completed a frame to its dispatch
+        self.latency = DispatchLatency()
         
     def get_available_ports(self):
         """Get a list of available serial ports"""
@@ -55,7 +104,7 @@ class SerialHandler(QObject):
                 parity=parity,
                 bytesize=bytesize,
                 stopbits=stopbits,
-                timeout=0.1  # Short timeout for non-blocking read
+                timeout=None  # Blocking read; the receive thread wakes on data or cancel_read()
             )
             
             # Verify if the serial port is actually open
@@ -64,7 +113,10 @@ class SerialHandler(QObject):
             
             print(f"Serial port successfully opened: {self.serial.port}")
             self.stop_receive_thread = False
-            self.frame_buffer.clear()  # Clear frame buffer
+            self.delimiter.reset()  # Clear frame buffer
+            self.delimiter.idle_timeout = serial_idle_timeout(baudrate)
+            self.split_reassembler.reset()
+            self.latency.reset()
             self.start_receive_thread()
             self._is_connected = True
             print("=== Serial port connection completed ===\n")
@@ -87,12 +139,17 @@ class SerialHandler(QObject):
             if self.serial:
                 if self.serial.is_open:
                     self.stop_receive_thread = True
-                    time.sleep(0.2)  # Give the thread more time to exit
+                    self.serial.cancel_read()  # Wake the blocked receive thread
+                    if self.receive_thread and self.receive_thread is not threading.current_thread():
+                        self.receive_thread.join(1.0)
                     self.serial.close()
                     print("Serial port closed")
+                    print(f"Dispatch latency: {self.latency.summary()}")
                 self.serial = None
             self._is_connected = False
-            self.frame_buffer.clear()  # Clear frame buffer
+            self.delimiter.reset()  # Clear frame buffer
+            self.split_reassembler.reset()
+            self.transactions.cancel_all()
             print("=== Serial port disconnection completed ===\n")
         except Exception as e:
             print("\n=== Serial port disconnection error ===")
@@ -123,56 +180,189 @@ class SerialHandler(QObject):
             return False
     
     def send_frame(self, frame_data, timeout=1000):
-        """Send data frame and wait for response"""
+        """Send data frame and wait for response
+        
+        With only this request outstanding, a response whose SA or PIID does not
+        match (e.g. a fixed PIID from the frame list) is still accepted.
+        """
+        transaction = self.exchange([frame_data], timeout, tolerant=True)
+        return (True, transaction.frame) if transaction else (False, None)
+
+    def send_fragments(self, frames, timeout=1000, retries=2):
+        """Send split frames one by one, waiting for the confirmation of each fragment
+        
+        Args:
+            frames: Split frames as produced by protocol.split_frame (frame i carries sequence i)
+            timeout: Per-fragment confirmation / final response timeout in ms
+            retries: Resend attempts per fragment when no confirmation arrives
+            
+        Returns:
+            (success, response frame) like send_frame
+        """
+        transaction = self.exchange(frames, timeout, retries, tolerant=True)
+        return (True, transaction.frame) if transaction else (False, None)
+
+    def request(self, frames, timeout=1000):
+        """Send a request (one frame or a list of split frames) and return the complete response APDU
+        
+        Several threads may have requests outstanding at once (up to the transaction
+        window); each response is routed to its request by (SA, PIID).
+        
+        Returns:
+            The reassembled response APDU, or None on timeout
+        """
+        if isinstance(frames, (bytes, bytearray)):
+            frames = [frames]
+        transaction = self.exchange(frames, timeout)
+        return transaction.apdu if transaction else None
+
+    def exchange(self, frames, timeout=1000, retries=2, tolerant=False):
+        """Send a request and wait for the response routed to it
+        
+        Args:
+            tolerant: Accept a mismatched response when this is the only outstanding request
+        
+        Returns:
+            The completed Transaction (frame, apdu, checksum), or None on timeout or error
+        """
         if not self.is_connected():
             print("Serial port not connected, cannot send data")
-            return False, None
+            return None
         
         try:
-            # 清除之前的响应数据和事件状态
-            self.response_event.clear()
-            self.response_frame = None
-            
+            if len(frames) == 1:
+                transaction = self.transact(frames[0], frames[0], timeout, tolerant)
+            else:
+                transaction = self.send_split_request(frames, timeout, retries, tolerant)
+        except (serial.SerialException, OSError) as e:
+            print(f"Send data error: {e}")
+            self.data_received.emit(f"Send error: {str(e)}")  # Send log
+            self._is_connected = False
+            return None
+        except Exception as e:
+            print(f"Send data error: {e}")
+            self.data_received.emit(f"Send error: {str(e)}")  # Send log
+            return None
+        
+        if transaction is None:
+            print("Receive timeout")
+            self.data_received.emit("Receive timeout")  # Send log
+            return None
+        
+        # 最近一次响应（兼容只发一个请求的调用方）
+        self.response_frame = transaction.frame
+        self.response_checksum = transaction.checksum
+        self.response_apdu = transaction.apdu
+        print(f"Response received: {transaction.frame.hex()}")
+        # 不再重复发送信号，receive_loop已经发送了
+        return transaction
+
+    def transact(self, first_frame, frame_data, timeout, tolerant=False):
+        """Register a transaction keyed by the (SA, PIID) of first_frame, send frame_data and wait for the response
+        
+        Blocks while the transaction window is full.
+        
+        Returns:
+            The resolved Transaction, or None on timeout
+        """
+        transaction = self.transactions.begin(first_frame, timeout / 1000.0, tolerant)
+        if transaction is None:
+            print(f"Transaction window ({self.transactions.window}) full, request not sent")
+            return None
+        try:
             print(f"Sending data: {frame_data.hex()}")
             self.serial.write(frame_data)
             self.data_received.emit(f"Send: {frame_data.hex()}")  # Send log
             print("Data sent successfully, waiting for response...")
             
-            # 等待后台线程组装完整帧
-            if self.response_event.wait(timeout / 1000.0):  # 转换为秒
-                response = self.response_frame
-                if response:
-                    print(f"Response received: {response.hex()}")
-                    # 不再重复发送信号，receive_loop已经发送了
-                    return True, response
+            # 等待后台线程把响应交给本事务
+            if transaction.wait(timeout / 1000.0) and transaction.frame:  # 转换为秒
+                return transaction
+            return None
+        finally:
+            self.transactions.finish(transaction)
+
+    def send_split_request(self, frames, timeout, retries, tolerant=False):
+        """Send split frames (confirmed one by one) and wait for the response to the whole APDU"""
+        # Fragment confirmations carry no PIID, so split requests go out one at a time
+        with self.fragment_lock:
+            last = len(frames) - 1
+            for sequence, frame in enumerate(frames[:last]):
+                sequence &= 0x0FFF
+                for attempt in range(retries + 1):
+                    self.confirm_event.clear()
+                    self.confirmed_sequence = None
+                    print(f"Sending fragment {sequence} (attempt {attempt + 1}): {len(frame)} bytes")
+                    self.serial.write(frame)
+                    self.data_received.emit(f"Send: {frame.hex()}")
+                    if self.wait_confirm(sequence, timeout / 1000.0):
+                        break
+                else:
+                    print(f"Fragment {sequence} not confirmed")
+                    self.data_received.emit(f"Fragment {sequence} not confirmed")
+                    return None
             
-            print("Receive timeout")
-            self.data_received.emit("Receive timeout")  # Send log
-            return False, None
-                
-        except Exception as e:
-            print(f"Send data error: {e}")
-            self.data_received.emit(f"Send error: {str(e)}")  # Send log
-            self._is_connected = False
-            return False, None
+            # The last fragment is answered by the response to the whole APDU
+            for attempt in range(retries + 1):
+                transaction = self.transact(frames[0], frames[last], timeout, tolerant)
+                if transaction:
+                    return transaction
+            return None
 
+    def wait_confirm(self, sequence, timeout):
+        """Wait until the confirmation for the given fragment sequence arrives"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.confirm_event.wait(remaining):
+                return False
+            if self.confirmed_sequence == sequence:
+                return True
+            self.confirm_event.clear()
 
-    def process_frame_data(self, data):
-        """Process received data for frame reassembly"""
-        current_time = time.time()
+    def process_frame_data(self, data, received_at=None):
+        """Process received data for frame reassembly
         
-        # Add new data to buffer
-        self.frame_buffer.extend(data)
-        self.last_receive_time = current_time
+        Frames are cut by their length field, so several frames in one read
+        are split apart and a 0x16 inside the payload does not end a frame.
+        The HCS/FCS of each frame is accumulated as its bytes arrive. A partial
+        frame left over from before an idle gap is dropped, so a truncated
+        frame cannot swallow the responses that follow it.
         
-        # Check if we have a complete frame (ending with 0x16)
-        if len(self.frame_buffer) > 0 and self.frame_buffer[-1] == 0x16:
-            # Found complete frame
-            complete_frame = bytes(self.frame_buffer)
-            self.frame_buffer.clear()
-            return complete_frame
+        Returns:
+            List of (frame, (hcs_ok, fcs_ok)) completed by this data
+        """
+        discarded = self.delimiter.discarded
+        frames = self.delimiter.feed(data, received_at)
+        if self.delimiter.discarded != discarded:
+            print(f"Discarded {self.delimiter.discarded - discarded} bytes (partial frame or no frame start)")
+        return frames
+
+    def reassemble_frame(self, frame, checksum=(True, True)):
+        """Feed a complete frame to the split frame reassembler
         
-        return None
+        Acknowledgements for split frames are written back immediately. A split
+        frame failing HCS/FCS is dropped unacknowledged so the peer resends it.
+        
+        Returns:
+            The complete APDU when the frame is unsplit or the last fragment, otherwise None
+        """
+        hcs_ok, fcs_ok = checksum
+        if not (hcs_ok and fcs_ok) and frame[3] & CONTROL_SPLIT:
+            print("Split frame checksum error, dropped without acknowledgement")
+            return None
+        try:
+            result = self.split_reassembler.feed(frame)
+        except (SplitFrameError, IndexError) as e:
+            print(f"Split frame reassembly error: {e}")
+            return None
+        if result.ack:
+            self.serial.write(result.ack)
+            self.data_received.emit(f"Send: {result.ack.hex()}")
+        if result.confirmed is not None:
+            self.confirmed_sequence = result.confirmed
+            self.confirm_event.set()
+        return result.apdu
 
     def receive_frame(self):
         """Receive data frame"""
@@ -196,40 +386,55 @@ class SerialHandler(QObject):
             print("Serial port not connected or not open")
 
     def receive_loop(self):
-        """Receive loop with frame reassembly"""
+        """Receive loop with frame reassembly
+        
+        The thread blocks in read() until at least one byte arrives, then drains
+        whatever else is already buffered; disconnect() wakes it with cancel_read().
+        """
+        port = self.serial
         while not self.stop_receive_thread:  # Check flag bit
             try:
-                # Check if there's data to read
-                if self.serial and self.serial.in_waiting:
-                    data = self.serial.read(self.serial.in_waiting)
-                    if data:
-                        print(f"Received data fragment: {data.hex()}")
-                        
-                        # Process data for frame reassembly
-                        complete_frame = self.process_frame_data(data)
-                        
-                        # If complete frame found, emit signal and set event
-                        if complete_frame:
-                            print(f"Complete frame assembled: {complete_frame.hex()}")
-                            self.data_received.emit(f"Receive: {complete_frame.hex()}")  # 统一格式
-                            
-                            # 设置响应帧并触发事件
-                            self.response_frame = complete_frame
-                            self.response_event.set()
-                
-                # Check for frame timeout (in case of incomplete frame)
-                if len(self.frame_buffer) > 0:
-                    current_time = time.time()
-                    if current_time - self.last_receive_time > self.frame_timeout:
-                        print(f"Frame timeout, discarding incomplete buffer: {self.frame_buffer.hex()}")
-                        self.frame_buffer.clear()
-                
-                time.sleep(0.01)  # Short sleep to avoid high CPU usage
+                data = port.read(1)
+                if not data:
+                    continue  # cancel_read() or port closing
+                waiting = port.in_waiting
+                if waiting:
+                    data += port.read(waiting)
+                self.dispatch_data(data, time.perf_counter())
                 
             except Exception as e:
+                if self.stop_receive_thread or not port.is_open:
+                    break
                 print(f"Receive loop error: {e}")
                 time.sleep(0.1)  # Sleep longer on error
 
+    def dispatch_data(self, data, received_at):
+        """Reassemble received bytes and dispatch complete frames
+        
+        Args:
+            data: Bytes returned by one read
+            received_at: time.perf_counter() when the read returned
+        """
+        print(f"Received data fragment: {data.hex()}")
+        
+        # Process data for frame reassembly; one read may complete several frames
+        for complete_frame, checksum in self.process_frame_data(data, received_at):
+            self.last_frame_checksum = checksum
+            hcs_ok, fcs_ok = checksum
+            self.data_received.emit(f"Receive: {complete_frame.hex()}")  # 统一格式
+            
+            # Split frames are acknowledged and buffered; only a complete APDU completes the response
+            apdu = self.reassemble_frame(complete_frame, checksum)
+            if apdu is not None:
+                # 按(SA, PIID)交给对应的请求
+                if self.transactions.resolve(complete_frame, apdu, checksum) is None:
+                    print("No pending request for this frame (unsolicited or late response)")
+            
+            latency = time.perf_counter() - received_at
+            self.latency.record(latency)
+            print(f"Complete frame assembled: {complete_frame.hex()} (HCS ok: {hcs_ok}, FCS ok: {fcs_ok}, "
+                  f"dispatch latency: {latency * 1000:.3f} ms)")
+
     def checkthread(self):
         # Get list of all threads
         all_threads = threading.enumerate()